@@ -0,0 +1,151 @@
+"""
+Check that the DuckDB CSV engine answers like the CsvTools path and compare
+their query latency on a generated CSV file.
+
+    uv run benchmarks/csv_engines.py --rows 1000000
+
+Each query is run through phi's CsvTools, which imports the file into a new
+in-memory table for every query, and through the tool of a DuckDbCSVAgent,
+both as a view over `read_csv_auto` and persisted into a local .duckdb file.
+The result cache of the agent is disabled so every query scans the data.
+The script exits non-zero if any engine returns a different result.
+"""
+
+import argparse
+import csv
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from phi.tools.csv_tools import CsvTools
+
+from parrot.agents.csv_agent import DuckDbCSVAgent
+
+TABLE = "orders"
+REGIONS = ["north", "south", "east", "west", "central"]
+PRODUCTS = [f"product_{i:03}" for i in range(200)]
+COLUMNS = [
+    "order_id",
+    "customer_id",
+    "region",
+    "product",
+    "quantity",
+    "price",
+    "discount",
+    "ordered_at",
+]
+
+# Every query is ordered and rounded, so equal results render identically
+QUERIES = [
+    f"SELECT COUNT(*) FROM {TABLE}",
+    f"SELECT region, COUNT(*), ROUND(SUM(quantity * price), 2) FROM {TABLE} "
+    "GROUP BY region ORDER BY region",
+    f"SELECT product, SUM(quantity) AS units FROM {TABLE} "
+    "GROUP BY product ORDER BY units DESC, product LIMIT 10",
+    f"SELECT COUNT(*), ROUND(AVG(price), 4) FROM {TABLE} WHERE discount IS NULL",
+    f"SELECT date_trunc('month', ordered_at) AS month, COUNT(DISTINCT customer_id) "
+    f"FROM {TABLE} GROUP BY month ORDER BY month",
+    f"SELECT * FROM {TABLE} WHERE customer_id = 4242 ORDER BY order_id",
+    f"SELECT MIN(ordered_at), MAX(ordered_at), MAX(quantity) FROM {TABLE}",
+]
+
+
+def make_csv(path: Path, rows: int, rng: random.Random) -> None:
+    start = date(2022, 1, 1)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for order_id in range(rows):
+            writer.writerow(
+                [
+                    order_id,
+                    rng.randint(1, 50_000),
+                    rng.choice(REGIONS),
+                    rng.choice(PRODUCTS),
+                    rng.randint(1, 20),
+                    f"{rng.uniform(1, 500):.2f}",
+                    "" if rng.random() < 0.7 else f"{rng.uniform(0, 0.3):.2f}",
+                    (start + timedelta(days=rng.randint(0, 729))).isoformat(),
+                ]
+            )
+
+
+def duckdb_engine(path: Path, db_path: Optional[str] = None) -> Callable[[str], str]:
+    # The tools are all the benchmark needs, so the agent gets no model
+    agent = DuckDbCSVAgent(model=None, file_path=str(path), db_path=db_path)
+    tool = agent._agent.tools[0]
+    tool.result_cache = None
+    return tool.run_query
+
+
+def csvtools_engine(path: Path) -> Callable[[str], str]:
+    tools = CsvTools(csvs=[path])
+    return lambda sql: tools.query_csv_file(TABLE, sql)
+
+
+def timed(run: Callable[[str], str], sql: str, runs: int) -> tuple[str, float]:
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = run(sql)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=3, help="Runs per query and engine")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / f"{TABLE}.csv"
+        start = time.perf_counter()
+        make_csv(path, args.rows, random.Random(args.seed))
+        size = path.stat().st_size / 1024**2
+        print(f"Wrote {args.rows} rows, {size:.0f} MiB in {time.perf_counter() - start:.1f}s\n")
+
+        engines: Dict[str, Callable[[str], str]] = {}
+        for name, make in (
+            ("csvtools", lambda: csvtools_engine(path)),
+            ("duckdb-view", lambda: duckdb_engine(path)),
+            ("duckdb-file", lambda: duckdb_engine(path, str(Path(tmp) / "orders.duckdb"))),
+        ):
+            start = time.perf_counter()
+            engines[name] = make()
+            print(f"{name:<12} set up in {(time.perf_counter() - start) * 1000:8.1f} ms")
+        print()
+
+        mismatches: List[str] = []
+        totals = {name: 0.0 for name in engines}
+        for index, sql in enumerate(QUERIES, 1):
+            results = {}
+            timings = []
+            for name, run in engines.items():
+                results[name], milliseconds = timed(run, sql, args.runs)
+                totals[name] += milliseconds
+                timings.append(f"{name} {milliseconds:8.1f} ms")
+            expected = results["csvtools"]
+            differing = [name for name, result in results.items() if result != expected]
+            status = "ok" if not differing else "MISMATCH " + ", ".join(differing)
+            print(f"q{index}  {'  '.join(timings)}  {status}")
+            if expected.startswith("Error"):
+                mismatches.append(f"q{index} failed: {expected}")
+            mismatches.extend(
+                f"q{index} {name}:\n{results[name]}\nexpected:\n{expected}" for name in differing
+            )
+
+        print("\ntotal " + "  ".join(f"{name} {ms:8.1f} ms" for name, ms in totals.items()))
+        for mismatch in mismatches:
+            print(f"\nFAIL: {mismatch}")
+        sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Measure recall@k and latency of lexical, vector and hybrid chunk retrieval
+on a generated fixture corpus.
+
+    uv run benchmarks/retrieval.py --documents 2000 --embedder hash-256
+
+The corpus has one short document per file, each about one of a few dozen
+topics and mentioning a unique ticket ID and column name. Identifier queries
+ask for a ticket or column; topic queries use some of a document's distinctive
+words. The expected answer is the document the query was made from.
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from parrot.rag.embedding_service import EmbeddingService
+from parrot.rag.embeddings import load_embedder
+from parrot.rag.ingestion_service import IngestionService
+from parrot.rag.retriever import (
+    ChunkRetriever,
+    HybridRetriever,
+    RetrievedChunk,
+    TermOverlapReranker,
+)
+from parrot.rag.storage.bootstrap import init_db
+from parrot.rag.vector_store import VectorStore
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "pa", "qu", "del", "mor", "ban"]
+TOPICS = 40
+TOPIC_WORDS = 30
+DOCUMENT_WORDS = 120
+DISTINCT_WORDS = 8
+
+
+def make_word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def make_corpus(directory: Path, count: int, rng: random.Random) -> List[Dict[str, str]]:
+    """Write the documents and return a query of each kind per document."""
+    topics = [[make_word(rng) for _ in range(TOPIC_WORDS)] for _ in range(TOPICS)]
+    queries = []
+    for index in range(count):
+        topic = topics[index % TOPICS]
+        distinct = [make_word(rng) for _ in range(DISTINCT_WORDS)]
+        ticket = f"PRJ-{1000 + index}"
+        column = f"orders.{make_word(rng)}_{make_word(rng)}"
+
+        words = rng.choices(topic, k=DOCUMENT_WORDS) + distinct
+        rng.shuffle(words)
+        middle = len(words) // 2
+        text = (
+            " ".join(words[:middle])
+            + f". Tracked in {ticket}, it changes the column {column}. "
+            + " ".join(words[middle:])
+            + "."
+        )
+        path = directory / f"doc{index:05}.txt"
+        path.write_text(text)
+
+        for query in (f"What happened in {ticket}?", f"Which ticket changed {column}"):
+            queries.append({"kind": "identifier", "query": query, "path": str(path)})
+        topic_query = rng.sample(distinct, 3) + rng.sample(topic, 3)
+        rng.shuffle(topic_query)
+        queries.append({"kind": "topic", "query": " ".join(topic_query), "path": str(path)})
+    return queries
+
+
+def evaluate(
+    label: str,
+    search: Callable[[str, int], List[RetrievedChunk]],
+    queries: List[Dict[str, str]],
+    k: int,
+) -> None:
+    for kind in ("identifier", "topic"):
+        subset = [query for query in queries if query["kind"] == kind]
+        hits = 0
+        latencies = []
+        for query in subset:
+            start = time.perf_counter()
+            results = search(query["query"], k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += any(result.source_path == query["path"] for result in results)
+
+        latencies.sort()
+        print(
+            f"{label:<16} {kind:<11} recall@{k} {hits / len(subset):6.3f}  "
+            f"p50 {statistics.median(latencies):7.2f} ms  "
+            f"p95 {latencies[int(len(latencies) * 0.95)]:7.2f} ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=300, help="Queries of each kind")
+    parser.add_argument("--embedder", default="hash-256", help="hash-<dim> or ollama:<model>")
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = Path(tmp) / "corpus"
+        corpus.mkdir()
+        queries = make_corpus(corpus, args.documents, rng)
+        queries = [
+            query
+            for kind in ("identifier", "topic")
+            for query in rng.sample([q for q in queries if q["kind"] == kind], args.queries)
+        ]
+
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.sqlite'}")
+        init_db(engine)
+        session_factory = sessionmaker(bind=engine)
+
+        store = VectorStore(str(Path(tmp) / "vectors"))
+        embedder = load_embedder(args.embedder)
+        service = IngestionService(
+            session_factory, embedding=EmbeddingService(embedder, store, session_factory)
+        )
+        service.enqueue(str(corpus))
+        stats = service.run()
+        print(
+            f"Ingested {stats.completed} documents, {stats.chunks} chunks "
+            f"in {stats.seconds:.1f}s with {embedder.name}\n"
+        )
+
+        vector = ChunkRetriever(store, embedder, session_factory)
+        lexical = HybridRetriever(session_factory)
+        hybrid = HybridRetriever(session_factory, vector)
+        reranked = HybridRetriever(session_factory, vector, TermOverlapReranker())
+
+        evaluate("lexical", lexical.search, queries, args.k)
+        evaluate("vector", vector.search, queries, args.k)
+        evaluate("hybrid", hybrid.search, queries, args.k)
+        evaluate("hybrid+rerank", reranked.search, queries, args.k)
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
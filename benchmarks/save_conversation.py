@@ -0,0 +1,89 @@
+"""
+Compare the per-message cost of saving a conversation one commit per message
+with the bulk ChatRepository.save_conversation path.
+
+    uv run benchmarks/save_conversation.py --messages 5000
+"""
+
+import argparse
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from parrot.db.base_model import Base
+from parrot.db.repositories.chat_repository import ChatRepository
+from parrot.models.chat_session import ChatMessage, ChatSession
+
+# Committing every message is slow, so the baseline is measured on fewer
+# messages and compared per message
+BASELINE_MAX_MESSAGES = 500
+
+
+def make_messages(count: int) -> list[tuple[str, str, None]]:
+    return [
+        ("You" if i % 2 == 0 else "Parrot", f"message {i} " + "lorem ipsum " * 20, None)
+        for i in range(count)
+    ]
+
+
+def save_per_message(db: Session, messages: list) -> None:
+    """The previous save_conversation: add, commit and refresh every message."""
+    session = ChatSession(id=str(uuid.uuid4()), title="per-message")
+    db.add(session)
+    db.commit()
+    db.refresh(session)
+
+    started_at = datetime.now()
+    for index, (sender, raw_content, _styled_content) in enumerate(messages):
+        message = ChatMessage(
+            id=str(uuid.uuid4()),
+            session_id=session.id,
+            sequence=index + 1,
+            sender=sender,
+            raw_content=raw_content,
+            created_at=started_at + timedelta(microseconds=index),
+        )
+        db.add(message)
+        db.commit()
+        db.refresh(message)
+
+
+def report(label: str, count: int, seconds: float) -> None:
+    print(
+        f"{label:<18} {count:>7} messages  {seconds:8.3f}s  "
+        f"{seconds / count * 1e6:10.1f} us/message"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--messages", type=int, default=5000)
+    args = parser.parse_args()
+
+    messages = make_messages(args.messages)
+    baseline_messages = messages[:BASELINE_MAX_MESSAGES]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.sqlite'}")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+
+        start = time.perf_counter()
+        save_per_message(db, baseline_messages)
+        report("per message", len(baseline_messages), time.perf_counter() - start)
+
+        start = time.perf_counter()
+        ChatRepository(db).save_conversation(messages, title="bulk")
+        report("save_conversation", len(messages), time.perf_counter() - start)
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Check that starting parrot stays within its import-time budget.
+
+    uv run benchmarks/startup.py --budget-ms 1000
+
+Imports the entry point in fresh interpreters with `python -X importtime`,
+reports the median cumulative import time and the slowest top-level
+imports, and exits non-zero if the median exceeds the budget or if any of
+the libraries that only a data source, provider or menu action needs was
+imported at startup.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ENTRY_POINT = "parrot.main"
+
+# Loaded by the action or data source that needs them, never at startup
+DEFERRED = [
+    "phi",
+    "pandas",
+    "numpy",
+    "duckdb",
+    "ollama",
+    "groq",
+    "httpx",
+    "InquirerPy",
+    "sqlalchemy",
+    "textual",
+]
+
+
+def measure(module: str) -> Tuple[float, Dict[str, float]]:
+    """
+    Import a module in a fresh interpreter.
+
+    Returns its cumulative import time in milliseconds and the cumulative
+    time of every top-level package imported on the way.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0.0
+    packages: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        microseconds = int(cumulative)
+        name = name.rstrip()
+        if name.strip() == module:
+            total = microseconds / 1000
+        top = name.strip().split(".")[0]
+        packages[top] = max(packages.get(top, 0.0), microseconds / 1000)
+    return total, packages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--budget-ms", type=float, default=1000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--module", default=ENTRY_POINT)
+    args = parser.parse_args()
+
+    # The first run warms the bytecode and file system caches
+    measure(args.module)
+    runs: List[Tuple[float, Dict[str, float]]] = [
+        measure(args.module) for _ in range(args.runs)
+    ]
+    median = statistics.median(total for total, _ in runs)
+    packages = runs[-1][1]
+
+    print(
+        f"{args.module}: median {median:.0f} ms over {args.runs} runs "
+        f"(budget {args.budget_ms:.0f} ms)"
+    )
+    for name, milliseconds in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:8]:
+        print(f"  {name:<20} {milliseconds:7.1f} ms")
+
+    failures = []
+    if median > args.budget_ms:
+        failures.append(
+            f"import time {median:.0f} ms exceeds the budget of {args.budget_ms:.0f} ms"
+        )
+    eager = sorted(name for name in DEFERRED if name in packages)
+    if eager:
+        failures.append(f"imported at startup: {', '.join(eager)}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Measure recall@k and latency of VectorStore searches against exact search.
+
+    uv run benchmarks/vector_recall.py --vectors 1000000 --dim 128
+
+Vectors are drawn around random cluster centres, added in batches the way
+ingestion adds them, so the IVF index is trained early and later vectors
+are assigned to its lists, then searched with a range of nprobe values.
+The index is then retrained on all vectors with build_index() and searched
+again. Recall@k is the share of the exact top k that a search returns.
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from parrot.rag.vector_store import VectorStore, normalize
+
+ADD_BATCH = 10_000
+
+
+def clustered(rng: np.random.Generator, centres: np.ndarray, count: int, spread: float):
+    labels = rng.integers(len(centres), size=count)
+    noise = rng.normal(scale=spread / np.sqrt(centres.shape[1]), size=(count, centres.shape[1]))
+    return normalize(centres[labels] + noise.astype(np.float32))
+
+
+def evaluate(
+    label: str,
+    store: VectorStore,
+    queries: np.ndarray,
+    truth: List[set],
+    k: int,
+    nprobes: List[Optional[int]],
+) -> None:
+    for nprobe in nprobes:
+        hits = 0
+        latencies = []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            if nprobe is None:
+                rows, _ = store.search(query, k)
+            else:
+                rows, _ = store.search(query, k, nprobe)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len(expected.intersection(rows.tolist()))
+
+        latencies.sort()
+        name = "default" if nprobe is None else str(nprobe)
+        print(
+            f"{label:<12} nprobe {name:>7}  recall@{k} {hits / (k * len(queries)):6.3f}  "
+            f"p50 {statistics.median(latencies):7.2f} ms  "
+            f"p95 {latencies[int(len(latencies) * 0.95)]:7.2f} ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--vectors", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--clusters", type=int, help="Defaults to one per 200 vectors")
+    parser.add_argument("--spread", type=float, default=1.5, help="Noise norm around a centre")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 16, 32, 64, 128])
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    clusters = args.clusters or max(1, args.vectors // 200)
+    centres = normalize(rng.normal(size=(clusters, args.dim)))
+    queries = clustered(rng, centres, args.queries, args.spread)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = VectorStore(tmp)
+        start = time.perf_counter()
+        for first in range(0, args.vectors, ADD_BATCH):
+            count = min(ADD_BATCH, args.vectors - first)
+            store.add(clustered(rng, centres, count, args.spread), "benchmark")
+        print(
+            f"Added {store.count} {args.dim}-d vectors in {time.perf_counter() - start:.1f}s, "
+            f"index of {len(store._index.centroids)} lists trained on {store.trained_count}\n"
+        )
+
+        truth = []
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            truth.append(set(store._exact_search(query, args.k)[0].tolist()))
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(
+            f"{'exact':<12} {'':14}  recall@{args.k} {1:6.3f}  "
+            f"p50 {statistics.median(latencies):7.2f} ms\n"
+        )
+
+        nprobes = [None] + args.nprobe
+        evaluate("incremental", store, queries, truth, args.k, nprobes)
+
+        start = time.perf_counter()
+        store.build_index()
+        print(
+            f"\nRetrained the index into {len(store._index.centroids)} lists "
+            f"in {time.perf_counter() - start:.1f}s\n"
+        )
+        evaluate("retrained", store, queries, truth, args.k, nprobes)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,18 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Iterator, List, Optional
 from parrot.agents.filters import TextFilter
 from parrot.agents.response import AgentResponse
+from phi.agent import Agent
 from phi.model.base import Model
+from phi.tools import Toolkit
+
+
+def stream_agent(agent: Agent, input_text: str) -> Iterator[str]:
+    """Run a phi agent in streaming mode and yield the content deltas."""
+    for chunk in agent.run(input_text, stream=True):
+        content = chunk.content if hasattr(chunk, "content") else chunk
+        if content:
+            yield str(content)
 
 
 class ParrotAgent(ABC):
@@ -20,3 +30,34 @@ class ParrotAgent(ABC):
     @abstractmethod
     def run(self, input_text: str) -> AgentResponse:
         pass
+
+    def stream(self, input_text: str) -> Iterator[str]:
+        """
+        Yield the answer incrementally as the model produces it. Agents that
+        cannot stream yield the complete answer once.
+        """
+        yield self.run(input_text).content
+
+    def add_tools(self, *tools: Toolkit) -> None:
+        """Give the underlying phi agent extra toolkits, e.g. document search."""
+        agent: Agent = getattr(self, "_agent", None)
+        if agent is None:
+            raise ValueError(f"{type(self).__name__} has no phi agent to add tools to")
+        agent.tools = [*(agent.tools or []), *tools]
+
+    def source_identity(self) -> Optional[str]:
+        """
+        Stable identity of the data source this agent answers from.
+
+        Returns:
+            The identity, or None if the agent's answers must not be cached
+        """
+        return None
+
+    def data_fingerprint(self) -> Optional[str]:
+        """
+        Cheap fingerprint of the data currently in the source. Cached answers
+        are only reused while the fingerprint is unchanged, and not cached at
+        all while it is None.
+        """
+        return ""
@@ -0,0 +1,380 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from phi.utils.log import logger
+from sqlalchemy import Engine, inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from parrot.db.repositories.catalog_repository import CatalogRepository
+from parrot.models.schema_catalog import CatalogColumn, CatalogTable
+
+CATALOG_TTL_SECONDS = 600
+
+DEFAULT_PROMPT_TABLES = 50
+
+_PG_SYSTEM_SCHEMAS = "('pg_catalog', 'information_schema')"
+
+_PG_RELATIONS = f"""
+    FROM pg_attribute a
+    JOIN pg_class cl ON cl.oid = a.attrelid
+    JOIN pg_namespace n ON n.oid = cl.relnamespace
+    WHERE cl.relkind IN ('r', 'v', 'm', 'p', 'f')
+      AND a.attnum > 0
+      AND NOT a.attisdropped
+      AND n.nspname NOT IN {_PG_SYSTEM_SCHEMAS}
+      AND n.nspname NOT LIKE 'pg_toast%'
+"""
+
+_PG_SIGNATURE_SQL = f"""
+    SELECT md5(coalesce(string_agg(item, ',' ORDER BY item), ''))
+    FROM (
+        SELECT n.nspname || '.' || cl.relname || '.' || a.attname || ':'
+               || format_type(a.atttypid, a.atttypmod) || ':' || a.attnotnull::text AS item
+        {_PG_RELATIONS}
+        UNION ALL
+        SELECT con.conrelid::text || ':' || con.conname
+        FROM pg_constraint con
+        WHERE con.contype = 'f'
+    ) catalog
+"""
+
+# The WAL position advances with every committed write on a primary, and with
+# every replayed one on a standby, where the statistics counters stand still
+_PG_DATA_VERSION_SQL = """
+    SELECT CASE WHEN pg_is_in_recovery() THEN pg_last_wal_replay_lsn()
+                ELSE pg_current_wal_lsn() END::text
+"""
+
+_PG_COLUMNS_SQL = f"""
+    SELECT n.nspname, cl.relname, obj_description(cl.oid, 'pg_class'), cl.reltuples::bigint,
+           a.attname, format_type(a.atttypid, a.atttypmod), NOT a.attnotnull, a.attnum,
+           col_description(cl.oid, a.attnum)
+    {_PG_RELATIONS}
+    ORDER BY n.nspname, cl.relname, a.attnum
+"""
+
+_PG_FOREIGN_KEYS_SQL = """
+    SELECT n.nspname, cl.relname, a.attname, fn.nspname, fcl.relname, fa.attname
+    FROM pg_constraint con
+    JOIN pg_class cl ON cl.oid = con.conrelid
+    JOIN pg_namespace n ON n.oid = cl.relnamespace
+    JOIN pg_class fcl ON fcl.oid = con.confrelid
+    JOIN pg_namespace fn ON fn.oid = fcl.relnamespace
+    CROSS JOIN LATERAL unnest(con.conkey, con.confkey) AS k(attnum, fattnum)
+    JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+    JOIN pg_attribute fa ON fa.attrelid = con.confrelid AND fa.attnum = k.fattnum
+    WHERE con.contype = 'f'
+"""
+
+
+class SchemaCatalog:
+    """
+    Persistent cache of a SQL source's schema, stored in the local Parrot DB.
+
+    On PostgreSQL the whole catalog (tables, columns, types, foreign keys and
+    row estimates) is fetched in bulk from pg_catalog, and a single signature
+    query detects schema changes so unchanged databases are never re-read.
+    Other dialects fall back to SQLAlchemy's inspector. Only tables whose
+    definition changed are rewritten on refresh.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        repo: CatalogRepository,
+        ttl_seconds: int = CATALOG_TTL_SECONDS,
+    ):
+        self.engine = engine
+        self.repo = repo
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.source_key = hashlib.sha256(
+            engine.url.render_as_string(hide_password=True).encode()
+        ).hexdigest()[:16]
+        self._tables: Optional[List[CatalogTable]] = None
+        # A connection of its own, as PRAGMA data_version only compares within one
+        self._sqlite_version_conn: Optional[sqlite3.Connection] = None
+        self._sqlite_version_lock = threading.Lock()
+
+    @property
+    def tables(self) -> List[CatalogTable]:
+        """Catalogued tables, refreshed from the source when the cache is stale."""
+        if self._tables is None:
+            self.refresh()
+        return self._tables
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Bring the cached catalog up to date with the source.
+
+        Args:
+            force: Re-read the source even if the cache is fresh and unchanged
+
+        Returns:
+            True if any table was added, changed or removed
+        """
+        source = self.repo.get_source(self.source_key)
+        if not force and source and datetime.now() - source.checked_at < self.ttl:
+            self._tables = self._tables or self.repo.list_tables(self.source_key)
+            return False
+
+        probe = self._probe_signature()
+        if not force and source and probe is not None and probe == source.signature:
+            self.repo.mark_checked(self.source_key)
+            self._tables = self._tables or self.repo.list_tables(self.source_key)
+            return False
+
+        fetched = self._fetch()
+        stored = {table.id: table for table in self.repo.list_tables(self.source_key)}
+
+        upserts = []
+        for table in fetched:
+            current = stored.get(table.id)
+            if current is None or current.signature != table.signature:
+                upserts.append(table)
+            elif current.row_estimate != table.row_estimate:
+                current.row_estimate = table.row_estimate
+
+        fetched_ids = {table.id for table in fetched}
+        deleted_ids = [table_id for table_id in stored if table_id not in fetched_ids]
+
+        signature = probe or _hash(sorted(f"{t.id}:{t.signature}" for t in fetched))
+        self.repo.apply_changes(
+            self.source_key, self.engine.dialect.name, signature, upserts, deleted_ids
+        )
+        self._tables = self.repo.list_tables(self.source_key)
+        return bool(upserts or deleted_ids)
+
+    def data_fingerprint(self) -> Optional[str]:
+        """
+        Fingerprint of the source's schema and data, or None if data changes
+        cannot be detected, in which case results must not be cached.
+
+        On PostgreSQL it includes the WAL position, current on a primary and
+        replayed on a standby. On SQLite it includes the size and mtime of the
+        database and its WAL file, and PRAGMA data_version.
+        """
+        if self._tables is None:
+            self.refresh()
+
+        dialect = self.engine.dialect.name
+        if dialect == "postgresql":
+            version = self._postgres_data_version()
+        elif dialect == "sqlite":
+            version = self._sqlite_data_version()
+        else:
+            version = None
+        if version is None:
+            return None
+
+        source = self.repo.get_source(self.source_key)
+        signature = source.signature if source else ""
+        return f"{signature}:{version}"
+
+    def _postgres_data_version(self) -> Optional[str]:
+        try:
+            with self.engine.connect() as conn:
+                return conn.execute(text(_PG_DATA_VERSION_SQL)).scalar()
+        except SQLAlchemyError as e:
+            logger.warning(f"Cannot read the WAL position, results are not cached: {e}")
+            return None
+
+    def _sqlite_data_version(self) -> Optional[str]:
+        path = self.engine.url.database
+        if not path or path == ":memory:" or not os.path.exists(path):
+            return None
+
+        parts = []
+        for file_path in (path, f"{path}-wal"):
+            if os.path.exists(file_path):
+                stat = os.stat(file_path)
+                parts.append(f"{stat.st_mtime_ns}:{stat.st_size}")
+        try:
+            with self._sqlite_version_lock:
+                if self._sqlite_version_conn is None:
+                    self._sqlite_version_conn = sqlite3.connect(
+                        f"{Path(path).resolve().as_uri()}?mode=ro",
+                        uri=True,
+                        check_same_thread=False,
+                    )
+                version = self._sqlite_version_conn.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.warning(f"Cannot read the SQLite data version, results are not cached: {e}")
+            return None
+        return ":".join([*parts, str(version)])
+
+    def render(
+        self,
+        tables: Optional[List[CatalogTable]] = None,
+        max_tables: int = DEFAULT_PROMPT_TABLES,
+        columns: Optional[Dict[str, List[CatalogColumn]]] = None,
+    ) -> str:
+        """
+        Render tables as a compact schema description for the model.
+
+        Args:
+            tables: Tables to render, all catalogued tables if not given
+            max_tables: Maximum number of tables to include
+            columns: Columns to render per table id, all columns if not given
+
+        Returns:
+            The schema description
+        """
+        tables = self.tables if tables is None else tables
+
+        lines = []
+        for table in tables[:max_tables]:
+            header = table.qualified_name
+            if table.row_estimate is not None and table.row_estimate >= 0:
+                header += f" (~{table.row_estimate} rows)"
+            if table.comment:
+                header += f" -- {table.comment}"
+            lines.append(header)
+
+            table_columns = columns.get(table.id, table.columns) if columns else table.columns
+            for column in table_columns:
+                line = f"  - {column.name} {column.data_type}"
+                if not column.nullable:
+                    line += " not null"
+                if column.fk_table:
+                    line += f" -> {column.fk_table}.{column.fk_column}"
+                if column.comment:
+                    line += f" -- {column.comment}"
+                lines.append(line)
+            if len(table_columns) < len(table.columns):
+                lines.append(f"  ... and {len(table.columns) - len(table_columns)} more columns")
+
+        if len(tables) > max_tables:
+            lines.append(f"... and {len(tables) - max_tables} more tables")
+
+        return "\n".join(lines)
+
+    def _probe_signature(self) -> Optional[str]:
+        if self.engine.dialect.name != "postgresql":
+            return None
+
+        with self.engine.connect() as conn:
+            return conn.execute(text(_PG_SIGNATURE_SQL)).scalar()
+
+    def _fetch(self) -> List[CatalogTable]:
+        if self.engine.dialect.name == "postgresql":
+            return self._fetch_postgres()
+        return self._fetch_generic()
+
+    def _fetch_postgres(self) -> List[CatalogTable]:
+        with self.engine.connect() as conn:
+            column_rows = conn.execute(text(_PG_COLUMNS_SQL)).all()
+            fk_rows = conn.execute(text(_PG_FOREIGN_KEYS_SQL)).all()
+
+        foreign_keys = {
+            (schema, table, column): (f"{ref_schema}.{ref_table}", ref_column)
+            for schema, table, column, ref_schema, ref_table, ref_column in fk_rows
+        }
+
+        tables: Dict[tuple, CatalogTable] = {}
+        for (
+            schema,
+            name,
+            comment,
+            row_estimate,
+            column,
+            data_type,
+            nullable,
+            ordinal,
+            column_comment,
+        ) in column_rows:
+            table = tables.get((schema, name))
+            if table is None:
+                table = tables[(schema, name)] = self._new_table(
+                    schema, name, comment, row_estimate
+                )
+
+            fk_table, fk_column = foreign_keys.get((schema, name, column), (None, None))
+            table.columns.append(
+                CatalogColumn(
+                    name=column,
+                    data_type=data_type,
+                    nullable=nullable,
+                    ordinal=ordinal,
+                    comment=column_comment,
+                    fk_table=fk_table,
+                    fk_column=fk_column,
+                )
+            )
+
+        return self._sign(list(tables.values()))
+
+    def _fetch_generic(self) -> List[CatalogTable]:
+        inspector = inspect(self.engine)
+
+        tables = []
+        for name in inspector.get_table_names() + inspector.get_view_names():
+            try:
+                comment = inspector.get_table_comment(name).get("text")
+            except NotImplementedError:
+                comment = None
+
+            foreign_keys = {}
+            for fk in inspector.get_foreign_keys(name):
+                for column, ref_column in zip(
+                    fk["constrained_columns"], fk["referred_columns"]
+                ):
+                    foreign_keys[column] = (fk["referred_table"], ref_column)
+
+            table = self._new_table(None, name, comment, None)
+            for ordinal, column in enumerate(inspector.get_columns(name), start=1):
+                fk_table, fk_column = foreign_keys.get(column["name"], (None, None))
+                table.columns.append(
+                    CatalogColumn(
+                        name=column["name"],
+                        data_type=str(column["type"]),
+                        nullable=column.get("nullable", True),
+                        ordinal=ordinal,
+                        comment=column.get("comment"),
+                        fk_table=fk_table,
+                        fk_column=fk_column,
+                    )
+                )
+            tables.append(table)
+
+        return self._sign(tables)
+
+    def _new_table(
+        self,
+        schema: Optional[str],
+        name: str,
+        comment: Optional[str],
+        row_estimate: Optional[int],
+    ) -> CatalogTable:
+        qualified_name = f"{schema}.{name}" if schema else name
+        return CatalogTable(
+            id=f"{self.source_key}:{qualified_name}",
+            source_key=self.source_key,
+            schema_name=schema,
+            name=name,
+            comment=comment,
+            row_estimate=row_estimate,
+            columns=[],
+        )
+
+    @staticmethod
+    def _sign(tables: List[CatalogTable]) -> List[CatalogTable]:
+        # The row estimate is left out so that statistics updates alone do
+        # not cause the table to be rewritten
+        for table in tables:
+            table.signature = _hash(
+                [table.comment or ""]
+                + [
+                    f"{c.name}:{c.data_type}:{c.nullable}:{c.fk_table}:{c.fk_column}:{c.comment}"
+                    for c in table.columns
+                ]
+            )
+        return tables
+
+
+def _hash(items: List[str]) -> str:
+    return hashlib.sha256("\n".join(items).encode()).hexdigest()
@@ -1,14 +1,16 @@
 from phi.agent import Agent
 from phi.model.base import Model
 from phi.run.response import RunResponse
-from phi.tools.csv_tools import CsvTools
-
-import pandas as pd
 import logging
+import os
+from typing import Iterator, Optional
 
-from parrot.agents.base_agent import ParrotAgent
-from parrot.agents.prompts import get_sql_system_prompt
+from parrot.agents.base_agent import ParrotAgent, stream_agent
+from parrot.agents.prompts import get_duckdb_system_prompt, get_sql_system_prompt
 from parrot.agents.response import AgentResponse
+from parrot.agents.schema import SourceSummary, csv_scan, file_fingerprint, summarize_csv
+from parrot.agents.result_cache import ResultCache
+from parrot.agents.tools import CachedDuckDbTools, SharedCsvTools
 
 # Remove existing handlers from the 'phi' logger
 phi_logger = logging.getLogger("phi")
@@ -26,13 +28,19 @@ class CSVAgent(ParrotAgent):
         self.model = model
         self.init_agent()
 
-    def _get_df(self) -> pd.DataFrame:
-        return pd.read_csv(self.file_path)
+    def _get_summary(self) -> SourceSummary:
+        return summarize_csv(self.file_path)
+
+    def source_identity(self) -> Optional[str]:
+        return f"csv:{os.path.abspath(self.file_path)}"
+
+    def data_fingerprint(self) -> str:
+        return ":".join(str(part) for part in file_fingerprint(self.file_path))
 
     def _prepare_prompt(self) -> str:
-        columns = self._get_df().head().to_string(index=False)
         return get_sql_system_prompt(
-            columns, output_format=AgentResponse().model_dump_json()
+            self._get_summary().to_prompt(),
+            output_format=AgentResponse().model_dump_json(),
         )
 
     def init_agent(self) -> None:
@@ -40,7 +48,13 @@ class CSVAgent(ParrotAgent):
             model=self.model,
             markdown=False,
             system_prompt=self._prepare_prompt(),
-            tools=[CsvTools(csvs=[self.file_path])],
+            tools=[
+                SharedCsvTools(
+                    csvs=[self.file_path],
+                    result_cache=ResultCache(),
+                    fingerprint=self.data_fingerprint,
+                )
+            ],
             show_tool_calls=True,
             add_datetime_to_instructions=True,
             debug_mode=True,
@@ -48,3 +62,83 @@ class CSVAgent(ParrotAgent):
 
     def run(self, input_text: str) -> RunResponse:
         return self._agent.run(input_text)
+
+    def stream(self, input_text: str) -> Iterator[str]:
+        return stream_agent(self._agent, input_text)
+
+
+class DuckDbCSVAgent(CSVAgent):
+    """
+    CSV agent that queries the file through DuckDB's streaming CSV scanner.
+
+    Without a `db_path` the file is exposed as a view over `read_csv_auto`, so
+    queries scan it in parallel without materializing it in memory. With a
+    `db_path` the file is imported once into that local .duckdb database and
+    only re-imported when the CSV changes on disk.
+    """
+
+    SOURCES_TABLE = "_parrot_sources"
+
+    def __init__(self, model: Model, file_path: str, db_path: Optional[str] = None) -> None:
+        self.db_path = db_path
+        super().__init__(model=model, file_path=file_path)
+
+    def _prepare_prompt(self) -> str:
+        return get_duckdb_system_prompt(self._get_summary().to_prompt())
+
+    def _load_source(self, tool: CachedDuckDbTools) -> str:
+        table_name = tool.get_table_name_from_path(self.file_path)
+        scan = f"SELECT * FROM {csv_scan(self.file_path)}"
+
+        if self.db_path is None:
+            tool.connection.execute(f'CREATE OR REPLACE VIEW "{table_name}" AS {scan}')
+            return table_name
+
+        fingerprint = self.data_fingerprint()
+        tool.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.SOURCES_TABLE} "
+            "(table_name VARCHAR PRIMARY KEY, fingerprint VARCHAR NOT NULL)"
+        )
+        loaded = tool.connection.execute(
+            f"SELECT fingerprint FROM {self.SOURCES_TABLE} WHERE table_name = ?",
+            [table_name],
+        ).fetchone()
+
+        if loaded is None or loaded[0] != fingerprint:
+            tool.connection.execute(f'CREATE OR REPLACE TABLE "{table_name}" AS {scan}')
+            tool.connection.execute(
+                f"INSERT OR REPLACE INTO {self.SOURCES_TABLE} VALUES (?, ?)",
+                [table_name, fingerprint],
+            )
+
+        return table_name
+
+    def init_agent(self) -> None:
+        tool = CachedDuckDbTools(
+            result_cache=ResultCache(),
+            fingerprint=self.data_fingerprint,
+            db_path=self.db_path,
+        )
+        table_name = self._load_source(tool)
+        self._agent = Agent(
+            model=self.model,
+            markdown=False,
+            description="You are a data analyst.",
+            instructions=[
+                f"Use the table {table_name} to answer the question.",
+                "Then convert the natural language query into a duckdb SQL query.",
+                "Analyse and execute the SQL query to answer the question.",
+                "Figure the out column names to use in the query.",
+                "Don't add any additional information. Just answer the question.",
+                "If you can't answer the question, just say 'I don't know'.",
+            ],
+            system_prompt=self._prepare_prompt(),
+            tools=[tool],
+            show_tool_calls=False,
+            add_datetime_to_instructions=False,
+            debug_mode=False,
+        )
+
+    def run(self, input_text: str) -> AgentResponse:
+        response: RunResponse = self._agent.run(input_text)
+        return AgentResponse(content=response.content)
@@ -1,46 +1,81 @@
-from typing import Any
+from typing import TYPE_CHECKING, Any, Optional
 
-import pandas as pd
-from phi.model.base import Model
-
-from parrot.agents.csv_agent import CSVAgent
-from parrot.agents.sql_agent import SQLAgent
-from parrot.prompter import ConnectionDetails, SQLConnectionDetails, CSVConnectionDetails
-from parrot.agents.parquet_agent import ParquetAgent
+from parrot.prompter import (
+    ConnectionDetails,
+    CSVConnectionDetails,
+    CSVEngine,
+    SQLConnectionDetails,
+)
 from parrot.prompter import ParquetConnectionDetails
 
+if TYPE_CHECKING:
+    from phi.model.base import Model
+
 
 class AgentsFactory:
     """
     Factory class to initialize the correct agent based on the data source type.
+
+    Each agent module is imported when its agent is created, so only the
+    libraries of the chosen data source are loaded.
     """
-    def create(self, model: Model, connection_details: ConnectionDetails):
+    def create(self, model: "Model", connection_details: ConnectionDetails):
         if isinstance(connection_details, SQLConnectionDetails):
             return self.create_sql_agent(model, connection_details.to_connection_string())
         elif isinstance(connection_details, CSVConnectionDetails):
-            return self.create_csv_agent(model, connection_details.file_path)
+            return self.create_csv_agent(
+                model,
+                connection_details.file_path,
+                engine=connection_details.engine,
+                db_path=connection_details.db_path,
+            )
         elif isinstance(connection_details, ParquetConnectionDetails):
-            return self.create_parquet_agent(model, connection_details.file_path)
+            return self.create_parquet_agent(
+                model,
+                connection_details.file_path,
+                hive_partitioning=connection_details.hive_partitioning,
+            )
         else:
             raise ValueError(f"Unsupported agent type: {model}")
 
 
-    def create_sql_agent(self, model: Model, connection_string) -> Any:
+    def create_sql_agent(self, model: "Model", connection_string) -> Any:
+        from parrot.agents.sql_agent import SQLAgent
+
         return SQLAgent(
             model=model,
             connection_string=connection_string
         )
 
 
-    def create_csv_agent(self, model: Model, file_path: str) -> Any:
+    def create_csv_agent(
+        self,
+        model: "Model",
+        file_path: str,
+        engine: CSVEngine = CSVEngine.PANDAS,
+        db_path: Optional[str] = None,
+    ) -> Any:
+        from parrot.agents.csv_agent import CSVAgent, DuckDbCSVAgent
+
+        if engine == CSVEngine.DUCKDB:
+            return DuckDbCSVAgent(
+                model=model,
+                file_path=file_path,
+                db_path=db_path
+            )
 
         return CSVAgent(
             model=model,
             file_path=file_path
         )
 
-    def create_parquet_agent(self, model: Model, file_path: str) -> Any:
+    def create_parquet_agent(
+        self, model: "Model", file_path: str, hive_partitioning: Optional[bool] = None
+    ) -> Any:
+        from parrot.agents.parquet_agent import ParquetAgent
+
         return ParquetAgent(
             model=model,
-            file_path=file_path
+            file_path=file_path,
+            hive_partitioning=hive_partitioning
         )
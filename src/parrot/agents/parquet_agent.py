@@ -1,13 +1,24 @@
 from phi.agent import Agent
 from phi.model.base import Model
 from phi.run.response import RunResponse
-from phi.tools.duckdb import DuckDbTools
-import pandas as pd
 import logging
+import os
+from pathlib import Path
+from typing import Iterator, Optional
 
-from parrot.agents.base_agent import ParrotAgent
+from parrot.agents.base_agent import ParrotAgent, stream_agent
 from parrot.agents.prompts import get_duckdb_system_prompt
+from parrot.agents.query_guard import DEFAULT_MAX_SCANNED_ROWS, QueryGuard
 from parrot.agents.response import AgentResponse
+from parrot.agents.result_cache import ResultCache
+from parrot.agents.schema import (
+    SourceSummary,
+    is_dataset_path,
+    parquet_scan,
+    source_fingerprint,
+    summarize_parquet,
+)
+from parrot.agents.tools import CachedDuckDbTools
 
 # Remove existing handlers from the 'phi' logger
 phi_logger = logging.getLogger("phi")
@@ -19,23 +30,60 @@ logging.getLogger("rich").setLevel(logging.CRITICAL)
 
 
 class ParquetAgent(ParrotAgent):
-    def __init__(self, model: Model, file_path: str) -> None:
+    """
+    Agent over a Parquet file or a multi-file (optionally hive-partitioned)
+    dataset. The source is registered in DuckDB as a view, so queries read
+    the files directly with partition pruning and predicate pushdown instead
+    of copying the data into a table first. Generated queries are reviewed by
+    a QueryGuard, by default against the rows DuckDB expects to read.
+    """
+
+    def __init__(
+        self,
+        model: Model,
+        file_path: str,
+        hive_partitioning: Optional[bool] = None,
+        guard: Optional[QueryGuard] = None,
+    ) -> None:
         self.file_path = file_path
+        self.hive_partitioning = hive_partitioning
         self.model = model
+        self.guard = guard or QueryGuard(max_cost=DEFAULT_MAX_SCANNED_ROWS)
         self._agent = None
 
         self.init_agent()
 
-    def _prepare_prompt(self) -> str:
-        df = pd.read_parquet(self.file_path)
+    def _get_summary(self) -> SourceSummary:
+        return summarize_parquet(self.file_path, hive_partitioning=self.hive_partitioning)
+
+    def source_identity(self) -> Optional[str]:
+        return f"parquet:{os.path.abspath(self.file_path)}"
+
+    def data_fingerprint(self) -> str:
+        return ":".join(str(part) for part in source_fingerprint(self.file_path))
+
+    def _load_source(self, tool: CachedDuckDbTools) -> str:
+        path = Path(self.file_path)
+        if is_dataset_path(self.file_path):
+            # Name the view after the dataset directory, not the glob
+            while is_dataset_path(path.name):
+                path = path.parent
 
-        head = df.head().to_string(index=False)
-        print(head)
-        return get_duckdb_system_prompt(head)
+        table_name = tool.get_table_name_from_path(str(path))
+        tool.connection.execute(
+            f'CREATE OR REPLACE VIEW "{table_name}" AS '
+            f"SELECT * FROM {parquet_scan(self.file_path, self.hive_partitioning)}"
+        )
+        return table_name
+
+    def _prepare_prompt(self) -> str:
+        return get_duckdb_system_prompt(self._get_summary().to_prompt())
 
     def init_agent(self) -> None:
-        tool = DuckDbTools()
-        table_name, _ = tool.load_local_path_to_table(self.file_path)
+        tool = CachedDuckDbTools(
+            result_cache=ResultCache(), fingerprint=self.data_fingerprint, guard=self.guard
+        )
+        table_name = self._load_source(tool)
         self._agent = Agent(
             model=self.model,
             markdown=False,
@@ -58,3 +106,6 @@ class ParquetAgent(ParrotAgent):
     def run(self, input_text: str) -> AgentResponse:
         response: RunResponse = self._agent.run(input_text)
         return AgentResponse(content=response.content, error=None, raw_input=input_text)
+
+    def stream(self, input_text: str) -> Iterator[str]:
+        return stream_agent(self._agent, input_text)
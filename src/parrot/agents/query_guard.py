@@ -0,0 +1,278 @@
+import json
+import math
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+import duckdb
+from phi.utils.log import logger
+from sqlalchemy import Connection, Engine, text
+
+# PostgreSQL planner cost above which a query is not run without confirmation.
+# A sequential scan costs about one unit per page, so this is roughly a scan
+# of 8 GB of table data.
+DEFAULT_MAX_COST = 1_000_000
+
+# DuckDB has no cost model; its guard limits the estimated rows read by all operators
+DEFAULT_MAX_SCANNED_ROWS = 500_000_000
+
+# Queries estimated to return more rows get a LIMIT
+DEFAULT_MAX_ROWS = 1000
+
+# Characters of the plan shown to the model when a query is rejected
+PLAN_EXCERPT_CHARS = 1500
+
+# Leading whitespace, comments and opening parentheses before a statement's keyword
+_LEADING_RE = re.compile(r"^(?:\s+|--[^\n]*(?:\n|$)|/\*.*?\*/|\()*", re.DOTALL)
+# Statements that read data, including DuckDB's FROM-first queries
+_QUERY_RE = re.compile(r"^(select|with|from|values|table)\b", re.IGNORECASE)
+# EXPLAIN ANALYZE runs the statement it explains
+_EXPLAIN_ANALYZE_RE = re.compile(
+    r"^explain\s+(?:\([^)]*\banaly[sz]e\b[^)]*\)|analy[sz]e\b(?:\s+verbose\b)?)\s*",
+    re.IGNORECASE,
+)
+# Statements that only read metadata and pass unchecked
+_METADATA_RE = re.compile(r"^(explain|describe|show|pragma|set|use)\b", re.IGNORECASE)
+# A table after FROM, JOIN or a comma, with its alias if it has one
+_SQLITE_TABLE_RE = re.compile(
+    r'(?:\bfrom|\bjoin|,)\s+"?(\w+)"?(?:\s+(?:as\s+)?"?(\w+)"?)?', re.IGNORECASE
+)
+_SQL_KEYWORDS = {
+    "where", "join", "inner", "left", "right", "full", "cross", "natural", "on", "using",
+    "group", "order", "limit", "having", "union", "except", "intersect", "window",
+}
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_LIMIT_RE = re.compile(
+    r"\blimit\s+\d+(\s+offset\s+\d+)?\s*$|\bfetch\s+(first|next)\b", re.IGNORECASE
+)
+
+
+def _strip_comments(sql: str) -> str:
+    return _COMMENT_RE.sub("", sql).strip()
+
+
+# (statement, estimate or None if it could not be explained) -> whether to run it anyway
+ConfirmCallback = Callable[[str, Optional["QueryEstimate"]], bool]
+
+
+@dataclass
+class QueryEstimate:
+    """What the planner expects a query to cost."""
+
+    # Rows the query returns
+    rows: Optional[float]
+    # Planner cost, or rows read by all operators where there is no cost model
+    cost: Optional[float]
+    plan: str = ""
+
+
+@dataclass
+class GuardDecision:
+    """Whether and how to run a statement, and what to tell the model."""
+
+    sql: str
+    estimate: Optional[QueryEstimate] = None
+    # Set when the statement must not run; explains why to the model
+    rejection: Optional[str] = None
+    # Goes with the result, e.g. that a LIMIT was added
+    note: Optional[str] = None
+
+
+def explain_sqlalchemy(engine: Engine, sql: str) -> Optional[QueryEstimate]:
+    """
+    Estimate a query on a SQLAlchemy engine.
+
+    PostgreSQL reports cost and rows. SQLite has neither, see
+    `_explain_sqlite`. Other databases are not estimated.
+    """
+    dialect = engine.dialect.name
+    if dialect == "postgresql":
+        with engine.connect() as conn:
+            plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        root = plan[0]["Plan"]
+        return QueryEstimate(
+            rows=root.get("Plan Rows"),
+            cost=root.get("Total Cost"),
+            plan=json.dumps(plan, indent=1),
+        )
+
+    if dialect == "sqlite":
+        with engine.connect() as conn:
+            return _explain_sqlite(conn, sql)
+
+    return None
+
+
+def _explain_sqlite(conn: Connection, sql: str) -> QueryEstimate:
+    """
+    Cost a query on SQLite by the rows its full table scans read.
+
+    A table's highest rowid serves as a cheap row count. Scans within one
+    SELECT run as nested loops, so their sizes multiply. A LIMIT without a
+    sort or grouping stops the scan early and caps the cost.
+    """
+    plan = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    aliases = {
+        alias.lower(): table
+        for table, alias in _SQLITE_TABLE_RE.findall(sql)
+        if alias and alias.lower() not in _SQL_KEYWORDS
+    }
+
+    scans: Dict[int, float] = {}
+    for _, parent, _, detail in plan:
+        match = re.match(r"SCAN (\w+)", detail)
+        if not match:
+            continue
+        table = aliases.get(match[1].lower(), match[1])
+        try:
+            count = conn.execute(text(f'SELECT MAX(rowid) FROM "{table}"')).scalar() or 0
+        except Exception:
+            # Subqueries, views without rowid and constant rows
+            continue
+        scans[parent] = scans.get(parent, 1.0) * max(count, 1)
+
+    cost = sum(scans.values())
+    details = [detail for *_, detail in plan]
+    limit = re.search(r"\blimit\s+(\d+)\s*(offset\s+\d+\s*)?$", sql, re.IGNORECASE)
+    if limit and not any("TEMP B-TREE" in detail for detail in details):
+        cost = min(cost, float(limit[1]))
+    return QueryEstimate(rows=None, cost=cost, plan="\n".join(details))
+
+
+def _duckdb_cardinality(node: dict) -> Optional[float]:
+    estimate = node.get("extra_info", {}).get("Estimated Cardinality")
+    return float(estimate) if estimate is not None else None
+
+
+def _duckdb_cost(node: dict) -> Tuple[float, float]:
+    """
+    Rows output by a DuckDB plan operator, and rows output by it and everything below.
+
+    Operators without an estimate are bounded from their children: joins
+    and cross products by the product of their inputs, ungrouped aggregates
+    by one row and anything else by its largest input.
+    """
+    outputs, cost = [], 0.0
+    for child in node.get("children", []):
+        child_rows, child_cost = _duckdb_cost(child)
+        outputs.append(child_rows)
+        cost += child_cost
+
+    rows = _duckdb_cardinality(node)
+    if rows is None:
+        name = node.get("name", "").upper()
+        if "UNGROUPED_AGGREGATE" in name:
+            rows = 1.0
+        elif ("JOIN" in name or "PRODUCT" in name) and outputs:
+            rows = math.prod(outputs)
+        else:
+            rows = max(outputs, default=0.0)
+    return rows, cost + rows
+
+
+def explain_duckdb(connection: duckdb.DuckDBPyConnection, sql: str) -> QueryEstimate:
+    """
+    Estimate a query on DuckDB from the estimated cardinality of each operator.
+
+    The result rows are the estimate of the root operator, unknown if it has
+    none; the cost is the sum of the rows output by all operators.
+    """
+    plan = json.loads(connection.execute(f"EXPLAIN (FORMAT JSON) {sql}").fetchall()[0][1])
+    if not plan:
+        return QueryEstimate(rows=None, cost=None)
+    return QueryEstimate(
+        rows=_duckdb_cardinality(plan[0]),
+        cost=sum(_duckdb_cost(root)[1] for root in plan),
+        plan=json.dumps(plan, indent=1),
+    )
+
+
+class QueryGuard:
+    """
+    Reviews generated queries with EXPLAIN before they reach the source.
+
+    Queries estimated to cost more than `max_cost` are not run unless the
+    `confirm` callback agrees; the model is told the estimate instead so it
+    can narrow the query. Queries estimated to return more than `max_rows`
+    rows get a LIMIT. EXPLAIN ANALYZE is checked like the statement it runs.
+    Statements that fail to explain are not run either, unless confirmed.
+    Metadata statements such as DESCRIBE and SHOW pass unchanged, as do all
+    statements on sources whose cost cannot be estimated.
+    """
+
+    def __init__(
+        self,
+        max_cost: float = DEFAULT_MAX_COST,
+        max_rows: int = DEFAULT_MAX_ROWS,
+        confirm: Optional[ConfirmCallback] = None,
+    ):
+        self.max_cost = max_cost
+        self.max_rows = max_rows
+        self.confirm = confirm
+
+    def review(
+        self, sql: str, explain: Callable[[str], Optional[QueryEstimate]]
+    ) -> GuardDecision:
+        """
+        Decide whether and how to run a statement.
+
+        Args:
+            sql: The generated statement
+            explain: Estimates a query on the source, e.g. explain_duckdb
+        """
+        sql = sql.strip().rstrip(";").strip()
+        statement = _LEADING_RE.sub("", sql)
+        analyze = _EXPLAIN_ANALYZE_RE.match(statement)
+        if analyze:
+            # Judge the statement that would run; its output is the plan, so no LIMIT
+            decision = self.review(statement[analyze.end():], explain)
+            return GuardDecision(sql=sql, estimate=decision.estimate, rejection=decision.rejection)
+        if _METADATA_RE.match(statement):
+            return GuardDecision(sql=sql)
+
+        try:
+            estimate = explain(sql)
+        except Exception as e:
+            logger.debug(f"Could not explain query: {e}")
+            if self.confirm and self.confirm(sql, None):
+                return GuardDecision(sql=sql)
+            return GuardDecision(
+                sql=sql,
+                rejection=(
+                    f"Query not run: it could not be checked with EXPLAIN ({e}). "
+                    f"Fix the error or rewrite it as a single SELECT statement."
+                ),
+            )
+        if estimate is None:
+            return GuardDecision(sql=sql)
+
+        decision = GuardDecision(sql=sql, estimate=estimate)
+        if estimate.cost is not None and estimate.cost > self.max_cost:
+            if not (self.confirm and self.confirm(sql, estimate)):
+                decision.rejection = self._rejection(estimate)
+                return decision
+
+        if (
+            estimate.rows is not None
+            and estimate.rows > self.max_rows
+            and _QUERY_RE.match(statement)
+            and not _LIMIT_RE.search(_strip_comments(sql))
+        ):
+            decision.sql = f"{sql}\nLIMIT {self.max_rows}"
+            decision.note = (
+                f"The query was estimated to return about {estimate.rows:,.0f} rows, "
+                f"so only the first {self.max_rows} are returned. Aggregate or filter "
+                f"to see all the data."
+            )
+        return decision
+
+    def _rejection(self, estimate: QueryEstimate) -> str:
+        rows = f" and return about {estimate.rows:,.0f} rows" if estimate.rows is not None else ""
+        return (
+            f"Query not run: it is estimated to cost {estimate.cost:,.0f}{rows}, above the "
+            f"limit of {self.max_cost:,.0f}. Rewrite it to read less data: filter on "
+            f"selective or indexed columns, aggregate, or join fewer tables.\n"
+            f"Query plan:\n{estimate.plan[:PLAN_EXCERPT_CHARS]}"
+        )
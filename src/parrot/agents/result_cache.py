@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+from phi.utils.log import logger
+
+from parrot.config import CACHE_DIR
+
+RESULT_CACHE_DIR = os.path.join(CACHE_DIR, "results")
+
+RESULT_CACHE_TTL_SECONDS = 60 * 60
+
+RESULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+_READ_ONLY_RE = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+
+# A single-quoted literal (with '' escapes) or a run of anything else
+_SQL_SEGMENT_RE = re.compile(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|[^'"]+|['"]""")
+
+ResultSet = Tuple[List[str], List[tuple]]
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Normalize a statement so that near-identical queries share a cache entry.
+
+    Whitespace outside string literals and quoted identifiers is collapsed
+    and trailing semicolons removed. Case is kept: quoted identifiers are
+    case-sensitive, and SQLite and DuckDB label result columns with the
+    alias as written, so differently cased queries can return different
+    results.
+    """
+    segments = []
+    for segment in _SQL_SEGMENT_RE.findall(sql.strip().rstrip(";")):
+        if segment.startswith(("'", '"')):
+            segments.append(segment)
+        else:
+            segments.append(re.sub(r"\s+", " ", segment))
+    return "".join(segments).strip()
+
+
+def is_cacheable(sql: str) -> bool:
+    """Only read-only statements are cached."""
+    return bool(_READ_ONLY_RE.match(sql))
+
+
+def _quote(path: Path) -> str:
+    return str(path).replace("'", "''")
+
+
+def _read_columns(con: Any, path: Path) -> Optional[List[str]]:
+    """Original column names stored with a cached result, None for older entries."""
+    for key, value in con.execute(
+        f"SELECT key, value FROM parquet_kv_metadata('{_quote(path)}')"
+    ).fetchall():
+        if key == b"columns":
+            return json.loads(value)
+    return None
+
+
+def _fingerprint_values(rows: List[tuple]) -> List[tuple]:
+    # repr tells apart values that compare equal but print differently, e.g. 1 and 1.0
+    return [tuple(repr(value) for value in row) for row in rows]
+
+
+class ResultCache:
+    """
+    On-disk cache of query result sets, stored as Parquet files.
+
+    Entries are keyed by the normalized SQL text and a fingerprint of the
+    source data, so any change to the source invalidates them. Entries older
+    than `ttl_seconds` are ignored and the oldest entries are evicted once
+    the cache grows past `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = RESULT_CACHE_DIR,
+        ttl_seconds: int = RESULT_CACHE_TTL_SECONDS,
+        max_bytes: int = RESULT_CACHE_MAX_BYTES,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+    def _path(self, sql: str, fingerprint: str) -> Path:
+        key = hashlib.sha256(f"{fingerprint}\0{normalize_sql(sql)}".encode()).hexdigest()
+        return self.cache_dir / f"{key}.parquet"
+
+    def get(self, sql: str, fingerprint: str) -> Optional[ResultSet]:
+        """Get the cached columns and rows of a statement, if any."""
+        path = self._path(sql, fingerprint)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl_seconds:
+                return None
+
+            import duckdb
+
+            with duckdb.connect() as con:
+                columns = _read_columns(con, path)
+                if columns is None:
+                    return None
+                return columns, con.read_parquet(str(path)).fetchall()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cached result {path}: {e}")
+            return None
+
+    def put(self, sql: str, fingerprint: str, columns: List[str], rows: List[Any]) -> None:
+        """
+        Store the result set of a statement. Results that cannot be stored are skipped.
+
+        Columns are stored by position with the original names in the file's
+        metadata, so duplicate names survive. Each column is handed to DuckDB
+        as the Python values themselves, so integers with NULLs stay integers.
+        Results that do not read back exactly as given, e.g. a column mixing
+        types, are not cached: a hit must return the same text as the query.
+        """
+        if not columns:
+            return
+
+        import duckdb
+        import pandas as pd
+
+        path = self._path(sql, fingerprint)
+        temp_path = path.with_suffix(".tmp")
+        rows = [tuple(row) for row in rows]
+        values = list(zip(*rows)) if rows else [()] * len(columns)
+        df = pd.DataFrame(
+            {f"c{i}": pd.Series(column, dtype=object) for i, column in enumerate(values)}
+        )
+        names = json.dumps(list(columns)).replace("'", "''")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with duckdb.connect() as con:
+                # Infer each column's type from all of its values, not a sample
+                con.execute(f"SET pandas_analyze_sample = {max(len(rows), 1)}")
+                con.register("result", df)
+                con.execute(
+                    f"COPY result TO '{_quote(temp_path)}' "
+                    f"(FORMAT parquet, COMPRESSION zstd, KV_METADATA {{columns: '{names}'}})"
+                )
+                stored = con.read_parquet(str(temp_path)).fetchall()
+            if _fingerprint_values(stored) != _fingerprint_values(rows):
+                logger.debug(f"Not caching result of query, it does not round-trip: {sql}")
+                temp_path.unlink(missing_ok=True)
+                return
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not cache result of query: {e}")
+            temp_path.unlink(missing_ok=True)
+            return
+
+        self._evict()
+
+    def clear(self) -> None:
+        """Delete all cached results."""
+        for entry in self.cache_dir.glob("*.parquet"):
+            entry.unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        entries = []
+        for entry in self.cache_dir.glob("*.parquet"):
+            try:
+                entries.append((entry.stat(), entry))
+            except FileNotFoundError:
+                continue
+
+        total = sum(stat.st_size for stat, _ in entries)
+        now = time.time()
+        for stat, entry in sorted(entries, key=lambda item: item[0].st_mtime):
+            if total <= self.max_bytes and now - stat.st_mtime <= self.ttl_seconds:
+                break
+            entry.unlink(missing_ok=True)
+            total -= stat.st_size
@@ -0,0 +1,235 @@
+import functools
+import glob
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+DEFAULT_SAMPLE_ROWS = 5
+DEFAULT_DTYPE_SAMPLE_ROWS = 1000
+DEFAULT_SAMPLE_COLUMNS = 20
+
+GLOB_CHARS = ("*", "?", "[")
+
+NUMERIC_TYPES = (
+    "TINYINT",
+    "SMALLINT",
+    "INTEGER",
+    "BIGINT",
+    "HUGEINT",
+    "UTINYINT",
+    "USMALLINT",
+    "UINTEGER",
+    "UBIGINT",
+    "FLOAT",
+    "DOUBLE",
+    "DECIMAL",
+)
+
+
+@dataclass(frozen=True)
+class SourceSummary:
+    """Schema and a small sample of a data source, used to build agent prompts."""
+
+    columns: List[str]
+    dtypes: Dict[str, str]
+    sample: str
+    row_count: int | None = None
+    stats: Dict[str, Dict[str, str]] = field(default_factory=dict)
+
+    def to_prompt(self) -> str:
+        """Render the summary in the format expected by the `{COLUMNS}` placeholder."""
+        lines = ["Columns:"]
+        for column in self.columns:
+            details = [self.dtypes.get(column, "unknown")]
+            details.extend(f"{key}={value}" for key, value in self.stats.get(column, {}).items())
+            lines.append(f"  - {column} ({', '.join(details)})")
+
+        if self.row_count is not None:
+            lines.append(f"\nTotal rows: {self.row_count}")
+
+        lines.append(f"\nSample rows:\n{self.sample}")
+        return "\n".join(lines)
+
+
+def file_fingerprint(path: str) -> Tuple[str, int, int]:
+    """
+    Cheap identity of a file on disk.
+
+    Returns:
+        Tuple of (absolute path, mtime in nanoseconds, size in bytes)
+    """
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+def is_dataset_path(path: str) -> bool:
+    """Return True if `path` is a glob pattern matching a multi-file dataset."""
+    return any(char in path for char in GLOB_CHARS)
+
+
+def dataset_fingerprint(pattern: str) -> Tuple[str, int, int]:
+    """
+    Cheap identity of a multi-file dataset, from a stat of every matching file.
+
+    Returns:
+        Tuple of (pattern, newest mtime in nanoseconds, total size in bytes)
+    """
+    files = glob.glob(pattern, recursive=True)
+    if not files:
+        raise FileNotFoundError(f"No files match {pattern}")
+
+    stats = [os.stat(file) for file in files]
+    return pattern, max(stat.st_mtime_ns for stat in stats), sum(stat.st_size for stat in stats)
+
+
+def source_fingerprint(path: str) -> Tuple[str, int, int]:
+    """Fingerprint a single file or a glob-matched dataset."""
+    if is_dataset_path(path):
+        return dataset_fingerprint(path)
+    return file_fingerprint(path)
+
+
+def parquet_scan(path: str, hive_partitioning: bool | None = None) -> str:
+    """
+    Build the DuckDB `read_parquet` expression for a file, directory glob or
+    hive-partitioned dataset. Hive partitioning is auto-detected unless set.
+    """
+    options = ""
+    if hive_partitioning is not None:
+        options = f", hive_partitioning = {str(hive_partitioning).lower()}"
+    escaped = path.replace("'", "''")
+    return f"read_parquet('{escaped}'{options})"
+
+
+def csv_scan(path: str) -> str:
+    """Build the DuckDB `read_csv_auto` expression for a CSV file."""
+    escaped = path.replace("'", "''")
+    return f"read_csv_auto('{escaped}')"
+
+
+def summarize_csv(
+    file_path: str,
+    sample_rows: int = DEFAULT_SAMPLE_ROWS,
+    dtype_sample_rows: int = DEFAULT_DTYPE_SAMPLE_ROWS,
+) -> SourceSummary:
+    """
+    Summarize a CSV file without parsing all of it.
+
+    Only the first `dtype_sample_rows` rows are read to infer dtypes, of which
+    the first `sample_rows` rows and `DEFAULT_SAMPLE_COLUMNS` columns are kept
+    as the sample. Results are cached per path, mtime and size, so an
+    unchanged file is never read twice.
+
+    Args:
+        file_path: Path to the CSV file
+        sample_rows: Number of rows to include in the sample
+        dtype_sample_rows: Number of rows used to infer column dtypes
+
+    Returns:
+        The SourceSummary of the file
+    """
+    return _summarize_csv(
+        *file_fingerprint(file_path),
+        sample_rows=sample_rows,
+        dtype_sample_rows=max(sample_rows, dtype_sample_rows),
+    )
+
+
+@functools.lru_cache(maxsize=32)
+def _summarize_csv(
+    path: str, mtime_ns: int, size: int, sample_rows: int, dtype_sample_rows: int
+) -> SourceSummary:
+    df = pd.read_csv(path, nrows=dtype_sample_rows)
+
+    return SourceSummary(
+        columns=[str(column) for column in df.columns],
+        dtypes={str(column): str(dtype) for column, dtype in df.dtypes.items()},
+        sample=df.iloc[:sample_rows, :DEFAULT_SAMPLE_COLUMNS].to_string(index=False),
+    )
+
+
+def summarize_parquet(
+    file_path: str,
+    sample_rows: int = DEFAULT_SAMPLE_ROWS,
+    hive_partitioning: bool | None = None,
+) -> SourceSummary:
+    """
+    Summarize a Parquet file or dataset from its footer metadata.
+
+    Schema, row count and per-column min/max/null counts come from the
+    Parquet footers and the sample is a `LIMIT` scan that only touches the
+    first row group, so the cost does not grow with the data size. Results
+    are cached per path, mtime and size.
+
+    Args:
+        file_path: Path to a Parquet file, or a glob matching a dataset
+        sample_rows: Number of rows to include in the sample
+        hive_partitioning: Force hive partitioning on or off, auto-detected if None
+
+    Returns:
+        The SourceSummary of the file or dataset
+    """
+    return _summarize_parquet(
+        *source_fingerprint(file_path),
+        sample_rows=sample_rows,
+        hive_partitioning=hive_partitioning,
+    )
+
+
+@functools.lru_cache(maxsize=32)
+def _summarize_parquet(
+    path: str, mtime_ns: int, size: int, sample_rows: int, hive_partitioning: bool | None
+) -> SourceSummary:
+    import duckdb
+
+    scan = parquet_scan(path, hive_partitioning)
+    with duckdb.connect() as con:
+        dtypes = {
+            name: dtype
+            for name, dtype, *_ in con.execute(f"DESCRIBE SELECT * FROM {scan}").fetchall()
+        }
+        (row_count,) = con.execute(
+            "SELECT SUM(num_rows) FROM parquet_file_metadata(?)", [path]
+        ).fetchone()
+        column_stats = con.execute(
+            """
+            SELECT
+                path_in_schema,
+                arg_min(stats_min_value, TRY_CAST(stats_min_value AS DOUBLE)),
+                arg_max(stats_max_value, TRY_CAST(stats_max_value AS DOUBLE)),
+                MIN(stats_min_value),
+                MAX(stats_max_value),
+                SUM(stats_null_count)
+            FROM parquet_metadata(?)
+            GROUP BY path_in_schema
+            """,
+            [path],
+        ).fetchall()
+        sample = con.execute(f"SELECT * FROM {scan} LIMIT {int(sample_rows)}").df()
+
+    stats: Dict[str, Dict[str, str]] = {}
+    for column, num_min, num_max, str_min, str_max, null_count in column_stats:
+        if column not in dtypes:
+            # Nested fields are reported per leaf, only top-level columns are kept.
+            # Hive partition columns have no footer statistics.
+            continue
+        numeric = _is_numeric(dtypes[column])
+        stats[column] = {
+            "min": str(num_min if numeric else str_min),
+            "max": str(num_max if numeric else str_max),
+            "nulls": str(null_count),
+        }
+
+    return SourceSummary(
+        columns=list(dtypes),
+        dtypes=dtypes,
+        sample=sample.iloc[:, :DEFAULT_SAMPLE_COLUMNS].to_string(index=False),
+        row_count=int(row_count or 0),
+        stats=stats,
+    )
+
+
+def _is_numeric(dtype: str) -> bool:
+    return dtype.upper().startswith(NUMERIC_TYPES)
@@ -0,0 +1,156 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+from parrot.agents.catalog import SchemaCatalog
+from parrot.models.schema_catalog import CatalogColumn, CatalogTable
+
+DEFAULT_TOP_K = 8
+DEFAULT_MAX_COLUMNS = 30
+
+# Table names say more about relevance than any single column, so their
+# terms are counted several times in the table's document
+TABLE_NAME_BOOST = 3
+
+_WORD_RE = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+
+
+def _words(text: str) -> List[str]:
+    """Split free text and snake_case/camelCase identifiers into lowercase words."""
+    return [word.lower() for word in _WORD_RE.findall(text or "")]
+
+
+def _terms(text: str) -> List[str]:
+    """Index terms of a text: its words plus character trigrams of every word."""
+    terms = []
+    for word in _words(text):
+        terms.append(word)
+        padded = f"#{word}#"
+        terms.extend(f"~{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return terms
+
+
+class SchemaRetriever:
+    """
+    Ranks catalogued tables and columns by relevance to a question.
+
+    Tables are indexed with BM25 over words and character trigrams of their
+    name, comment and column names/comments, so "customers" still matches a
+    question about "customer" and `order_items` matches "order items". The
+    index is built once per SchemaCatalog and rebuilt when the catalog changes.
+    """
+
+    def __init__(
+        self,
+        catalog: SchemaCatalog,
+        top_k: int = DEFAULT_TOP_K,
+        max_columns: int = DEFAULT_MAX_COLUMNS,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        self.catalog = catalog
+        self.top_k = top_k
+        self.max_columns = max_columns
+        self.k1 = k1
+        self.b = b
+
+        self._tables: List[CatalogTable] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._doc_lengths: List[int] = []
+        self._avg_doc_length = 0.0
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """(Re)build the index from the current catalog."""
+        self._tables = list(self.catalog.tables)
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._doc_lengths = []
+
+        for index, table in enumerate(self._tables):
+            terms = _terms(table.name) * TABLE_NAME_BOOST + _terms(table.comment)
+            for column in table.columns:
+                terms += _terms(column.name) + _terms(column.comment)
+
+            for term, frequency in Counter(terms).items():
+                postings[term].append((index, frequency))
+            self._doc_lengths.append(len(terms))
+
+        self._postings = dict(postings)
+        self._avg_doc_length = (
+            sum(self._doc_lengths) / len(self._doc_lengths) if self._doc_lengths else 0.0
+        )
+
+    def search(self, question: str, top_k: int | None = None) -> List[CatalogTable]:
+        """
+        Return the tables most relevant to the question, best first.
+
+        Tables referenced through foreign keys by the top hits are added after
+        them, up to `2 * top_k` tables in total, so the model can see the join
+        paths. If nothing matches, the first `top_k` tables are returned.
+        """
+        top_k = top_k or self.top_k
+        scores: Dict[int, float] = defaultdict(float)
+        total = len(self._tables)
+
+        for term in set(_terms(question)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for index, frequency in postings:
+                length_norm = 1 - self.b + self.b * self._doc_lengths[index] / self._avg_doc_length
+                scores[index] += idf * frequency * (self.k1 + 1) / (
+                    frequency + self.k1 * length_norm
+                )
+
+        if not scores:
+            return self._tables[:top_k]
+
+        ranked = [
+            self._tables[index]
+            for index, _ in sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        ]
+        selected = ranked[:top_k]
+
+        by_name = {}
+        for table in self._tables:
+            by_name.setdefault(table.name, table)
+            by_name.setdefault(table.qualified_name, table)
+
+        for table in list(selected):
+            for column in table.columns:
+                referenced = by_name.get(column.fk_table)
+                if referenced is not None and referenced not in selected:
+                    selected.append(referenced)
+
+        return selected[: 2 * top_k]
+
+    def rank_columns(self, table: CatalogTable, question: str) -> List[CatalogColumn]:
+        """
+        Keep the columns of a wide table that matter for the question.
+
+        Columns whose name or comment matches the question and key columns
+        (foreign keys and `id`) are kept first, then the remaining columns in
+        table order, up to `max_columns`. Narrow tables are returned as is.
+        """
+        if len(table.columns) <= self.max_columns:
+            return list(table.columns)
+
+        question_terms = set(_terms(question))
+
+        def priority(column: CatalogColumn) -> int:
+            overlap = len(question_terms & set(_terms(f"{column.name} {column.comment or ''}")))
+            is_key = column.fk_table is not None or column.name.lower() == "id"
+            return -(overlap + (len(question_terms) if is_key else 0))
+
+        kept = sorted(table.columns, key=lambda column: (priority(column), column.ordinal))
+        kept = kept[: self.max_columns]
+        return sorted(kept, key=lambda column: column.ordinal)
+
+    def render(self, question: str, top_k: int | None = None) -> str:
+        """Render only the tables and columns relevant to the question."""
+        tables = self.search(question, top_k)
+        columns = {table.id: self.rank_columns(table, question) for table in tables}
+        return self.catalog.render(tables, max_tables=len(tables), columns=columns)
@@ -1,29 +1,88 @@
+from typing import Iterator, Optional
+
 from phi.agent import Agent
 from phi.model.base import Model
 from phi.run.response import RunResponse
-from phi.tools.sql import SQLTools
 
+from parrot.agents.base_agent import ParrotAgent, stream_agent
+from parrot.agents.catalog import SchemaCatalog
+from parrot.agents.query_guard import QueryGuard
+from parrot.agents.result_cache import ResultCache
+from parrot.agents.schema_retriever import SchemaRetriever
+from parrot.agents.sql_engine import create_sql_engine
+from parrot.agents.tools import CachedSQLTools
+from parrot.db.repositories.catalog_repository import CatalogRepository
+from parrot.rag.storage.db import SessionLocal
+
+
+class SQLAgent(ParrotAgent):
+    """
+    Answers questions from a SQL database.
 
+    The agent owns a pooled engine that is reused across questions, and
+    whose transactions are read-only and statements time-bounded, see
+    `create_sql_engine`. Extra keyword arguments configure that engine.
+    Generated queries are reviewed by a QueryGuard before they run.
+    """
+
+    def __init__(
+        self,
+        model: Model,
+        connection_string: str = None,
+        guard: Optional[QueryGuard] = None,
+        **engine_options,
+    ):
+        self.model = model
+        self.engine = create_sql_engine(connection_string, **engine_options)
+        self.guard = guard or QueryGuard()
+        self.catalog = SchemaCatalog(self.engine, CatalogRepository(SessionLocal()))
+        self.retriever = SchemaRetriever(self.catalog)
 
-class SQLAgent:
-    def __init__(self, model: Model, connection_string: str = None):
         self._agent = Agent(
             model=model,
             markdown=False,
             description="You are a data analyst.",
             instructions=[
-                "For a given, search through the database schema to find out the tables to use.",
+                "For a given, use the relevant database schema below to find out the tables "
+                "to use.",
+                "Only list or describe tables if the schema below is not enough.",
                 "Then convert the natural language query into a SQL query.",
                 "Analyse and execute the SQL query to answer the question.",
                 "Figure the out table names and column names to use in the query.",
                 "Don't add any additional information. Just answer the question.",
                 "If you can't answer the question, just say 'I don't know'.",
             ],
-            tools=[SQLTools(db_url=connection_string)],
+            tools=[
+                CachedSQLTools(
+                    result_cache=ResultCache(),
+                    fingerprint=self.data_fingerprint,
+                    guard=self.guard,
+                    db_engine=self.engine,
+                )
+            ],
             show_tool_calls=False,
             add_datetime_to_instructions=False,
             debug_mode=False
         )
 
+    def source_identity(self) -> Optional[str]:
+        return f"sql:{self.catalog.source_key}"
+
+    def data_fingerprint(self) -> Optional[str]:
+        return self.catalog.data_fingerprint()
+
+    def _schema_context(self, input_text: str) -> str:
+        return f"## Relevant database schema\n{self.retriever.render(input_text)}"
+
+    def _prepare_context(self, input_text: str) -> None:
+        if self.catalog.refresh():
+            self.retriever.rebuild()
+        self._agent.additional_context = self._schema_context(input_text)
+
     def run(self, input_text: str) -> RunResponse:
+        self._prepare_context(input_text)
         return self._agent.run(input_text)
+
+    def stream(self, input_text: str) -> Iterator[str]:
+        self._prepare_context(input_text)
+        return stream_agent(self._agent, input_text)
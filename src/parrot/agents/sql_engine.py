@@ -0,0 +1,90 @@
+import time
+from typing import Any, Dict
+
+from sqlalchemy import Engine, create_engine, event, make_url
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_MAX_OVERFLOW = 5
+# Seconds to wait for a free pooled connection
+DEFAULT_POOL_TIMEOUT = 30
+# Seconds after which connections are replaced, before servers or proxies drop them
+DEFAULT_POOL_RECYCLE = 1800
+# Milliseconds a single statement may run
+DEFAULT_STATEMENT_TIMEOUT_MS = 30_000
+
+# SQLite VM instructions between checks of the statement deadline
+_SQLITE_PROGRESS_STEPS = 10_000
+
+
+def create_sql_engine(
+    connection_string: str,
+    pool_size: int = DEFAULT_POOL_SIZE,
+    max_overflow: int = DEFAULT_MAX_OVERFLOW,
+    pool_timeout: int = DEFAULT_POOL_TIMEOUT,
+    pool_recycle: int = DEFAULT_POOL_RECYCLE,
+    statement_timeout_ms: int = DEFAULT_STATEMENT_TIMEOUT_MS,
+) -> Engine:
+    """
+    Create the pooled, read-only, time-bounded engine an agent queries a source with.
+
+    Connections are pinged before use and reused across questions. Every
+    transaction is read-only and every statement is cancelled after
+    `statement_timeout_ms`:
+
+    - PostgreSQL: each new connection sets `statement_timeout` and
+      `default_transaction_read_only`, so every transaction runs as
+      `SET TRANSACTION READ ONLY`; idle transactions are ended after the same
+      timeout.
+    - SQLite: each connection sets `PRAGMA query_only` and a progress handler
+      interrupts statements that run past the deadline.
+
+    Other databases get the pool settings only.
+    """
+    url = make_url(connection_string)
+    options: Dict[str, Any] = {"pool_pre_ping": True, "pool_recycle": pool_recycle}
+    # In-memory SQLite uses a single-connection pool that takes no sizing
+    if not (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")):
+        options.update(pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout)
+
+    engine = create_engine(url, **options)
+    if engine.dialect.name == "postgresql":
+        _bound_postgres(engine, statement_timeout_ms)
+    elif engine.dialect.name == "sqlite":
+        _bound_sqlite(engine, statement_timeout_ms)
+    return engine
+
+
+def _bound_postgres(engine: Engine, statement_timeout_ms: int) -> None:
+    @event.listens_for(engine, "connect")
+    def _configure(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"SET statement_timeout = {int(statement_timeout_ms)}")
+        cursor.execute(f"SET idle_in_transaction_session_timeout = {int(statement_timeout_ms)}")
+        cursor.execute("SET default_transaction_read_only = on")
+        cursor.close()
+        # Session settings made inside a transaction are undone by its rollback
+        dbapi_connection.commit()
+
+
+def _bound_sqlite(engine: Engine, statement_timeout_ms: int) -> None:
+    timeout = statement_timeout_ms / 1000
+
+    @event.listens_for(engine, "connect")
+    def _configure(dbapi_connection, connection_record) -> None:
+        dbapi_connection.execute("PRAGMA query_only = ON")
+        connection_record.info["deadline"] = None
+
+        def past_deadline() -> int:
+            deadline = connection_record.info.get("deadline")
+            return int(deadline is not None and time.monotonic() > deadline)
+
+        # A non-zero return interrupts the running statement
+        dbapi_connection.set_progress_handler(past_deadline, _SQLITE_PROGRESS_STEPS)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_deadline(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info["deadline"] = time.monotonic() + timeout
+
+    @event.listens_for(engine, "checkin")
+    def _clear_deadline(dbapi_connection, connection_record) -> None:
+        connection_record.info["deadline"] = None
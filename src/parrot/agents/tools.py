@@ -0,0 +1,328 @@
+import csv
+import itertools
+import json
+from typing import Callable, List, Optional, Set
+
+from phi.tools import Toolkit
+from phi.tools.csv_tools import CsvTools
+from phi.tools.duckdb import DuckDbTools
+from phi.tools.sql import SQLTools
+from phi.utils.log import logger
+from sqlalchemy import text
+
+from parrot.agents.query_guard import QueryGuard, explain_duckdb, explain_sqlalchemy
+from parrot.agents.result_cache import ResultCache, ResultSet, is_cacheable
+from parrot.agents.schema import csv_scan
+from parrot.rag.retriever import Retriever
+
+DEFAULT_CSV_ROW_LIMIT = 100
+
+# Returns None when changes to the source cannot be detected
+Fingerprint = Callable[[], Optional[str]]
+
+
+def _format_result(columns: List[str], rows: List[tuple]) -> str:
+    """Render a result set the way phi's DuckDB based toolkits do."""
+    result_rows = [
+        str(row[0]) if len(row) == 1 else ",".join(str(x) for x in row) for row in rows
+    ]
+    return ",".join(columns) + "\n" + "\n".join(result_rows)
+
+
+def _cached_execute(
+    cache: Optional[ResultCache],
+    fingerprint: Optional[Fingerprint],
+    sql: str,
+    execute: Callable[[], ResultSet],
+) -> ResultSet:
+    """Run `execute` unless the result of `sql` is cached for the current source data."""
+    if cache is None or fingerprint is None or not is_cacheable(sql):
+        return execute()
+
+    source_fingerprint = fingerprint()
+    if source_fingerprint is None:
+        return execute()
+    cached = cache.get(sql, source_fingerprint)
+    if cached is not None:
+        logger.info(f"Using cached result for: {sql}")
+        return cached
+
+    columns, rows = execute()
+    cache.put(sql, source_fingerprint, columns, rows)
+    return columns, rows
+
+
+class SharedCsvTools(CsvTools):
+    """
+    CsvTools that loads every CSV at most once per agent.
+
+    The stock toolkit opens a new DuckDB connection and re-imports the file on
+    every `query_csv_file` call and parses the whole file in `read_csv_file`
+    before slicing it. This variant keeps one DuckDB connection for the
+    lifetime of the agent, imports each file lazily on first query and only
+    reads the requested number of rows.
+    """
+
+    def __init__(
+        self,
+        csvs: List[str],
+        row_limit: int = DEFAULT_CSV_ROW_LIMIT,
+        result_cache: Optional[ResultCache] = None,
+        fingerprint: Optional[Fingerprint] = None,
+        **kwargs,
+    ):
+        super().__init__(csvs=csvs, row_limit=row_limit, **kwargs)
+        self.result_cache = result_cache
+        self.fingerprint = fingerprint
+        self._loaded_tables: Set[str] = set()
+
+    @property
+    def connection(self):
+        if self.duckdb_connection is None:
+            import duckdb
+
+            self.duckdb_connection = duckdb.connect(**(self.duckdb_kwargs or {}))
+        return self.duckdb_connection
+
+    def _ensure_loaded(self, csv_name: str) -> None:
+        if csv_name in self._loaded_tables:
+            return
+
+        file_path = [_csv for _csv in self.csvs if _csv.stem == csv_name][0]
+        logger.info(f"Loading csv file: {csv_name}")
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS \"{csv_name}\" AS "
+            f"SELECT * FROM {csv_scan(str(file_path))}"
+        )
+        self._loaded_tables.add(csv_name)
+
+    def read_csv_file(self, csv_name: str, row_limit: Optional[int] = None) -> str:
+        """Use this function to read the first rows of a csv file `name` without the extension.
+
+        Args:
+            csv_name (str): The name of the csv file to read without the extension.
+            row_limit (Optional[int]): The number of rows to return. Defaults to the toolkit
+                row limit.
+
+        Returns:
+            str: The contents of the csv file if successful, otherwise returns an error message.
+        """
+        try:
+            if csv_name not in [_csv.stem for _csv in self.csvs]:
+                return f"File: {csv_name} not found, please use one of {self.list_csv_files()}"
+
+            file_path = [_csv for _csv in self.csvs if _csv.stem == csv_name][0]
+            _row_limit = row_limit or self.row_limit
+            with open(str(file_path), newline="") as csvfile:
+                reader = csv.DictReader(csvfile)
+                csv_data = list(itertools.islice(reader, _row_limit))
+            return json.dumps(csv_data)
+        except Exception as e:
+            logger.error(f"Error reading csv: {e}")
+            return f"Error reading csv: {e}"
+
+    def query_csv_file(self, csv_name: str, sql_query: str) -> str:
+        """Use this function to run a SQL query on csv file `csv_name` without the extension.
+        The Table name is the name of the csv file without the extension.
+        The SQL Query should be a valid DuckDB SQL query.
+
+        Args:
+            csv_name (str): The name of the csv file to query
+            sql_query (str): The SQL Query to run on the csv file.
+
+        Returns:
+            str: The query results if successful, otherwise returns an error message.
+        """
+        try:
+            if csv_name not in [_csv.stem for _csv in self.csvs]:
+                return f"File: {csv_name} not found, please use one of {self.list_csv_files()}"
+
+            # Remove backticks and only run the first statement
+            formatted_sql = sql_query.replace("`", "").split(";")[0]
+
+            def execute() -> ResultSet:
+                self._ensure_loaded(csv_name)
+                logger.info(f"Running query: {formatted_sql}")
+                query_result = self.connection.sql(formatted_sql)
+                if query_result is None:
+                    return [], []
+                return query_result.columns, query_result.fetchall()
+
+            columns, rows = _cached_execute(
+                self.result_cache, self.fingerprint, formatted_sql, execute
+            )
+            return _format_result(columns, rows) if columns else "No output"
+        except Exception as e:
+            logger.error(f"Error querying csv: {e}")
+            return f"Error querying csv: {e}"
+
+
+def _with_note(note: Optional[str], result: str) -> str:
+    return f"{note}\n{result}" if note else result
+
+
+class CachedDuckDbTools(DuckDbTools):
+    """
+    DuckDbTools whose read-only query results are served from a ResultCache
+    while the source fingerprint is unchanged. With a QueryGuard, queries are
+    explained first and expensive ones are not run.
+    """
+
+    def __init__(
+        self,
+        result_cache: Optional[ResultCache] = None,
+        fingerprint: Optional[Fingerprint] = None,
+        guard: Optional[QueryGuard] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.result_cache = result_cache
+        self.fingerprint = fingerprint
+        self.guard = guard
+
+    def run_query(self, query: str) -> str:
+        """Function that runs a query and returns the result.
+
+        :param query: SQL query to run
+        :return: Result of the query
+        """
+        # Remove backticks and only run the first statement
+        formatted_sql = query.replace("`", "").split(";")[0]
+
+        note = None
+        if self.guard:
+            decision = self.guard.review(
+                formatted_sql, lambda sql: explain_duckdb(self.connection, sql)
+            )
+            if decision.rejection:
+                return decision.rejection
+            formatted_sql, note = decision.sql, decision.note
+
+        def execute() -> ResultSet:
+            logger.info(f"Running: {formatted_sql}")
+            query_result = self.connection.sql(formatted_sql)
+            if query_result is None:
+                return [], []
+            return query_result.columns, query_result.fetchall()
+
+        try:
+            columns, rows = _cached_execute(
+                self.result_cache, self.fingerprint, formatted_sql, execute
+            )
+            return _with_note(note, _format_result(columns, rows) if columns else "No output")
+        except Exception as e:
+            return str(e)
+
+
+class CachedSQLTools(SQLTools):
+    """
+    SQLTools whose read-only query results are served from a ResultCache
+    while the source fingerprint is unchanged, so repeated aggregations do
+    not hit the database again. With a QueryGuard, queries are explained
+    first and expensive ones are not run.
+    """
+
+    def __init__(
+        self,
+        result_cache: Optional[ResultCache] = None,
+        fingerprint: Optional[Fingerprint] = None,
+        guard: Optional[QueryGuard] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.result_cache = result_cache
+        self.fingerprint = fingerprint
+        self.guard = guard
+
+    def run_sql_query(self, query: str, limit: Optional[int] = 10) -> str:
+        """Use this function to run a SQL query and return the result.
+
+        Args:
+            query (str): The query to run.
+            limit (int, optional): The number of rows to return. Defaults to 10. Use `None` to
+                show all results.
+        Returns:
+            str: Result of the SQL query.
+        Notes:
+            - The result may be empty if the query does not return any data.
+            - Queries estimated to be too expensive are not run; the reason is returned instead.
+        """
+        note = None
+        if self.guard:
+            decision = self.guard.review(query, lambda sql: explain_sqlalchemy(self.db_engine, sql))
+            if decision.rejection:
+                return decision.rejection
+            query, note = decision.sql, decision.note
+
+        try:
+            return _with_note(note, json.dumps(self.run_sql(sql=query, limit=limit), default=str))
+        except Exception as e:
+            logger.error(f"Error running query: {e}")
+            return f"Error running query: {e}"
+
+    def run_sql(self, sql: str, limit: Optional[int] = None) -> List[dict]:
+        """Internal function to run a sql query.
+
+        Args:
+            sql (str): The sql query to run.
+            limit (int, optional): The number of rows to return. Defaults to None.
+
+        Returns:
+            List[dict]: The result of the query.
+        """
+
+        def execute() -> ResultSet:
+            logger.debug(f"Running sql |\n{sql}")
+            with self.Session() as sess, sess.begin():
+                result = sess.execute(text(sql))
+                if not result.returns_rows:
+                    return [], []
+                rows = result.fetchmany(limit) if limit else result.fetchall()
+                return list(result.keys()), [tuple(row) for row in rows]
+
+        # The limit changes the result, so it is part of the cached statement
+        cache_key_sql = f"{sql}\n-- limit {limit}"
+        columns, rows = _cached_execute(
+            self.result_cache,
+            self.fingerprint,
+            cache_key_sql,
+            execute,
+        )
+        return [dict(zip(columns, row)) for row in rows]
+
+
+class ChunkSearchTools(Toolkit):
+    """Lets an agent look up passages of the ingested documents."""
+
+    def __init__(self, retriever: Retriever, max_results: int = 5):
+        super().__init__(name="chunk_search_tools")
+        self.retriever = retriever
+        self.max_results = max_results
+        self.register(self.search_documents)
+
+    def search_documents(self, query: str, limit: Optional[int] = None) -> str:
+        """Use this function to find passages of the ingested documents related to a query.
+
+        Args:
+            query (str): What to look for, in natural language or as keywords.
+            limit (Optional[int]): Maximum number of passages to return. Defaults to 5.
+
+        Returns:
+            str: JSON list of passages with their source file and relevance score.
+        """
+        try:
+            results = self.retriever.search(query, min(limit or self.max_results, 20))
+            return json.dumps(
+                [
+                    {
+                        "source": result.source_path,
+                        "chunk": result.chunk_index,
+                        "score": round(result.score, 4),
+                        "text": result.text,
+                    }
+                    for result in results
+                ]
+            )
+        except Exception as e:
+            logger.error(f"Error searching documents: {e}")
+            return f"Error searching documents: {e}"
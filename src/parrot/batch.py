@@ -0,0 +1,347 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from rich.console import Console
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn
+
+from parrot.config import ProviderConfig
+from parrot.llm_loader import LLMModelLoader
+from parrot.prompter import ConnectionDetails, CSVConnectionDetails, ParquetConnectionDetails
+
+if TYPE_CHECKING:
+    from parrot.agents.base_agent import ParrotAgent
+
+DEFAULT_CONCURRENCY = 4
+
+# Questions started per minute by provider; providers not listed are not limited
+DEFAULT_RATE_LIMITS: Dict[str, float] = {"groq": 30.0}
+
+# Attempts per question when the provider answers 429 Too Many Requests
+RATE_LIMIT_RETRIES = 3
+RATE_LIMIT_BACKOFF = 2.0
+
+AgentFactory = Callable[[], "ParrotAgent"]
+
+
+@dataclass
+class BatchQuestion:
+    """A question read from the batch file."""
+
+    index: int
+    id: str
+    question: str
+
+
+@dataclass
+class BatchResult:
+    """The answer to a batch question, or the error that prevented it."""
+
+    index: int
+    id: str
+    question: str
+    answer: Optional[str]
+    error: Optional[str]
+    started_at: str
+    seconds: float
+
+
+@dataclass
+class BatchStats:
+    """Totals of a batch run."""
+
+    total: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+
+class RateLimiter:
+    """
+    Token bucket shared by all worker threads.
+
+    Allows `per_minute` acquisitions a minute on average, with bursts of up
+    to `burst`. Threads that find the bucket empty sleep until a token is due.
+    """
+
+    def __init__(self, per_minute: float, burst: int = 1):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_seconds = (1 - self._tokens) / self.rate
+            time.sleep(wait_seconds)
+
+
+def read_questions(path: str) -> Iterator[BatchQuestion]:
+    """
+    Read questions from a JSON Lines file, one at a time.
+
+    Lines are objects with a `question` and an optional `id`, or plain JSON
+    strings. Questions without an id are numbered by line.
+    """
+    with open(path, encoding="utf-8") as f:
+        index = 0
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_number} of {path}: {e}") from None
+
+            if isinstance(record, str):
+                record = {"question": record}
+            if not isinstance(record, dict) or not record.get("question"):
+                raise ValueError(f"Line {line_number} of {path} has no question")
+
+            yield BatchQuestion(
+                index=index,
+                id=str(record.get("id", line_number)),
+                question=record["question"],
+            )
+            index += 1
+
+
+def connection_details(source: str) -> Union[ConnectionDetails, str]:
+    """
+    Connection details of a source given on the command line.
+
+    SQLAlchemy URLs are returned as they are. CSV files and Parquet files,
+    globs or directories become their connection details; URLs of files are
+    downloaded once here.
+    """
+    if "://" in source and not source.startswith(("http://", "https://")):
+        return source
+
+    path = source.split("?", 1)[0].lower()
+    if path.endswith(".csv"):
+        return CSVConnectionDetails(file_path=source)
+    if path.endswith(".parquet") or os.path.isdir(source) or "*" in source:
+        return ParquetConnectionDetails(file_path=source)
+    raise ValueError(f"Unsupported source: {source}")
+
+
+def agent_factory(config: ProviderConfig, source: str) -> AgentFactory:
+    """
+    Build agents for the source with the configured model, the same way the
+    interactive mode does, including document search.
+    """
+    from parrot.agents.factory import AgentsFactory
+    from parrot.config import ollama_host
+    from parrot.agents.tools import ChunkSearchTools
+    from parrot.rag.retriever import load_retriever
+    from parrot.rag.storage.db import SessionLocal
+
+    details = connection_details(source)
+
+    def create() -> "ParrotAgent":
+        model = LLMModelLoader.load(config.provider, config.model, config.api_key)
+        if isinstance(details, str):
+            agent = AgentsFactory().create_sql_agent(model, details)
+        else:
+            agent = AgentsFactory().create(model, details)
+
+        retriever = load_retriever(SessionLocal, ollama_host(config))
+        if retriever:
+            agent.add_tools(ChunkSearchTools(retriever))
+        return agent
+
+    return create
+
+
+class BatchRunner:
+    """
+    Answers many questions against one source with bounded concurrency.
+
+    Questions run on a pool of `concurrency` threads. Agents keep per-run
+    state, so each thread builds its own agent on first use and reuses it
+    for every question it answers. A shared RateLimiter spaces out the
+    questions sent to the provider, and questions rejected with 429 Too Many
+    Requests are retried with backoff. Only about two questions per thread
+    are read ahead, so the question file can be arbitrarily long.
+    """
+
+    def __init__(
+        self,
+        create_agent: AgentFactory,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        self.create_agent = create_agent
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter
+        self._local = threading.local()
+
+    def _agent(self) -> "ParrotAgent":
+        agent = getattr(self._local, "agent", None)
+        if agent is None:
+            agent = self._local.agent = self.create_agent()
+        return agent
+
+    def answer(self, question: BatchQuestion) -> BatchResult:
+        """Answer one question on the calling thread."""
+        started_at = datetime.now()
+        start = time.perf_counter()
+        answer, error = None, None
+        for attempt in range(RATE_LIMIT_RETRIES):
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            try:
+                answer = str(self._agent().run(question.question).content)
+                error = None
+                break
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                if getattr(e, "status_code", None) != 429 or attempt == RATE_LIMIT_RETRIES - 1:
+                    break
+                time.sleep(RATE_LIMIT_BACKOFF * 2**attempt)
+
+        return BatchResult(
+            index=question.index,
+            id=question.id,
+            question=question.question,
+            answer=answer,
+            error=error,
+            started_at=started_at.isoformat(),
+            seconds=time.perf_counter() - start,
+        )
+
+    def run(
+        self,
+        questions: Iterable[BatchQuestion],
+        on_result: Callable[[BatchResult], None],
+    ) -> BatchStats:
+        """
+        Answer every question, passing each result to `on_result` as it completes.
+
+        Results arrive in completion order; their `index` is the input order.
+        """
+        stats = BatchStats()
+        start = time.perf_counter()
+        pending = iter(questions)
+
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix="parrot-batch") as pool:
+            running: set[Future] = set()
+            while True:
+                for question in pending:
+                    running.add(pool.submit(self.answer, question))
+                    if len(running) >= 2 * self.concurrency:
+                        break
+
+                if not running:
+                    break
+
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    stats.total += 1
+                    stats.failed += result.error is not None
+                    on_result(result)
+
+        stats.seconds = time.perf_counter() - start
+        return stats
+
+
+class ResultWriter:
+    """
+    Writes batch results to JSON Lines as they arrive, or to Parquet in input
+    order at the end, depending on the output file's extension.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.parquet = self.path.suffix.lower() == ".parquet"
+        self._results: List[BatchResult] = []
+        self._file = None if self.parquet else open(self.path, "w", encoding="utf-8")
+
+    def write(self, result: BatchResult) -> None:
+        if self.parquet:
+            self._results.append(result)
+        else:
+            self._file.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        if self.parquet:
+            import pandas as pd
+
+            self._results.sort(key=lambda result: result.index)
+            pd.DataFrame([asdict(result) for result in self._results]).to_parquet(
+                self.path, index=False
+            )
+        else:
+            self._file.close()
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def run_batch(
+    config: ProviderConfig,
+    questions_path: str,
+    source: str,
+    output_path: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rate_per_minute: Optional[float] = None,
+) -> BatchStats:
+    """
+    Answer a file of questions against a source and write the results.
+
+    Args:
+        config: Model provider configuration
+        questions_path: JSON Lines file of questions
+        source: SQLAlchemy URL, CSV file or Parquet file, glob or directory
+        output_path: .jsonl or .parquet file for the answers and timings
+        concurrency: Questions answered at the same time
+        rate_per_minute: Questions started per minute; defaults to the
+            provider's entry in DEFAULT_RATE_LIMITS, 0 disables the limit
+    """
+    console = Console()
+    if rate_per_minute is None:
+        rate_per_minute = DEFAULT_RATE_LIMITS.get(config.provider.lower(), 0)
+    rate_limiter = RateLimiter(rate_per_minute, burst=concurrency) if rate_per_minute else None
+    runner = BatchRunner(agent_factory(config, source), concurrency, rate_limiter)
+
+    with ResultWriter(output_path) as writer, Progress(
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TextColumn("{task.fields[failed]} failed"),
+        console=console,
+    ) as progress:
+        task = progress.add_task("Answering", total=None, failed=0)
+        failed = 0
+
+        def on_result(result: BatchResult) -> None:
+            nonlocal failed
+            writer.write(result)
+            failed += result.error is not None
+            progress.update(task, advance=1, failed=failed)
+
+        stats = runner.run(read_questions(questions_path), on_result)
+
+    console.print(
+        f"Answered {stats.total - stats.failed} of {stats.total} questions "
+        f"({stats.failed} failed) in {stats.seconds:.1f}s, written to {output_path}."
+    )
+    return stats
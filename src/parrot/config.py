@@ -1,5 +1,6 @@
 import json
 import os
+from functools import cached_property
 from pathlib import Path
 from typing import Dict, Optional, Any
 
@@ -9,12 +10,14 @@ from rich.panel import Panel
 from rich.prompt import Prompt
 from rich.text import Text
 
-from parrot.prompter import ConfigPrompter
-
 USER_DIR = os.path.expanduser("~/.parrot")
 
 MODEL_CONFIG = os.path.join(USER_DIR, "model_config.json")
 
+CACHE_DIR = os.path.join(USER_DIR, "cache")
+
+VECTOR_DIR = os.path.join(USER_DIR, "vectors")
+
 
 class ProviderConfig(BaseModel):
     """Complete configuration for a provider after prompting."""
@@ -26,9 +29,23 @@ class ProviderConfig(BaseModel):
     class Config:
         extra = "allow"  # Allows additional fields added via add_field_prompt
 
+
+def ollama_host(config: ProviderConfig) -> Optional[str]:
+    """The configured Ollama server, None for the local default or other providers."""
+    return config.endpoint if config.provider.lower() == "ollama" else None
+
+
 class Config:
 
-    prompeter = ConfigPrompter()
+    @cached_property
+    def prompeter(self):
+        """
+        The prompter is only needed to (re)configure the model; creating it
+        reads llms.json, so it is built on first use.
+        """
+        from parrot.prompter import ConfigPrompter
+
+        return ConfigPrompter()
 
     def prompt(self):
         """
@@ -0,0 +1,82 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, select
+
+from parrot.models.answer_cache import CachedAnswer
+
+
+class AnswerCacheRepository:
+    """Repository for cached agent answers."""
+
+    def __init__(self, db_session: Session):
+        self.db = db_session
+
+    def get(self, key: str, created_after: datetime) -> Optional[CachedAnswer]:
+        """Get a cached answer created after the given time and mark it as used."""
+        entry = self.db.get(CachedAnswer, key)
+        if entry is None or entry.created_at < created_after:
+            return None
+
+        entry.hit_count += 1
+        entry.last_accessed_at = datetime.now()
+        self.db.commit()
+        return entry
+
+    def put(
+        self,
+        key: str,
+        question: str,
+        model: str,
+        source: str,
+        fingerprint: str,
+        answer: str,
+    ) -> CachedAnswer:
+        """Store an answer, replacing any previous answer with the same key."""
+        now = datetime.now()
+        entry = self.db.merge(
+            CachedAnswer(
+                key=key,
+                question=question,
+                model=model,
+                source=source,
+                fingerprint=fingerprint,
+                answer=answer,
+                hit_count=0,
+                created_at=now,
+                last_accessed_at=now,
+            )
+        )
+        self.db.commit()
+        return entry
+
+    def evict(self, expired_before: datetime, max_entries: int) -> int:
+        """
+        Delete expired answers, then the least recently used ones beyond max_entries.
+
+        Returns:
+            Count of answers deleted
+        """
+        deleted = self.db.execute(
+            delete(CachedAnswer).where(CachedAnswer.created_at < expired_before)
+        ).rowcount
+
+        overflow = self.db.scalar(select(func.count()).select_from(CachedAnswer)) - max_entries
+        if overflow > 0:
+            oldest = (
+                select(CachedAnswer.key)
+                .order_by(CachedAnswer.last_accessed_at)
+                .limit(overflow)
+            )
+            deleted += self.db.execute(
+                delete(CachedAnswer).where(CachedAnswer.key.in_(oldest))
+            ).rowcount
+
+        self.db.commit()
+        return deleted
+
+    def clear(self) -> int:
+        """Delete all cached answers. Returns count deleted."""
+        deleted = self.db.execute(delete(CachedAnswer)).rowcount
+        self.db.commit()
+        return deleted
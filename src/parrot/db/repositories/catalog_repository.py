@@ -0,0 +1,81 @@
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy.orm import Session
+
+from parrot.models.schema_catalog import CatalogSource, CatalogTable
+
+
+class CatalogRepository:
+    """Repository for the cached schema catalog of SQL data sources."""
+
+    def __init__(self, db_session: Session):
+        self.db = db_session
+
+    def get_source(self, source_key: str) -> Optional[CatalogSource]:
+        """Get a catalogued source by key."""
+        return self.db.get(CatalogSource, source_key)
+
+    def mark_checked(self, source_key: str) -> None:
+        """Record that the source was checked for schema changes just now."""
+        source = self.get_source(source_key)
+        if source:
+            source.checked_at = datetime.now()
+            self.db.commit()
+
+    def list_tables(self, source_key: str) -> List[CatalogTable]:
+        """List all catalogued tables of a source with their columns."""
+        return (
+            self.db.query(CatalogTable)
+            .filter(CatalogTable.source_key == source_key)
+            .order_by(CatalogTable.schema_name, CatalogTable.name)
+            .all()
+        )
+
+    def apply_changes(
+        self,
+        source_key: str,
+        dialect: str,
+        signature: str,
+        upserts: List[CatalogTable],
+        deleted_ids: List[str],
+    ) -> None:
+        """
+        Replace changed tables and drop removed ones in a single transaction.
+
+        Args:
+            source_key: Key of the catalogued source
+            dialect: SQLAlchemy dialect name of the source
+            signature: Signature of the source schema after the changes
+            upserts: Tables (with columns) to insert, replacing any stored table with the same id
+            deleted_ids: Ids of tables that no longer exist in the source
+        """
+        stale_ids = list(deleted_ids) + [table.id for table in upserts]
+        if stale_ids:
+            # Delete through the ORM so the columns cascade as well
+            for table in self.db.query(CatalogTable).filter(CatalogTable.id.in_(stale_ids)):
+                self.db.delete(table)
+            self.db.flush()
+
+        self.db.add_all(upserts)
+        self.db.merge(
+            CatalogSource(
+                source_key=source_key,
+                dialect=dialect,
+                signature=signature,
+                checked_at=datetime.now(),
+            )
+        )
+        self.db.commit()
+
+    def delete_source(self, source_key: str) -> int:
+        """Drop the whole catalog of a source. Returns count of tables deleted."""
+        tables = self.list_tables(source_key)
+        for table in tables:
+            self.db.delete(table)
+
+        source = self.get_source(source_key)
+        if source:
+            self.db.delete(source)
+
+        self.db.commit()
+        return len(tables)
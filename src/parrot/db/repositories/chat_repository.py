@@ -1,10 +1,38 @@
-from typing import Optional, List
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, List
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import column, desc, func, insert, literal_column, table, tuple_
 import uuid
 
 from parrot.models.chat_session import ChatSession, ChatMessage
 
+SAVE_CHUNK_SIZE = 1000
+
+# (updated_at, id) of the last session of a page
+SessionCursor = tuple[datetime, str]
+
+SNIPPET_TOKENS = 16
+
+_chat_messages_fts = table("chat_messages_fts", column("rowid"))
+_fts = literal_column("chat_messages_fts")
+
+
+@dataclass
+class MessageSearchHit:
+    """A message matching a full-text search."""
+
+    message: ChatMessage
+    # BM25 score, lower is better
+    rank: float
+    snippet: str
+
+
+def _fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query that matches messages containing every word."""
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", text))
+
 
 class ChatRepository:
     """Repository for chat session CRUD operations."""
@@ -27,16 +55,41 @@ class ChatRepository:
         """Get a session by ID."""
         return self.db.query(ChatSession).filter(ChatSession.id == session_id).first()
 
-    def list_sessions(self, limit: int = 50, offset: int = 0) -> List[ChatSession]:
-        """List all sessions ordered by most recent first."""
+    def list_sessions(
+        self, limit: int = 50, before: Optional[SessionCursor] = None
+    ) -> List[ChatSession]:
+        """
+        List sessions ordered by most recent first.
+
+        Args:
+            limit: Maximum number of sessions to return
+            before: Cursor of the last session of the previous page, as
+                returned by `session_cursor`, to continue after it
+
+        Returns:
+            The sessions of the page
+        """
+        query = self.db.query(ChatSession)
+        if before is not None:
+            updated_at, session_id = before
+            # Timestamps are set by SQLite's CURRENT_TIMESTAMP, so the cursor is
+            # rendered the same way for the comparison to match stored values
+            query = query.filter(
+                tuple_(ChatSession.updated_at, ChatSession.id)
+                < tuple_(func.datetime(updated_at), session_id)
+            )
+
         return (
-            self.db.query(ChatSession)
-            .order_by(desc(ChatSession.updated_at))
-            .offset(offset)
+            query.order_by(desc(ChatSession.updated_at), desc(ChatSession.id))
             .limit(limit)
             .all()
         )
 
+    @staticmethod
+    def session_cursor(session: ChatSession) -> SessionCursor:
+        """Cursor to pass to `list_sessions` to get the sessions after this one."""
+        return session.updated_at, session.id
+
     def update_session_title(
         self, session_id: uuid.UUID, title: str
     ) -> Optional[ChatSession]:
@@ -69,6 +122,7 @@ class ChatRepository:
         message = ChatMessage(
             id=str(uuid.uuid4()),
             session_id=session_id,
+            sequence=self.get_last_sequence(session_id) + 1,
             sender=sender,
             raw_content=raw_content,
         )
@@ -77,19 +131,153 @@ class ChatRepository:
         self.db.refresh(message)
         return message
 
+    def add_messages(self, messages: List[dict]) -> int:
+        """
+        Add messages, possibly to different sessions, in a single transaction.
+
+        Args:
+            messages: Dicts with the ChatMessage columns (id, session_id,
+                sender, raw_content and created_at). Messages without a
+                sequence are numbered after the last stored message of their
+                session, in list order.
+
+        Returns:
+            The number of messages added
+        """
+        if not messages:
+            return 0
+
+        next_sequence = {}
+        rows = []
+        for message in messages:
+            if message.get("sequence") is None:
+                session_id = message["session_id"]
+                if session_id not in next_sequence:
+                    next_sequence[session_id] = self.get_last_sequence(session_id) + 1
+                message = {**message, "sequence": next_sequence[session_id]}
+                next_sequence[session_id] += 1
+            rows.append(message)
+
+        self.db.execute(insert(ChatMessage), rows)
+        self.db.commit()
+        return len(rows)
+
     def get_message(self, message_id: uuid.UUID) -> Optional[ChatMessage]:
         """Get a message by ID."""
         return self.db.query(ChatMessage).filter(ChatMessage.id == message_id).first()
 
-    def get_session_messages(self, session_id: uuid.UUID) -> List[ChatMessage]:
-        """Get all messages for a session in order."""
+    def get_session_messages(
+        self,
+        session_id: uuid.UUID,
+        after_sequence: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[ChatMessage]:
+        """
+        Get the messages of a session in order.
+
+        Args:
+            session_id: Session to read
+            after_sequence: Only return messages after this sequence number
+            limit: Maximum number of messages to return, all if not given
+
+        Returns:
+            The messages, oldest first
+        """
+        query = self.db.query(ChatMessage).filter(ChatMessage.session_id == session_id)
+        if after_sequence is not None:
+            query = query.filter(ChatMessage.sequence > after_sequence)
+
+        query = query.order_by(ChatMessage.sequence)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def get_last_sequence(self, session_id: uuid.UUID) -> int:
+        """Sequence number of the newest message of a session, 0 if it has none."""
         return (
-            self.db.query(ChatMessage)
+            self.db.query(func.max(ChatMessage.sequence))
             .filter(ChatMessage.session_id == session_id)
-            .order_by(ChatMessage.sequence)
-            .all()
+            .scalar()
+            or 0
+        )
+
+    def count_session_messages(self, session_id: uuid.UUID) -> int:
+        """Count the messages of a session."""
+        return (
+            self.db.query(func.count(ChatMessage.id))
+            .filter(ChatMessage.session_id == session_id)
+            .scalar()
         )
 
+    def get_message_page(
+        self,
+        session_id: uuid.UUID,
+        limit: int = 20,
+        before_sequence: Optional[int] = None,
+    ) -> List[ChatMessage]:
+        """
+        Get a page of a session's messages, counting back from the newest.
+
+        Args:
+            session_id: Session to read
+            limit: Page size
+            before_sequence: Only return messages older than this sequence
+                number, i.e. the first sequence of the previous page
+
+        Returns:
+            The page's messages in chronological order
+        """
+        query = self.db.query(ChatMessage).filter(ChatMessage.session_id == session_id)
+        if before_sequence is not None:
+            query = query.filter(ChatMessage.sequence < before_sequence)
+
+        messages = query.order_by(desc(ChatMessage.sequence)).limit(limit).all()
+        return messages[::-1]
+
+    def search_messages(
+        self,
+        query: str,
+        limit: int = 20,
+        session_id: Optional[uuid.UUID] = None,
+        highlight: tuple[str, str] = ("[", "]"),
+    ) -> List[MessageSearchHit]:
+        """
+        Full-text search over message contents, best matches first.
+
+        Args:
+            query: Free text; messages must contain every word (stemmed)
+            limit: Maximum number of hits
+            session_id: Only search this session
+            highlight: Markers put around the matched words in the snippet
+
+        Returns:
+            The matching messages with their rank and a snippet
+        """
+        match = _fts_query(query)
+        if not match:
+            return []
+
+        rank = func.bm25(_fts).label("rank")
+        snippet = func.snippet(
+            _fts, 0, highlight[0], highlight[1], "...", SNIPPET_TOKENS
+        ).label("snippet")
+
+        search = (
+            self.db.query(ChatMessage, rank, snippet)
+            .join(
+                _chat_messages_fts,
+                _chat_messages_fts.c.rowid == literal_column("chat_messages.rowid"),
+            )
+            .filter(_fts.op("MATCH")(match))
+        )
+        if session_id is not None:
+            search = search.filter(ChatMessage.session_id == session_id)
+
+        return [
+            MessageSearchHit(message=message, rank=rank, snippet=snippet)
+            for message, rank, snippet in search.order_by(rank).limit(limit)
+        ]
+
     def update_message(
         self,
         message_id: uuid.UUID,
@@ -129,30 +317,59 @@ class ChatRepository:
     # Bulk operations
     def save_conversation(
         self,
-        messages: List[tuple[str, str, Optional[str]]],
+        messages: Iterable[tuple[str, str, Optional[str]]],
         title: Optional[str] = None,
         session_id: Optional[str] = None,
+        chunk_size: int = SAVE_CHUNK_SIZE,
     ) -> ChatSession:
         """
         Save an entire conversation at once.
 
+        The session and all its messages are written in a single transaction,
+        with the messages inserted in executemany batches of `chunk_size`. The
+        messages may be any iterable, so very large conversations can be
+        streamed in without materializing them.
+
         Args:
-            messages: List of (sender, raw_content, styled_content) tuples
+            messages: Iterable of (sender, raw_content, styled_content) tuples
             title: Optional session title
             session_id: Optional session ID (generated if not provided)
+            chunk_size: Number of messages per INSERT batch
 
         Returns:
             The created ChatSession
         """
-        session = self.create_session(title=title, session_id=session_id)
-
-        for sender, raw_content, styled_content in messages:
-            self.add_message(
-                session_id=session.id,
-                sender=sender,
-                raw_content=raw_content,
-                styled_content=styled_content,
-            )
+        session = ChatSession(id=session_id or str(uuid.uuid4()), title=title)
+        # Messages get distinct, increasing timestamps so their order is kept
+        started_at = datetime.now()
+
+        try:
+            self.db.add(session)
+            self.db.flush()
+
+            chunk = []
+            for index, (sender, raw_content, _styled_content) in enumerate(messages):
+                chunk.append(
+                    {
+                        "id": str(uuid.uuid4()),
+                        "session_id": session.id,
+                        "sequence": index + 1,
+                        "sender": sender,
+                        "raw_content": raw_content,
+                        "created_at": started_at + timedelta(microseconds=index),
+                    }
+                )
+                if len(chunk) >= chunk_size:
+                    self.db.execute(insert(ChatMessage), chunk)
+                    chunk = []
+
+            if chunk:
+                self.db.execute(insert(ChatMessage), chunk)
+
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
 
         return session
 
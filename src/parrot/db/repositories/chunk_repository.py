@@ -0,0 +1,126 @@
+import re
+from collections import defaultdict
+from typing import Dict, List
+from sqlalchemy import column, func, literal_column, table, update
+from sqlalchemy.orm import Session
+
+from parrot.rag.models import Chunk, IngestionJob, JobStatus, Source
+
+_chunks_fts = table("chunks_fts", column("rowid"))
+_fts = literal_column("chunks_fts")
+
+# Words, keeping identifiers like ORD-1234, orders.total_amount or a/b together
+_TERM_RE = re.compile(r"\w+(?:[-.:/]\w+)*")
+
+
+def query_terms(text: str) -> List[str]:
+    """The words and identifiers of a search query."""
+    return _TERM_RE.findall(text)
+
+
+def _fts_any_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 query matching chunks with any of its terms.
+
+    Every term is quoted, so an identifier is matched as a phrase of its parts.
+    """
+    return " OR ".join(f'"{term}"' for term in query_terms(text))
+
+
+class ChunkRepository:
+    """Repository for ingested chunks and their embeddings."""
+
+    def __init__(self, db_session: Session):
+        self.db = db_session
+
+    def get_by_vector_rows(self, rows: List[int]) -> Dict[int, List[tuple[Chunk, str]]]:
+        """
+        Get the chunks stored at vector rows, with the path of their source.
+
+        Chunks with identical text share a row. Rows whose chunks were all
+        deleted, or whose sources were tombstoned, are left out.
+        """
+        if not rows:
+            return {}
+
+        found = (
+            self.db.query(Chunk, Source.path)
+            .join(Source, Source.id == Chunk.source_id)
+            .filter(Chunk.vector_row.in_(rows), Source.deleted_at.is_(None))
+            .order_by(Chunk.source_id, Chunk.chunk_index)
+        )
+        chunks = defaultdict(list)
+        for chunk, path in found:
+            chunks[chunk.vector_row].append((chunk, path))
+        return dict(chunks)
+
+    def has_chunks(self) -> bool:
+        """Whether anything was ingested."""
+        return self.db.query(Chunk.id).limit(1).first() is not None
+
+    def search_text(self, query: str, limit: int) -> List[tuple[Chunk, str, float]]:
+        """
+        Full-text search over chunks of live sources, best matches first.
+
+        Returns:
+            (chunk, source path, BM25 score) of up to `limit` chunks containing
+            any word of the query; lower scores are better
+        """
+        match = _fts_any_query(query)
+        if not match:
+            return []
+
+        rank = func.bm25(_fts).label("rank")
+        search = (
+            self.db.query(Chunk, Source.path, rank)
+            .select_from(Chunk)
+            .join(_chunks_fts, _chunks_fts.c.rowid == literal_column("chunks.rowid"))
+            .join(Source, Source.id == Chunk.source_id)
+            .filter(_fts.op("MATCH")(match), Source.deleted_at.is_(None))
+            .order_by(rank)
+            .limit(limit)
+        )
+        return [(chunk, path, rank) for chunk, path, rank in search]
+
+    def list_unembedded(self, limit: int) -> List[tuple[str, str, str]]:
+        """
+        Get chunks of completed ingestion jobs that have no embedding yet.
+
+        Returns:
+            (chunk id, text, content hash) of up to `limit` chunks
+        """
+        return [
+            tuple(row)
+            for row in self.db.query(Chunk.id, Chunk.text, Chunk.content_hash)
+            .join(IngestionJob, IngestionJob.id == Chunk.job_id)
+            .filter(Chunk.vector_row.is_(None), IngestionJob.status == JobStatus.COMPLETED)
+            .limit(limit)
+        ]
+
+    def vector_rows_by_hash(self, content_hashes: List[str]) -> Dict[str, int]:
+        """Vector rows of already embedded chunks with these content hashes."""
+        if not content_hashes:
+            return {}
+
+        return dict(
+            self.db.query(Chunk.content_hash, Chunk.vector_row)
+            .filter(Chunk.content_hash.in_(content_hashes), Chunk.vector_row.is_not(None))
+            .distinct()
+        )
+
+    def set_vector_rows(self, vector_rows: Dict[str, int]) -> None:
+        """Record the vector row of embedded chunks, by chunk id."""
+        if vector_rows:
+            self.db.execute(
+                update(Chunk),
+                [{"id": chunk_id, "vector_row": row} for chunk_id, row in vector_rows.items()],
+            )
+            self.db.commit()
+
+    def clear_vector_rows(self) -> int:
+        """Forget all embeddings, e.g. after the vector store was reset."""
+        count = self.db.execute(
+            update(Chunk).where(Chunk.vector_row.is_not(None)).values(vector_row=None)
+        ).rowcount
+        self.db.commit()
+        return count
@@ -0,0 +1,265 @@
+import itertools
+import json
+import os
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+from sqlalchemy import delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from parrot.rag.models import Chunk, IngestionJob, JobStatus, Source
+
+# Chunks matched and written per statement when replacing a source's chunks
+CHUNK_WRITE_BATCH = 1000
+
+
+@dataclass
+class SourceFile:
+    """A file found on disk, as seen by the last stat."""
+
+    path: str
+    mime_type: Optional[str]
+    size: int
+    mtime_ns: int
+
+
+@dataclass
+class IngestedFile:
+    """The outcome of processing the file of a job."""
+
+    job_id: str
+    source_id: str
+    checksum: str
+    size: int
+    mtime_ns: int
+    # None when the checksum did not change and the file was not parsed
+    chunks: Optional[List[dict]] = field(default=None)
+    chunk_count: int = 0
+    # JSON lines file holding the chunks of a large file instead of `chunks`
+    spool_path: Optional[str] = None
+
+    def iter_chunks(self) -> Iterator[dict]:
+        """The chunks of the file, read from the spool file if there is one."""
+        yield from self.chunks or ()
+        if self.spool_path:
+            with open(self.spool_path, encoding="utf-8") as f:
+                for line in f:
+                    yield json.loads(line)
+
+    def discard_spool(self) -> None:
+        """Delete the spool file, once its chunks are stored."""
+        if self.spool_path:
+            os.unlink(self.spool_path)
+            self.spool_path = None
+
+
+class IngestionRepository:
+    """Repository for ingestion sources, jobs and chunks."""
+
+    def __init__(self, db_session: Session):
+        self.db = db_session
+
+    # Source operations
+    def get_source_by_path(self, path: str) -> Optional[Source]:
+        """Get a source by its absolute path."""
+        return self.db.query(Source).filter(Source.path == path).first()
+
+    def list_sources(self, root: str) -> Dict[str, Source]:
+        """Get the sources at or below a path, keyed by path."""
+        # Compared as a plain prefix: LIKE would be case-insensitive and treat
+        # `_` and `%` in the path as wildcards
+        prefix = root.rstrip("/") + "/"
+        sources = self.db.query(Source).filter(
+            or_(Source.path == root, func.substr(Source.path, 1, len(prefix)) == prefix)
+        )
+        return {source.path: source for source in sources}
+
+    def tombstone(self, source_ids: List[str]) -> None:
+        """Mark sources whose files disappeared as deleted and drop their chunks."""
+        if not source_ids:
+            return
+
+        self.db.execute(delete(Chunk).where(Chunk.source_id.in_(source_ids)))
+        self.db.execute(
+            update(Source)
+            .where(Source.id.in_(source_ids))
+            .values(deleted_at=datetime.now(), checksum=None, size=None, mtime_ns=None)
+        )
+        self.db.commit()
+
+    # Job operations
+    def enqueue(self, files: List[SourceFile], sources: Dict[str, Source]) -> int:
+        """
+        Queue an ingestion job for every file that has no queued or running job.
+
+        Args:
+            files: Files to ingest
+            sources: Known sources of these files by path, as returned by `list_sources`
+
+        Returns:
+            The number of jobs queued
+        """
+        pending = {
+            source_id
+            for (source_id,) in self.db.query(IngestionJob.source_id).filter(
+                IngestionJob.status.in_([JobStatus.QUEUED, JobStatus.PROCESSING])
+            )
+        }
+
+        new_sources = []
+        jobs = []
+        for file in files:
+            source = sources.get(file.path)
+            if source is None:
+                source_id = str(uuid.uuid4())
+                new_sources.append(
+                    {"id": source_id, "path": file.path, "mime_type": file.mime_type}
+                )
+            elif source.id in pending:
+                continue
+            else:
+                source_id = source.id
+
+            jobs.append(
+                {"id": str(uuid.uuid4()), "source_id": source_id, "status": JobStatus.QUEUED}
+            )
+
+        if new_sources:
+            self.db.execute(insert(Source), new_sources)
+        if jobs:
+            self.db.execute(insert(IngestionJob), jobs)
+        self.db.commit()
+        return len(jobs)
+
+    def claim_jobs(self, limit: int) -> List[tuple[str, str, str, Optional[str]]]:
+        """
+        Atomically move up to `limit` queued jobs, oldest first, to processing.
+
+        Returns:
+            (job id, source id, source path, source checksum) of every claimed job
+        """
+        oldest_queued = (
+            select(IngestionJob.id)
+            .where(IngestionJob.status == JobStatus.QUEUED)
+            .order_by(IngestionJob.created_at)
+            .limit(limit)
+            .scalar_subquery()
+        )
+        claimed = self.db.execute(
+            update(IngestionJob)
+            .where(IngestionJob.id.in_(oldest_queued))
+            .values(status=JobStatus.PROCESSING, updated_at=datetime.now())
+            .returning(IngestionJob.id, IngestionJob.source_id)
+        ).all()
+        self.db.commit()
+
+        sources = {
+            source_id: (path, checksum)
+            for source_id, path, checksum in self.db.query(
+                Source.id, Source.path, Source.checksum
+            ).filter(Source.id.in_([source_id for _, source_id in claimed]))
+        }
+        return [(job_id, source_id, *sources[source_id]) for job_id, source_id in claimed]
+
+    def requeue_interrupted(self) -> int:
+        """Put jobs left in processing by an interrupted run back in the queue."""
+        count = self.db.execute(
+            update(IngestionJob)
+            .where(IngestionJob.status == JobStatus.PROCESSING)
+            .values(status=JobStatus.QUEUED, updated_at=datetime.now())
+        ).rowcount
+        self.db.commit()
+        return count
+
+    def count_jobs(self, status: JobStatus) -> int:
+        """Count the jobs in a status."""
+        return self.db.query(IngestionJob).filter(IngestionJob.status == status).count()
+
+    # Batch results
+    def complete_jobs(self, files: List[IngestedFile]) -> int:
+        """
+        Store the outcome of finished jobs and mark them completed, in one transaction.
+
+        The new chunks of a source are matched to its stored chunks by content
+        hash. Stored chunks with the same text are kept (and only renumbered),
+        so whatever was derived from them stays valid. Only new texts are
+        inserted and only texts that disappeared are deleted.
+
+        Returns:
+            The number of chunks inserted
+        """
+        inserted = 0
+        for file in files:
+            self.db.execute(
+                update(Source)
+                .where(Source.id == file.source_id)
+                .values(
+                    checksum=file.checksum,
+                    size=file.size,
+                    mtime_ns=file.mtime_ns,
+                    deleted_at=None,
+                )
+            )
+            if file.chunks is not None:
+                inserted += self._replace_chunks(file)
+
+        self.db.execute(
+            update(IngestionJob)
+            .where(IngestionJob.id.in_([file.job_id for file in files]))
+            .values(status=JobStatus.COMPLETED, error=None, updated_at=datetime.now())
+        )
+        self.db.commit()
+        return inserted
+
+    def _replace_chunks(self, file: IngestedFile) -> int:
+        # Chunks are matched a batch at a time, so a huge file is never held in memory.
+        # Matched and new chunks move to this job; whatever still belongs to an
+        # older job afterwards has disappeared from the file.
+        inserted = 0
+        chunks = file.iter_chunks()
+        while batch := list(itertools.islice(chunks, CHUNK_WRITE_BATCH)):
+            stored: Dict[str, List[str]] = defaultdict(list)
+            for chunk_id, content_hash in self.db.query(Chunk.id, Chunk.content_hash).filter(
+                Chunk.source_id == file.source_id,
+                Chunk.job_id != file.job_id,
+                Chunk.content_hash.in_({chunk["content_hash"] for chunk in batch}),
+            ):
+                stored[content_hash].append(chunk_id)
+
+            kept = []
+            added = []
+            for chunk in batch:
+                matches = stored.get(chunk["content_hash"])
+                if matches:
+                    kept.append(
+                        {
+                            "id": matches.pop(),
+                            "job_id": file.job_id,
+                            "chunk_index": chunk["chunk_index"],
+                            "token_count": chunk["token_count"],
+                        }
+                    )
+                else:
+                    added.append(chunk)
+
+            if kept:
+                self.db.execute(update(Chunk), kept)
+            if added:
+                self.db.execute(insert(Chunk), added)
+            inserted += len(added)
+
+        self.db.execute(
+            delete(Chunk).where(Chunk.source_id == file.source_id, Chunk.job_id != file.job_id)
+        )
+        return inserted
+
+    def fail_job(self, job_id: str, error: str) -> None:
+        """Mark a job as failed with the error that stopped it."""
+        self.db.execute(
+            update(IngestionJob)
+            .where(IngestionJob.id == job_id)
+            .values(status=JobStatus.FAILED, error=error, updated_at=datetime.now())
+        )
+        self.db.commit()
@@ -0,0 +1,409 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+from phi.utils.log import logger
+
+from parrot.config import CACHE_DIR
+
+DOWNLOAD_CACHE_DIR = os.path.join(CACHE_DIR, "downloads")
+
+# Bytes read from the response and written to disk at a time
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+
+# Parallel range requests per download; 1 downloads over a single connection
+DEFAULT_SEGMENTS = 4
+
+# Smaller files are not worth splitting into segments
+PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+
+# Seconds to connect, and to wait for each read of the response body
+CONNECT_TIMEOUT = 10.0
+READ_TIMEOUT = 60.0
+
+# Attempts per segment after a dropped connection or timeout, resuming each time
+DOWNLOAD_RETRIES = 5
+RETRY_BACKOFF = 1.0
+
+# Seconds between saves of the progress of a partial download
+STATE_SAVE_INTERVAL = 1.0
+
+# (bytes downloaded, total bytes if known)
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+
+class DownloadError(Exception):
+    """The file could not be downloaded completely."""
+
+
+class _RemoteChanged(DownloadError):
+    """The remote file changed while its segments were being downloaded."""
+
+
+@dataclass
+class _Segment:
+    # Byte range [start, end) of the file; end is None when the size is unknown
+    start: int
+    end: Optional[int]
+    done: int = 0
+
+    @property
+    def complete(self) -> bool:
+        return self.end is not None and self.start + self.done >= self.end
+
+
+@dataclass
+class _Remote:
+    """What the server says about a URL, and the state of a download of it."""
+
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    size: Optional[int] = None
+    accepts_ranges: bool = False
+    segments: List[_Segment] = field(default_factory=list)
+
+    def same_version(self, other: "_Remote") -> bool:
+        """Whether both describe the same version of the file, by its validators."""
+        if self.etag or other.etag:
+            return self.etag == other.etag
+        if self.last_modified or other.last_modified:
+            return self.last_modified == other.last_modified and self.size == other.size
+        return False
+
+    @property
+    def validator(self) -> Optional[str]:
+        """If-Range value that makes the server ignore a range if the file changed."""
+        if self.etag and not self.etag.startswith("W/"):
+            return self.etag
+        return self.last_modified
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["_Remote"]:
+        try:
+            data = json.loads(path.read_text())
+            data["segments"] = [_Segment(**segment) for segment in data.get("segments", [])]
+            return cls(**data)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable download metadata {path}: {e}")
+            return None
+
+    def save(self, path: Path) -> None:
+        temp_path = path.with_suffix(".tmp")
+        temp_path.write_text(json.dumps(asdict(self)))
+        os.replace(temp_path, path)
+
+
+class DownloadCache:
+    """
+    On-disk cache of files downloaded from HTTP(S) URLs.
+
+    Files are keyed by URL. A cached file is revalidated on every fetch with
+    a conditional HEAD request (If-None-Match / If-Modified-Since), so an
+    unchanged file is not downloaded again; if the server cannot be reached
+    the cached copy is used as is.
+
+    Downloads are written to a `.part` file next to the cached one, with
+    their progress saved alongside. A download that is interrupted, in this
+    run or an earlier one, resumes with a Range request guarded by If-Range,
+    so a file that changed in between is downloaded from the start. Servers
+    that accept ranges serve files of at least PARALLEL_MIN_BYTES as
+    `segments` parallel ranges.
+
+    Every response is checked against the ETag, Last-Modified and size that
+    HEAD reported, and a download is only cached once every byte arrived.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DOWNLOAD_CACHE_DIR,
+        segments: int = DEFAULT_SEGMENTS,
+        chunk_bytes: int = DOWNLOAD_CHUNK_BYTES,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.segments = max(1, segments)
+        self.chunk_bytes = chunk_bytes
+
+    def _paths(self, url: str, suffix: str) -> Dict[str, Path]:
+        key = hashlib.sha256(url.encode()).hexdigest()[:32]
+        # Keep the extension, readers such as DuckDB detect the format by it
+        suffix = suffix or Path(urlparse(url).path).suffix
+        return {
+            "file": self.cache_dir / f"{key}{suffix}",
+            "meta": self.cache_dir / f"{key}.meta.json",
+            "part": self.cache_dir / f"{key}{suffix}.part",
+            "state": self.cache_dir / f"{key}.state.json",
+        }
+
+    def fetch(
+        self, url: str, suffix: str = "", on_progress: Optional[ProgressCallback] = None
+    ) -> str:
+        """
+        Return the path of an up-to-date local copy of the file at `url`.
+
+        Args:
+            url: HTTP(S) URL of the file
+            suffix: Extension of the cached file; defaults to the URL's
+            on_progress: Called with the bytes downloaded so far and the total
+        """
+        paths = self._paths(url, suffix)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        cached = _Remote.load(paths["meta"]) if paths["file"].exists() else None
+
+        timeout = httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+        with httpx.Client(follow_redirects=True, timeout=timeout) as client:
+            try:
+                remote = self._head(client, url, cached)
+            except httpx.TransportError as e:
+                if cached:
+                    logger.warning(f"Could not revalidate {url}, using the cached copy: {e}")
+                    return str(paths["file"])
+                raise
+
+            if remote is None:
+                logger.debug(f"Cached copy of {url} is up to date")
+                return str(paths["file"])
+
+            try:
+                self._download(client, remote, paths, on_progress)
+            except _RemoteChanged:
+                logger.info(f"{url} changed during the download, starting over")
+                paths["state"].unlink(missing_ok=True)
+                remote = self._head(client, url, None)
+                self._download(client, remote, paths, on_progress)
+
+        os.replace(paths["part"], paths["file"])
+        remote.segments = []
+        remote.save(paths["meta"])
+        paths["state"].unlink(missing_ok=True)
+        return str(paths["file"])
+
+    def clear(self) -> None:
+        """Delete all cached and partial downloads."""
+        for entry in self.cache_dir.glob("*"):
+            if entry.is_file():
+                entry.unlink(missing_ok=True)
+
+    def _head(
+        self, client: httpx.Client, url: str, cached: Optional[_Remote]
+    ) -> Optional[_Remote]:
+        """
+        Describe the remote file, or return None if the cached copy is current.
+
+        Servers that do not answer HEAD are treated as serving a file of
+        unknown size without range support.
+        """
+        headers = {"Accept-Encoding": "identity"}
+        if cached and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+        response = client.head(url, headers=headers)
+        if response.status_code == 304:
+            return None
+        if response.is_error:
+            logger.debug(f"HEAD {url} returned {response.status_code}")
+            return _Remote(url=url)
+
+        length = response.headers.get("content-length")
+        remote = _Remote(
+            url=url,
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+            size=int(length) if length and length.isdigit() else None,
+            accepts_ranges=response.headers.get("accept-ranges", "").lower() == "bytes",
+        )
+        # Servers that ignore conditional headers still report the same validators
+        if cached and cached.same_version(remote):
+            return None
+        return remote
+
+    def _plan(self, remote: _Remote, paths: Dict[str, Path]) -> None:
+        """Resume the partial download of this version of the file, or start a new one."""
+        state = _Remote.load(paths["state"])
+        if (
+            state
+            and state.segments
+            and remote.accepts_ranges
+            and remote.validator
+            and state.same_version(remote)
+            and state.size == remote.size
+            and paths["part"].exists()
+        ):
+            remote.segments = state.segments
+            done = sum(segment.done for segment in remote.segments)
+            logger.info(f"Resuming download of {remote.url} at {done} bytes")
+            return
+
+        count = 1
+        if remote.accepts_ranges and remote.size and remote.size >= PARALLEL_MIN_BYTES:
+            count = self.segments
+        if remote.size is None:
+            remote.segments = [_Segment(0, None)]
+        else:
+            step = -(-remote.size // count)
+            remote.segments = [
+                _Segment(start, min(start + step, remote.size))
+                for start in range(0, remote.size, step)
+            ] or [_Segment(0, 0)]
+
+        with open(paths["part"], "wb") as f:
+            if remote.size:
+                # Segments write at their own offsets
+                f.truncate(remote.size)
+        remote.save(paths["state"])
+
+    def _download(
+        self,
+        client: httpx.Client,
+        remote: _Remote,
+        paths: Dict[str, Path],
+        on_progress: Optional[ProgressCallback],
+    ) -> None:
+        self._plan(remote, paths)
+        lock = threading.Lock()
+        last_save = time.monotonic()
+
+        def advance() -> None:
+            # Called under the lock after each chunk is written
+            nonlocal last_save
+            now = time.monotonic()
+            if now - last_save >= STATE_SAVE_INTERVAL:
+                remote.save(paths["state"])
+                last_save = now
+            if on_progress:
+                on_progress(sum(segment.done for segment in remote.segments), remote.size)
+
+        pending = [segment for segment in remote.segments if not segment.complete]
+        with lock:
+            advance()
+        try:
+            if len(pending) > 1:
+                with ThreadPoolExecutor(
+                    len(pending), thread_name_prefix="parrot-download"
+                ) as pool:
+                    futures = [
+                        pool.submit(
+                            self._fetch_segment, client, remote, segment, paths, lock, advance
+                        )
+                        for segment in pending
+                    ]
+                    for future in futures:
+                        future.result()
+            else:
+                for segment in pending:
+                    self._fetch_segment(client, remote, segment, paths, lock, advance)
+        finally:
+            with lock:
+                remote.save(paths["state"])
+
+        done = sum(segment.done for segment in remote.segments)
+        if not all(segment.complete for segment in remote.segments):
+            raise DownloadError(f"Downloaded only {done} of {remote.size} bytes of {remote.url}")
+
+    def _fetch_segment(
+        self,
+        client: httpx.Client,
+        remote: _Remote,
+        segment: _Segment,
+        paths: Dict[str, Path],
+        lock: threading.Lock,
+        advance: Callable[[], None],
+    ) -> None:
+        """Download one byte range, resuming after dropped connections and short bodies."""
+        for attempt in range(DOWNLOAD_RETRIES):
+            headers = {"Accept-Encoding": "identity"}
+            offset = segment.start + segment.done
+            ranged = remote.accepts_ranges and (offset > 0 or segment.end != remote.size)
+            if ranged:
+                end = "" if segment.end is None else segment.end - 1
+                headers["Range"] = f"bytes={offset}-{end}"
+                if remote.validator:
+                    headers["If-Range"] = remote.validator
+            else:
+                if segment.done:
+                    # Without ranges, a retry downloads the file again from the start
+                    with lock:
+                        segment.done = 0
+                    offset = 0
+                if remote.etag and not remote.etag.startswith("W/"):
+                    headers["If-Match"] = remote.etag
+
+            try:
+                with client.stream("GET", remote.url, headers=headers) as response:
+                    if response.status_code == 412:
+                        raise _RemoteChanged(f"{remote.url} no longer matches its ETag")
+                    response.raise_for_status()
+                    if ranged and response.status_code != 206:
+                        # The server ignores a range whose If-Range no longer matches
+                        raise _RemoteChanged(f"{remote.url} changed during the download")
+                    _check_response(remote, response, offset)
+
+                    with open(paths["part"], "r+b", buffering=0) as f:
+                        f.seek(offset)
+                        if segment.end is None:
+                            # Drop whatever an earlier attempt wrote past the offset
+                            f.truncate(offset)
+                        for chunk in response.iter_bytes(chunk_size=self.chunk_bytes):
+                            if segment.end is not None:
+                                chunk = chunk[: segment.end - segment.start - segment.done]
+                            f.write(chunk)
+                            with lock:
+                                segment.done += len(chunk)
+                                advance()
+                            if segment.complete:
+                                break
+
+                if segment.end is None:
+                    # Of a file of unknown size, a complete response is all of it
+                    with lock:
+                        segment.end = segment.start + segment.done
+                if segment.complete:
+                    return
+                expected = segment.end - segment.start
+                error = f"the response ended after {segment.done} of {expected} bytes"
+            except httpx.TransportError as e:
+                error = str(e)
+
+            if attempt == DOWNLOAD_RETRIES - 1:
+                raise DownloadError(f"Download of {remote.url} failed: {error}")
+            logger.debug(f"Download of {remote.url} interrupted, retrying: {error}")
+            time.sleep(RETRY_BACKOFF * 2**attempt)
+
+
+def _check_response(remote: _Remote, response: httpx.Response, offset: int) -> None:
+    """
+    Raise _RemoteChanged if a GET response is not the version of the file
+    that the download was planned for, by its validators and size.
+    """
+    etag = response.headers.get("etag")
+    if remote.etag and etag and etag.removeprefix("W/") != remote.etag.removeprefix("W/"):
+        raise _RemoteChanged(f"{remote.url} changed: ETag {etag}, expected {remote.etag}")
+    last_modified = response.headers.get("last-modified")
+    if not remote.etag and remote.last_modified and last_modified != remote.last_modified:
+        raise _RemoteChanged(f"{remote.url} changed: modified {last_modified}")
+
+    if response.status_code == 206:
+        # Content-Range: bytes <first>-<last>/<size>
+        content_range = response.headers.get("content-range", "")
+        match = re.fullmatch(r"bytes (\d+)-\d+/(\d+|\*)", content_range)
+        if not match or int(match[1]) != offset:
+            raise _RemoteChanged(f"{remote.url} returned an unexpected range")
+        size = None if match[2] == "*" else int(match[2])
+    else:
+        length = response.headers.get("content-length")
+        size = int(length) if length and length.isdigit() else None
+    if remote.size is not None and size is not None and size != remote.size:
+        raise _RemoteChanged(f"{remote.url} changed: {size} bytes, expected {remote.size}")
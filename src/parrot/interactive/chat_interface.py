@@ -1,4 +1,5 @@
 from parrot.rag.storage.db import SessionLocal
+from parrot.db.repositories.answer_cache_repository import AnswerCacheRepository
 from parrot.db.repositories.chat_repository import ChatRepository
 from dataclasses import dataclass
 from enum import Enum
@@ -8,7 +9,9 @@ import typer
 from phi.agent import Agent
 from prompt_toolkit.formatted_text import FormattedText
 from rich.console import Console
+from rich.live import Live
 from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.spinner import Spinner
 from rich.style import Style
 from rich.text import Text
 
@@ -18,13 +21,20 @@ from parrot.interactive.commands import (
     QuitCommand,
     HelpCommand,
     ExportCommand,
+    HistoryCommand,
+    SearchCommand,
     CommandResult,
     CommandResponse,
 )
 from parrot.interactive.input_prompt import InputPrompt
-from parrot.interactive.listeners import ChatEventListener, ChatMessageDBSaveListener
+from parrot.interactive.listeners import (
+    ChatEventListener,
+    ChatMessageWriteBehindListener,
+    ChatPersistenceError,
+)
 from parrot.interactive.message_processors import (
     AgentMessageProcessor,
+    CachingMessageProcessor,
     MessageProcessor,
 )
 
@@ -43,9 +53,18 @@ class ChatContext:
 
 
 class ChatInterface:
-    def __init__(self):
+    def __init__(self, streaming: bool = True, scrollback: Optional[int] = None):
+        """
+        Args:
+            streaming: Render answers token by token as they are generated
+            scrollback: If set, redraw the screen after every turn with only
+                the last `scrollback` messages instead of appending new ones
+        """
 
         self.db = SessionLocal()
+        self.streaming = streaming
+        self.scrollback = scrollback
+        self._rendered_count = 0
 
         self.console = Console()
         self.chat_styler = StyledChatResponse(self.console)
@@ -57,13 +76,14 @@ class ChatInterface:
         self.chat_repo = ChatRepository(self.db)
         self.session = self.chat_repo.create_session(None)
 
-        self.listeners: list[ChatEventListener] = [
-            ChatMessageDBSaveListener(repo=self.chat_repo)
-        ]
+        self.message_writer = ChatMessageWriteBehindListener(SessionLocal)
+        self.listeners: list[ChatEventListener] = [self.message_writer]
         self.commands = {
             "/q": QuitCommand(),
             "/?": HelpCommand(),
             "/export": ExportCommand(),
+            "/history": HistoryCommand(),
+            "/search": SearchCommand(),
         }
 
     def set_message_processor(self, processor: MessageProcessor) -> None:
@@ -77,7 +97,29 @@ class ChatInterface:
 
     def notify_message_added(self, message: Message) -> None:
         for listener in self.listeners:
-            listener.on_message_added(message, self.session.id)
+            try:
+                listener.on_message_added(message, self.session.id)
+            except ChatPersistenceError as e:
+                self._warn_unsaved(e)
+
+    def flush_listeners(self) -> None:
+        """Wait until listeners have processed every message added so far."""
+        for listener in self.listeners:
+            try:
+                listener.flush()
+            except ChatPersistenceError as e:
+                self._warn_unsaved(e)
+
+    def _warn_unsaved(self, error: Exception) -> None:
+        self.console.print(
+            f"[yellow]Chat history is not being saved: {error}. "
+            f"Unsaved messages are kept and retried.[/]"
+        )
+
+    def _check_message_writer(self) -> None:
+        """Warn, after a turn, when the background writer could not save messages."""
+        if self.message_writer.error:
+            self._warn_unsaved(self.message_writer.error)
 
     def add_message(self, message: str, sender: str) -> None:
         styled_message = self.chat_styler.create_message_text(message, sender)
@@ -104,6 +146,30 @@ class ChatInterface:
             self.add_message(error_message, "Error")
             return error_message
 
+    def stream_query(self, query: str, live: Live) -> str:
+        """
+        Stream the answer to a query into a Rich Live display. The complete
+        answer is added to the chat (and persisted) once streaming finishes.
+        """
+        if not self.message_processor:
+            raise ValueError("Message processor not set")
+
+        self.context.state = ChatState.PROCESSING
+        try:
+            response = ""
+            for chunk in self.message_processor.stream(query):
+                response += chunk
+                live.update(self.chat_styler.create_message_text(response, "Parrot"))
+            self.context.state = ChatState.IDLE
+            self.add_message(response, "Parrot")
+            return response
+        except Exception as e:
+            self.context.state = ChatState.ERROR
+            self.context.last_error = str(e)
+            error_message = f"Error processing query: {str(e)}"
+            self.add_message(error_message, "Error")
+            return error_message
+
     def handle_command(self, cmd: str) -> CommandResponse:
         command_type = next(
             (cmd_type for cmd_type in self.commands.keys() if cmd.startswith(cmd_type)),
@@ -111,12 +177,17 @@ class ChatInterface:
         )
 
         if command_type:
-            return self.commands[command_type].execute(self)
+            args = cmd[len(command_type):].strip()
+            return self.commands[command_type].execute(self, args)
 
         return CommandResponse(CommandResult.CONTINUE)
 
     def run(self, agent: Agent) -> None:
-        self.set_message_processor(AgentMessageProcessor(agent))
+        self.set_message_processor(
+            CachingMessageProcessor(
+                AgentMessageProcessor(agent), agent, AnswerCacheRepository(self.db)
+            )
+        )
 
         while True:
             try:
@@ -142,14 +213,23 @@ class ChatInterface:
                     case CommandResult.CONTINUE:
                         self.add_message(user_query, "You")
                         self._process_with_progress(user_query)
-                        self.render_chat_history()
+                        self.render_new_messages()
+                        self._check_message_writer()
 
             except KeyboardInterrupt:
                 break
 
+        try:
+            self.message_writer.close()
+        except ChatPersistenceError as e:
+            self.console.print(f"[bold red]Chat messages were lost: {e}[/]")
         self._display_farewell()
 
     def _process_with_progress(self, query: str) -> None:
+        if self.streaming:
+            self._process_with_live(query)
+            return
+
         with Progress(
             SpinnerColumn(style="dots2"),
             TextColumn(
@@ -161,12 +241,36 @@ class ChatInterface:
             progress.add_task(description="Processing...", total=None)
             self.process_query(query)
 
+    def _process_with_live(self, query: str) -> None:
+        spinner = Spinner(
+            "dots2",
+            text=Text("Processing...", style=Style(color=typer.colors.WHITE, italic=True)),
+        )
+        with Live(spinner, console=self.console, transient=True, refresh_per_second=12) as live:
+            self.stream_query(query, live)
+
     def _display_farewell(self) -> None:
         self.console.print("[bold red]Goodbye! 👋[/]")
 
-    def render_chat_history(self) -> None:
-        for message in self.chat_history:
+    def render_new_messages(self) -> None:
+        """Print the messages added since the last render."""
+        if self.scrollback is not None:
+            self.console.clear()
+            self.render_chat_history(self.scrollback)
+            return
+
+        for message in self.chat_history[self._rendered_count:]:
+            self.console.print(message.styled_content)
+        self._rendered_count = len(self.chat_history)
+
+    def render_chat_history(self, limit: Optional[int] = None) -> None:
+        """Print the whole chat history, or only its last `limit` messages."""
+        messages = self.chat_history.get_messages()
+        if limit is not None:
+            messages = messages[-limit:] if limit > 0 else []
+        for message in messages:
             self.console.print(message.styled_content)
+        self._rendered_count = len(self.chat_history)
 
     def display_message(self, message: Text) -> None:
         self.console.print(message)
@@ -1,3 +1,5 @@
+import math
+import re
 from abc import abstractmethod, ABC
 from dataclasses import dataclass
 from enum import auto, Enum
@@ -9,6 +11,9 @@ from parrot.exporter import Exporter
 from parrot.interactive.help.help_display import HelpDisplay
 from parrot.prompter import ExportPrompter
 
+HISTORY_PAGE_SIZE = 20
+SEARCH_RESULT_LIMIT = 20
+
 
 class CommandResult(Enum):
     CONTINUE = auto()  # Continue processing
@@ -24,26 +29,119 @@ class CommandResponse:
 
 class Command(ABC):
     @abstractmethod
-    def execute(self, interface: 'ChatInterface') -> CommandResponse:
+    def execute(self, interface: 'ChatInterface', args: str = "") -> CommandResponse:
         pass
 
 
 class QuitCommand(Command):
-    def execute(self, interface: 'ChatInterface') -> CommandResponse:
+    def execute(self, interface: 'ChatInterface', args: str = "") -> CommandResponse:
         return CommandResponse(CommandResult.STOP)
 
 
 class HelpCommand(Command):
-    def execute(self, interface: 'ChatInterface') -> CommandResponse:
+    def execute(self, interface: 'ChatInterface', args: str = "") -> CommandResponse:
         help_display = HelpDisplay(interface.console)
         help_display.display_help()
         return CommandResponse(CommandResult.SKIP)
 
 
 class ExportCommand(Command):
-    def execute(self, interface: 'ChatInterface') -> CommandResponse:
+    def execute(self, interface: 'ChatInterface', args: str = "") -> CommandResponse:
         export_type, file_path = ExportPrompter().prompt()
         exporter = Exporter(interface.chat_history)
         exporter.export(export_type, file_path)
         interface.display_message(Text("Export completed.", style="italic dim"))
-        return CommandResponse(CommandResult.SKIP)
\ No newline at end of file
+        return CommandResponse(CommandResult.SKIP)
+
+
+class HistoryCommand(Command):
+    """
+    Page through older messages of the current session, read from the DB.
+
+    `/history` shows the next older page on every call, `/history N` jumps to
+    page N (1 is the newest page).
+    """
+
+    def __init__(self, page_size: int = HISTORY_PAGE_SIZE):
+        self.page_size = page_size
+        self.next_page = 1
+        # First sequence number of the last page shown
+        self.cursor: Optional[int] = None
+
+    def execute(self, interface: 'ChatInterface', args: str = "") -> CommandResponse:
+        # Messages are saved in the background, make sure the latest are stored
+        interface.flush_listeners()
+        total = interface.chat_repo.count_session_messages(interface.session.id)
+        pages = max(1, math.ceil(total / self.page_size))
+
+        page, before_sequence = self.next_page, self.cursor
+        if args:
+            if not args.isdigit() or int(args) < 1:
+                interface.display_message(Text("Usage: /history [page]", style="italic dim"))
+                return CommandResponse(CommandResult.SKIP)
+            page = int(args)
+            # Sequences are contiguous, so a page can be located without an OFFSET scan
+            last_sequence = interface.chat_repo.get_last_sequence(interface.session.id)
+            before_sequence = last_sequence - (page - 1) * self.page_size + 1
+
+        if page > pages:
+            interface.display_message(Text("No older messages.", style="italic dim"))
+            self.next_page, self.cursor = 1, None
+            return CommandResponse(CommandResult.SKIP)
+
+        messages = interface.chat_repo.get_message_page(
+            interface.session.id, limit=self.page_size, before_sequence=before_sequence
+        )
+        interface.display_message(
+            Text(f"History page {page} of {pages} ({total} messages)", style="italic dim")
+        )
+        for message in messages:
+            interface.display_message(
+                interface.chat_styler.create_message_text(message.raw_content, message.sender)
+            )
+
+        if page < pages and messages:
+            self.next_page, self.cursor = page + 1, messages[0].sequence
+        else:
+            self.next_page, self.cursor = 1, None
+        return CommandResponse(CommandResult.SKIP)
+
+
+class SearchCommand(Command):
+    """Full-text search over the messages of all chat sessions."""
+
+    # Control characters cannot appear in the markup-free message text
+    _HIGHLIGHT = ("\x02", "\x03")
+
+    def __init__(self, limit: int = SEARCH_RESULT_LIMIT):
+        self.limit = limit
+
+    def execute(self, interface: 'ChatInterface', args: str = "") -> CommandResponse:
+        if not args:
+            interface.display_message(Text("Usage: /search <words>", style="italic dim"))
+            return CommandResponse(CommandResult.SKIP)
+
+        interface.flush_listeners()
+        hits = interface.chat_repo.search_messages(
+            args, limit=self.limit, highlight=self._HIGHLIGHT
+        )
+        if not hits:
+            interface.display_message(Text("No matching messages.", style="italic dim"))
+            return CommandResponse(CommandResult.SKIP)
+
+        for hit in hits:
+            line = Text(
+                f"{hit.message.created_at:%Y-%m-%d %H:%M} {hit.message.sender}: ",
+                style="dim",
+            )
+            line.append(self._highlight(hit.snippet))
+            interface.display_message(line)
+
+        return CommandResponse(CommandResult.SKIP)
+
+    def _highlight(self, snippet: str) -> Text:
+        start, end = self._HIGHLIGHT
+        text = Text()
+        for index, part in enumerate(re.split(f"[{start}{end}]", snippet)):
+            text.append(part, style="bold yellow" if index % 2 else None)
+        return text
@@ -25,6 +25,16 @@ class HelpContent:
                 description="Export the current chat history to a file",
                 example="/export"
             ),
+            CommandInfo(
+                command="/history",
+                description="Page through older messages of this chat",
+                example="/history 2"
+            ),
+            CommandInfo(
+                command="/search",
+                description="Search past messages of all chats",
+                example="/search churn"
+            ),
             CommandInfo(
                 command="/?",
                 description="Display this help message",
@@ -1,10 +1,29 @@
 # Observer Pattern for Chat Events
 from parrot.db.repositories.chat_repository import ChatRepository
+import atexit
+import queue
+import threading
+import time
 import uuid
-from typing import Protocol
+from datetime import datetime
+from typing import Callable, List, Optional, Protocol
+
+from phi.utils.log import logger
+from sqlalchemy.orm import Session
 
 from parrot.data_models import Message
 
+WRITE_BATCH_SIZE = 64
+WRITE_FLUSH_INTERVAL_SECONDS = 0.5
+WRITE_MAX_PENDING = 1000
+WRITE_RETRIES = 3
+# Seconds between attempts to save messages whose batch failed
+WRITE_RETRY_INTERVAL_SECONDS = 5.0
+# Seconds flush() and close() wait for the writer thread
+WRITE_WAIT_TIMEOUT_SECONDS = 10.0
+
+_STOP = object()
+
 
 class ChatEventListener(Protocol):
     def __init__(self, repo: ChatRepository):
@@ -16,6 +35,9 @@ class ChatEventListener(Protocol):
     def on_chat_cleared(self) -> None:
         pass
 
+    def flush(self) -> None:
+        pass
+
 
 class ChatMessageDBSaveListener:
     def __init__(self, repo: ChatRepository):
@@ -30,3 +52,237 @@ class ChatMessageDBSaveListener:
 
     def on_chat_cleared(self) -> None:
         pass
+
+    def flush(self) -> None:
+        pass
+
+
+class ChatPersistenceError(RuntimeError):
+    """Chat messages could not be saved; they are kept and retried."""
+
+
+class ChatMessageWriteBehindListener:
+    """
+    Persists chat messages on a background thread.
+
+    Messages are queued on the UI thread and written by a single writer thread
+    in batches of up to `batch_size`, one transaction per batch. The queue is
+    bounded: when the writer falls `max_pending` messages behind, adding a
+    message blocks until there is room again. Ids and timestamps are assigned
+    when a message is queued, so the stored order matches the chat order.
+
+    No message is dropped. A batch that still fails after `retries` attempts
+    is kept, in order, and retried every WRITE_RETRY_INTERVAL_SECONDS along
+    with the messages that follow it; `error` holds the last failure. If the
+    writer thread is gone, messages are written synchronously instead.
+    `flush()` and `close()` wait a bounded time for the writer and raise
+    ChatPersistenceError when messages remain unsaved. `close()` also runs at
+    interpreter exit and writes whatever the writer left synchronously.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        batch_size: int = WRITE_BATCH_SIZE,
+        flush_interval: float = WRITE_FLUSH_INTERVAL_SECONDS,
+        max_pending: int = WRITE_MAX_PENDING,
+        retries: int = WRITE_RETRIES,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        # Last failure to save messages, cleared once they are saved
+        self.error: Optional[Exception] = None
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        # Messages taken from the queue whose write failed, oldest first
+        self._unsaved: List[dict] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="chat-message-writer", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def unsaved_count(self) -> int:
+        """Messages added but not stored yet."""
+        return self._queue.unfinished_tasks + len(self._unsaved)
+
+    def on_message_added(self, message: Message, session_id: uuid.UUID) -> None:
+        if self._closed:
+            raise RuntimeError("Chat message writer is closed")
+
+        item = {
+            "id": str(uuid.uuid4()),
+            "session_id": str(session_id),
+            "sender": message.sender,
+            "raw_content": message.raw_content,
+            "created_at": datetime.now(),
+        }
+        if not self._thread.is_alive():
+            with self._lock:
+                self._unsaved.append(item)
+            self._write_now()
+            return
+        self._queue.put(item)
+
+    def on_chat_cleared(self) -> None:
+        pass
+
+    def flush(self, timeout: float = WRITE_WAIT_TIMEOUT_SECONDS) -> None:
+        """
+        Wait until every message added so far is stored.
+
+        Raises:
+            ChatPersistenceError: If messages are still unsaved after `timeout` seconds
+        """
+        if self._closed:
+            return
+
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            # Unsaved messages are retried without notifying, so poll as well
+            while self.unsaved_count and self._thread.is_alive():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._queue.all_tasks_done.wait(min(remaining, 0.1))
+
+        if not self._thread.is_alive():
+            self._write_now()
+        elif self.unsaved_count:
+            raise ChatPersistenceError(
+                f"{self.unsaved_count} chat messages are not saved yet"
+                + (f": {self.error}" if self.error else "")
+            )
+
+    def close(self) -> None:
+        """
+        Write the pending messages and stop the writer thread.
+
+        Raises:
+            ChatPersistenceError: If messages could not be saved
+        """
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+
+        # A full queue drains while the writer lives; a dead writer takes nothing
+        while self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self._thread.join(WRITE_WAIT_TIMEOUT_SECONDS)
+
+        if self._thread.is_alive():
+            raise ChatPersistenceError(
+                f"Chat message writer did not finish; {self.unsaved_count} messages "
+                f"may be unsaved"
+            )
+        self._write_now()
+
+    def _run(self) -> None:
+        db = self.session_factory()
+        repo = ChatRepository(db)
+        try:
+            while True:
+                batch, stop = self._next_batch()
+                if batch or self._unsaved:
+                    self._save(repo, batch)
+                for _ in range(len(batch) + stop):
+                    self._queue.task_done()
+                if stop:
+                    return
+        finally:
+            db.close()
+
+    def _next_batch(self) -> tuple[List[dict], bool]:
+        # Wake up to retry unsaved messages even when nothing new arrives
+        try:
+            item = self._queue.get(
+                timeout=WRITE_RETRY_INTERVAL_SECONDS if self._unsaved else None
+            )
+        except queue.Empty:
+            return [], False
+        if item is _STOP:
+            return [], True
+
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+
+        return batch, False
+
+    def _save(self, repo: ChatRepository, batch: List[dict]) -> None:
+        """Write earlier unsaved messages and the batch, keeping them all if it fails."""
+        with self._lock:
+            self._unsaved.extend(batch)
+            pending = list(self._unsaved)
+        try:
+            self._write(repo, pending)
+        except Exception as e:
+            self.error = e
+            logger.error(f"Could not save {len(pending)} chat messages, retrying later: {e}")
+            return
+
+        with self._lock:
+            del self._unsaved[: len(pending)]
+        self.error = None
+
+    def _write_now(self) -> None:
+        """Write the unsaved and queued messages on the calling thread."""
+        with self._lock:
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _STOP:
+                    self._unsaved.append(item)
+                self._queue.task_done()
+            pending = list(self._unsaved)
+        if not pending:
+            return
+
+        with self.session_factory() as db:
+            try:
+                self._write(ChatRepository(db), pending)
+            except Exception as e:
+                self.error = e
+                raise ChatPersistenceError(
+                    f"Could not save {len(pending)} chat messages: {e}"
+                ) from e
+
+        with self._lock:
+            del self._unsaved[: len(pending)]
+        self.error = None
+
+    def _write(self, repo: ChatRepository, batch: List[dict]) -> None:
+        for attempt in range(1, self.retries + 1):
+            try:
+                repo.add_messages(batch)
+                return
+            except Exception as e:
+                repo.db.rollback()
+                logger.warning(
+                    f"Saving {len(batch)} chat messages failed (attempt {attempt}): {e}"
+                )
+                if attempt == self.retries:
+                    raise
+                time.sleep(0.1 * attempt)
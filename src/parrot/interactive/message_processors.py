@@ -1,4 +1,19 @@
-from typing import Protocol
+import hashlib
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Iterator, Protocol
+
+from parrot.db.repositories.answer_cache_repository import AnswerCacheRepository
+
+ANSWER_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+ANSWER_CACHE_MAX_ENTRIES = 1000
+
+ERROR_PREFIX = "Error processing query: "
+
+# (key, normalized question, model, source, fingerprint)
+CacheKey = tuple[str, str, str, str, str]
 
 
 # Strategy Pattern for Message Processing
@@ -6,6 +21,9 @@ class MessageProcessor(Protocol):
     def process(self, query: str) -> str | None:
         pass
 
+    def stream(self, query: str) -> Iterator[str]:
+        pass
+
 
 class AgentMessageProcessor(MessageProcessor):
     def __init__(self, agent):
@@ -16,4 +34,110 @@ class AgentMessageProcessor(MessageProcessor):
             result = self.agent.run(query)
             return result.content if hasattr(result, "content") else str(result)
         except Exception as e:
-            return f"Error processing query: {str(e)}"
+            return f"{ERROR_PREFIX}{str(e)}"
+
+    def stream(self, query: str) -> Iterator[str]:
+        try:
+            if hasattr(self.agent, "stream"):
+                yield from self.agent.stream(query)
+            else:
+                yield self.process(query)
+        except Exception as e:
+            yield f"{ERROR_PREFIX}{str(e)}"
+
+
+def normalize_question(question: str) -> str:
+    """Normalize case, unicode forms, whitespace and trailing punctuation of a question."""
+    question = unicodedata.normalize("NFKC", question).casefold()
+    question = re.sub(r"\s+", " ", question).strip()
+    return question.rstrip(" ?!.")
+
+
+# Decorator Pattern over any MessageProcessor
+class CachingMessageProcessor(MessageProcessor):
+    """
+    Answers repeated questions from the local answer cache.
+
+    Answers are keyed by the normalized question, the model, the data source
+    and a fingerprint of the source's current data, so a cached answer is
+    only reused while the data it was computed from is unchanged. Entries
+    expire after `ttl_seconds` and the least recently used are evicted
+    beyond `max_entries`. Misses, agents without a source identity and
+    sources whose data changes cannot be detected go straight to the wrapped
+    processor.
+    """
+
+    def __init__(
+        self,
+        processor: MessageProcessor,
+        agent,
+        repo: AnswerCacheRepository,
+        ttl_seconds: int = ANSWER_CACHE_TTL_SECONDS,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+    ):
+        self.processor = processor
+        self.agent = agent
+        self.repo = repo
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_entries = max_entries
+
+    def _cache_key(self, query: str) -> CacheKey | None:
+        source = (
+            self.agent.source_identity() if hasattr(self.agent, "source_identity") else None
+        )
+        if source is None:
+            return None
+
+        fingerprint = self.agent.data_fingerprint()
+        if fingerprint is None:
+            return None
+
+        question = normalize_question(query)
+        model = str(getattr(self.agent.model, "id", self.agent.model))
+        key = hashlib.sha256(
+            "\0".join([question, model, source, fingerprint]).encode()
+        ).hexdigest()
+        return key, question, model, source, fingerprint
+
+    def _lookup(self, cache_key: CacheKey) -> str | None:
+        cached = self.repo.get(cache_key[0], created_after=datetime.now() - self.ttl)
+        return cached.answer if cached is not None else None
+
+    def _store(self, cache_key: CacheKey, answer: str | None) -> None:
+        if answer and not answer.startswith(ERROR_PREFIX):
+            self.repo.put(*cache_key, answer)
+            self.repo.evict(datetime.now() - self.ttl, self.max_entries)
+
+    def process(self, query: str) -> str | None:
+        cache_key = self._cache_key(query)
+        if cache_key is None:
+            return self.processor.process(query)
+
+        answer = self._lookup(cache_key)
+        if answer is None:
+            answer = self.processor.process(query)
+            self._store(cache_key, answer)
+
+        return answer
+
+    def stream(self, query: str) -> Iterator[str]:
+        cache_key = self._cache_key(query)
+        if cache_key is None:
+            yield from self.processor.stream(query)
+            return
+
+        answer = self._lookup(cache_key)
+        if answer is not None:
+            yield answer
+            return
+
+        chunks = []
+        failed = False
+        for chunk in self.processor.stream(query):
+            # An error can follow partial output, which must not be cached
+            failed = failed or chunk.startswith(ERROR_PREFIX)
+            chunks.append(chunk)
+            yield chunk
+
+        if not failed:
+            self._store(cache_key, "".join(chunks))
@@ -1,8 +1,7 @@
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from phi.model.base import Model
-from phi.model.groq import Groq
-from phi.model.ollama import Ollama
+if TYPE_CHECKING:
+    from phi.model.base import Model
 
 
 class LLMModelLoader:
@@ -11,10 +10,15 @@ class LLMModelLoader:
     """
 
     @staticmethod
-    def load(provider: str, model_name: str, api_key: str) -> Model:
+    def load(provider: str, model_name: str, api_key: str) -> "Model":
+        # Each provider's client library is imported only when it is used
         if provider.lower() == "groq":
+            from phi.model.groq import Groq
+
             return Groq(id=model_name, api_key=api_key)
         elif provider.lower() == "ollama":
+            from phi.model.ollama import Ollama
+
             return Ollama(id=model_name)
         else:
             raise ValueError(f"Unsupported model: {provider}")
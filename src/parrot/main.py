@@ -1,12 +1,11 @@
-from parrot.rag.storage.bootstrap import init_db
 import os
 from typing import Optional
 
 import typer
 from rich.console import Console
 
+from parrot.batch import DEFAULT_CONCURRENCY, run_batch
 from parrot.config import Config, ProviderConfig
-from parrot.parrot import Parrot
 from rich.text import Text
 from rich.align import Align
 from rich.table import Table
@@ -65,6 +64,21 @@ def main(
     model_config: Optional[bool] = typer.Option(
         False, help="Model to use (e.g., gtp-40, sonet 3.5)"
     ),
+    batch: Optional[str] = typer.Option(
+        None, help="Answer the questions of this JSON Lines file without prompting"
+    ),
+    source: Optional[str] = typer.Option(
+        None, help="Batch data source: SQLAlchemy URL, CSV file, or Parquet file or directory"
+    ),
+    output: str = typer.Option(
+        "answers.jsonl", help="Batch output file, .jsonl or .parquet"
+    ),
+    concurrency: int = typer.Option(
+        DEFAULT_CONCURRENCY, min=1, help="Batch questions answered at the same time"
+    ),
+    rate: Optional[float] = typer.Option(
+        None, help="Batch questions started per minute (default per provider, 0 for no limit)"
+    ),
 ):
     """
     Parrot: SQL Query Agent with Natural Language Interface
@@ -72,8 +86,6 @@ def main(
     console = Console()
     config = Config()
 
-    init_db()
-
     if model_config:
         provider_config = config.prompt()
     else:
@@ -83,8 +95,27 @@ def main(
         except FileNotFoundError:
             provider_config = config.prompt()
 
+    if batch:
+        if not source:
+            raise typer.BadParameter("--source is required with --batch")
+        from parrot.rag.storage.bootstrap import init_db
+
+        init_db()
+        try:
+            run_batch(provider_config, batch, source, output, concurrency, rate)
+        except Exception as e:
+            console.print(f"[bold red]Error: {e}[/]")
+            raise typer.Abort()
+        return
+
     try:
         display_banner(console, provider_config)
+
+        # The database and the agents' libraries are loaded once the banner is up
+        from parrot.parrot import Parrot
+        from parrot.rag.storage.bootstrap import init_db
+
+        init_db()
         parrot = Parrot(provider_config)
 
         parrot.run()
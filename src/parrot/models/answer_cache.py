@@ -0,0 +1,27 @@
+from datetime import datetime
+from sqlalchemy import String, DateTime, Integer, Text, Index, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from parrot.db.base_model import Base
+
+
+class CachedAnswer(Base):
+    """An answer given by an agent, reusable while the source data is unchanged."""
+
+    __tablename__ = "answer_cache"
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    question: Mapped[str] = mapped_column(Text, nullable=False)
+    model: Mapped[str] = mapped_column(String, nullable=False)
+    source: Mapped[str] = mapped_column(String, nullable=False)
+    fingerprint: Mapped[str] = mapped_column(String, nullable=False)
+    answer: Mapped[str] = mapped_column(Text, nullable=False)
+    hit_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False), nullable=False, server_default=func.now()
+    )
+    last_accessed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False), nullable=False, server_default=func.now()
+    )
+
+    __table_args__ = (Index("idx_answer_cache_last_accessed", "last_accessed_at"),)
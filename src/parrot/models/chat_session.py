@@ -5,6 +5,8 @@ from sqlalchemy import (
     DateTime,
     Text,
     ForeignKey,
+    Index,
+    Integer,
     func,
     UniqueConstraint,
     Uuid,
@@ -34,9 +36,11 @@ class ChatSession(Base):
     messages: Mapped[List["ChatMessage"]] = relationship(
         back_populates="session",
         cascade="all, delete-orphan",
-        order_by="ChatMessage.created_at",
+        order_by="ChatMessage.sequence",
     )
 
+    __table_args__ = (Index("idx_chat_sessions_updated", "updated_at", "id"),)
+
 
 class ChatMessage(Base):
     """Individual message within a chat session."""
@@ -47,6 +51,8 @@ class ChatMessage(Base):
     session_id: Mapped[str] = mapped_column(
         String, ForeignKey("chat_sessions.id", ondelete="CASCADE"), nullable=False
     )
+    # Position of the message in its session, starting at 1
+    sequence: Mapped[int] = mapped_column(Integer, nullable=False)
     sender: Mapped[str] = mapped_column(String, nullable=False)
     raw_content: Mapped[str] = mapped_column(Text, nullable=False)
     created_at: Mapped[datetime] = mapped_column(
@@ -57,6 +63,7 @@ class ChatMessage(Base):
 
     __table_args__ = (
         UniqueConstraint(
-            "session_id", "created_at", name="uq_chat_messages_session_sequence"
+            "session_id", "sequence", name="uq_chat_messages_session_sequence"
         ),
+        Index("idx_chat_messages_session_created", "session_id", "created_at"),
     )
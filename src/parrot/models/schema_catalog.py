@@ -0,0 +1,89 @@
+from datetime import datetime
+from typing import Optional, List
+from sqlalchemy import (
+    Boolean,
+    String,
+    DateTime,
+    Integer,
+    Text,
+    ForeignKey,
+    Index,
+    func,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from parrot.db.base_model import Base
+
+
+class CatalogSource(Base):
+    """A SQL data source whose schema has been catalogued."""
+
+    __tablename__ = "catalog_sources"
+
+    source_key: Mapped[str] = mapped_column(String, primary_key=True)
+    dialect: Mapped[str] = mapped_column(String, nullable=False)
+    signature: Mapped[str] = mapped_column(String, nullable=False)
+    checked_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False), nullable=False, server_default=func.now()
+    )
+
+
+class CatalogTable(Base):
+    """A table or view discovered in a SQL data source."""
+
+    __tablename__ = "catalog_tables"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    source_key: Mapped[str] = mapped_column(String, nullable=False)
+    schema_name: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    name: Mapped[str] = mapped_column(String, nullable=False)
+    comment: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    row_estimate: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    signature: Mapped[str] = mapped_column(String, nullable=False)
+    refreshed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+    columns: Mapped[List["CatalogColumn"]] = relationship(
+        back_populates="table",
+        cascade="all, delete-orphan",
+        order_by="CatalogColumn.ordinal",
+        lazy="selectin",
+    )
+
+    __table_args__ = (
+        UniqueConstraint(
+            "source_key", "schema_name", "name", name="uq_catalog_tables_source_name"
+        ),
+        Index("idx_catalog_tables_source", "source_key"),
+    )
+
+    @property
+    def qualified_name(self) -> str:
+        return f"{self.schema_name}.{self.name}" if self.schema_name else self.name
+
+
+class CatalogColumn(Base):
+    """A column of a catalogued table, including its foreign key target if any."""
+
+    __tablename__ = "catalog_columns"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    table_id: Mapped[str] = mapped_column(
+        String, ForeignKey("catalog_tables.id", ondelete="CASCADE"), nullable=False
+    )
+    name: Mapped[str] = mapped_column(String, nullable=False)
+    data_type: Mapped[str] = mapped_column(String, nullable=False)
+    nullable: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+    ordinal: Mapped[int] = mapped_column(Integer, nullable=False)
+    comment: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    fk_table: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    fk_column: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+
+    table: Mapped["CatalogTable"] = relationship(back_populates="columns")
+
+    __table_args__ = (Index("idx_catalog_columns_table", "table_id"),)
@@ -1,15 +1,32 @@
 import sys
+from typing import TYPE_CHECKING, Optional
+
+from rich.console import Console
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn
+
 from parrot.agents.factory import AgentsFactory
-from parrot.config import ProviderConfig
+from parrot.config import ProviderConfig, ollama_host
 from parrot.llm_loader import LLMModelLoader
-from parrot.prompter import ConnectionPrompter, DataSourcePrompter, MainMenuPrompter
-from parrot.interactive.chat_interface import ChatInterface
+from parrot.prompter import (
+    ConnectionPrompter,
+    DataSourcePrompter,
+    IngestPrompter,
+    MainMenuPrompter,
+)
+from parrot.rag.storage.db import SessionLocal
+
+if TYPE_CHECKING:
+    from parrot.rag.embeddings import Embedder
+    from parrot.rag.vector_store import VectorStore
 
 
 class Parrot:
     """
     Main class for the Parrot application, implementing the Facade design pattern to
     abstract interaction with models and agents.
+
+    The chat interface, the agents and the document pipeline are imported by
+    the menu action that uses them, so the menu appears without loading them.
     """
 
     def __init__(self, config: ProviderConfig):
@@ -22,6 +39,9 @@ class Parrot:
         """
         Initialize the agent based on the data source type.
         """
+        from parrot.agents.tools import ChunkSearchTools
+        from parrot.rag.retriever import load_retriever
+
         self.data_source_type = DataSourcePrompter().prompt()
 
         model = LLMModelLoader.load(
@@ -34,6 +54,86 @@ class Parrot:
 
         self.agent = AgentsFactory().create(model, conn_details)
 
+        # Let the agent search ingested documents once there are any
+        retriever = load_retriever(SessionLocal, ollama_host(self.config))
+        if retriever:
+            self.agent.add_tools(ChunkSearchTools(retriever))
+
+    def _embedder(self, store: "VectorStore") -> Optional["Embedder"]:
+        """
+        Embedder of the existing vectors, or of the configured Ollama server.
+        None when neither exists; documents are then searched by keyword only.
+        """
+        from parrot.db.repositories.chunk_repository import ChunkRepository
+        from parrot.rag.embeddings import OllamaEmbedder, is_hash_embedder, load_embedder
+
+        host = ollama_host(self.config)
+        if store.model and not is_hash_embedder(store.model):
+            return load_embedder(store.model, host=host)
+        if self.config.provider.lower() != "ollama":
+            return None
+
+        if store.model:
+            # Replace vectors of the test-only hash embedder with real ones
+            store.reset()
+            with SessionLocal() as db:
+                ChunkRepository(db).clear_vector_rows()
+        return OllamaEmbedder(host=host)
+
+    def ingest(self):
+        """
+        Queue the files chosen by the user, then ingest and embed everything queued.
+        """
+        from parrot.rag.embedding_service import EmbeddingService
+        from parrot.rag.ingestion_service import IngestionService
+        from parrot.rag.vector_store import VectorStore
+
+        console = Console()
+        store = VectorStore()
+        embedder = self._embedder(store)
+        embedding = EmbeddingService(embedder, store, SessionLocal) if embedder else None
+        service = IngestionService(SessionLocal, embedding=embedding)
+        scan = service.enqueue(IngestPrompter().prompt())
+        console.print(
+            f"[dim]Queued {scan.queued} files, {scan.skipped} unchanged, "
+            f"{scan.deleted} removed, {scan.unsupported} skipped as neither text nor a "
+            "supported format.[/]"
+        )
+
+        with Progress(
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            MofNCompleteColumn(),
+            TextColumn("{task.fields[chunks]} chunks"),
+            console=console,
+        ) as progress:
+            task = progress.add_task("Ingesting", total=None, chunks=0)
+            embed_task = progress.add_task(
+                "Embedding", total=None, chunks=0, visible=embedding is not None
+            )
+            stats = service.run(
+                on_progress=lambda s: progress.update(
+                    task, total=s.total, completed=s.completed + s.failed, chunks=s.chunks
+                ),
+                on_embedding_progress=lambda s: progress.update(embed_task, chunks=s.chunks),
+            )
+
+        console.print(
+            f"Ingested {stats.completed} files ({stats.unchanged} unchanged, "
+            f"{stats.failed} failed), {stats.chunks} new chunks in {stats.seconds:.1f}s."
+        )
+        if not embedding:
+            console.print(
+                "[dim]No embedding model is configured, documents are searched by "
+                "keyword only. Configure an Ollama provider to add semantic search.[/]"
+            )
+        elif stats.embedding:
+            console.print(
+                f"Embedded {stats.embedding.chunks} chunks with {embedding.embedder.name} "
+                f"({stats.embedding.reused} reused, "
+                f"{stats.embedding.chunks_per_second:.0f} chunks/s)."
+            )
+
     def run(self):
         """
         Launch the Textual-based chat interface.
@@ -46,7 +146,11 @@ class Parrot:
             if not self.agent:
                 raise ValueError("Agent is not initialized.")
 
+            from parrot.interactive.chat_interface import ChatInterface
+
             app = ChatInterface()
             app.run(self.agent)
+        elif action == "ingest":
+            self.ingest()
         else:
             sys.exit(1)
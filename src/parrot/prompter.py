@@ -1,12 +1,11 @@
 import functools
 import json
-import tempfile
+import os
 from dataclasses import dataclass, field
+from enum import StrEnum
 from pathlib import Path
-from typing import Dict, List, Tuple, Union
+from typing import Dict, List, Optional, Tuple, Union
 
-import httpx
-import ollama
 import typer
 from rich.console import Console
 from rich.progress import (
@@ -20,9 +19,6 @@ from rich.progress import (
 )
 from rich.prompt import Prompt
 from rich.style import Style
-from InquirerPy import inquirer
-from InquirerPy.base.control import Choice
-from InquirerPy.separator import Separator
 
 from parrot.exporter import ExportType
 
@@ -53,6 +49,10 @@ class FileConnectionDetails:
             self.file_path = self._download_file()
 
     def _download_file(self):
+        import httpx
+
+        from parrot.download_cache import DownloadCache, DownloadError
+
         console = Console()
 
         with Progress(
@@ -68,25 +68,17 @@ class FileConnectionDetails:
             console=console,
             transient=True,
         ) as progress:
+            task = progress.add_task(description="Downloading..", total=None)
             try:
-                with httpx.Client(follow_redirects=True) as client:
-                    with client.stream("GET", self.file_path, timeout=10.0) as response:
-                        response.raise_for_status()
-                        total_size = int(response.headers.get("content-length", 0))
-                        task = progress.add_task(
-                            description="Downloading..", total=total_size or 1
-                        )
-
-                        with tempfile.NamedTemporaryFile(
-                            delete=False, suffix=self.extension
-                        ) as temp_file:
-                            for chunk in response.iter_bytes(chunk_size=1024):
-                                temp_file.write(chunk)
-                                progress.update(task, advance=len(chunk))
-
-                            return temp_file.name
-
-            except httpx.RequestError as e:
+                # Unchanged files are served from ~/.parrot/cache, interrupted ones resume
+                return DownloadCache().fetch(
+                    self.file_path,
+                    suffix=self.extension,
+                    on_progress=lambda done, total: progress.update(
+                        task, completed=done, total=total
+                    ),
+                )
+            except (httpx.RequestError, DownloadError) as e:
                 print(f"Network error occurred: {e}")
             except httpx.HTTPStatusError as e:
                 print(f"HTTP error occurred: {e}")
@@ -99,12 +91,32 @@ class FileConnectionDetails:
 
 @dataclass
 class ParquetConnectionDetails(FileConnectionDetails):
+    """
+    A single Parquet file, a glob or a directory of Parquet files. Directories
+    are expanded to a recursive glob so hive-partitioned layouts are read as
+    one dataset.
+    """
+
     extension: str = field(init=False, default=".parquet")
+    hive_partitioning: Optional[bool] = None
+
+    def __post_init__(self):
+        super().__post_init__()
+
+        if os.path.isdir(self.file_path):
+            self.file_path = os.path.join(self.file_path, "**", "*.parquet")
+
+
+class CSVEngine(StrEnum):
+    PANDAS = "pandas"
+    DUCKDB = "duckdb"
 
 
 @dataclass
 class CSVConnectionDetails(FileConnectionDetails):
     extension: str = field(init=False, default=".csv")
+    engine: CSVEngine = CSVEngine.PANDAS
+    db_path: Optional[str] = None
 
 
 # TODO: Explore Python's Protocol to enforce a common interface for connection details
@@ -142,13 +154,38 @@ class ConnectionPrompter:
         )
 
     def get_csv_file_path(self) -> CSVConnectionDetails:
-        return CSVConnectionDetails(
-            file_path=Prompt.ask("[blue]Enter the path to the CSV file[/]")
+        from InquirerPy import inquirer
+        from InquirerPy.base.control import Choice
+
+        file_path = Prompt.ask("[blue]Enter the path to the CSV file[/]")
+        engine = CSVEngine(
+            inquirer.select(
+                message="Select query engine:",
+                choices=[
+                    Choice(CSVEngine.PANDAS.value, name="Pandas (small files)"),
+                    Choice(CSVEngine.DUCKDB.value, name="DuckDB (large files)"),
+                ],
+                default=CSVEngine.PANDAS.value,
+            ).execute()
         )
 
+        db_path = None
+        if engine == CSVEngine.DUCKDB:
+            db_path = (
+                Prompt.ask(
+                    "[blue]Persist into a .duckdb file (leave empty for in-memory)[/]",
+                    default="",
+                )
+                or None
+            )
+
+        return CSVConnectionDetails(file_path=file_path, engine=engine, db_path=db_path)
+
     def get_parquet_file_path(self) -> ParquetConnectionDetails:
         return ParquetConnectionDetails(
-            file_path=Prompt.ask("[blue]Enter the path to the parquet file[/]")
+            file_path=Prompt.ask(
+                "[blue]Enter the path to the parquet file, directory or glob[/]"
+            )
         )
 
 
@@ -158,6 +195,8 @@ class DataSourcePrompter:
     """
 
     def prompt(self) -> str:
+        from InquirerPy import inquirer
+
         data_source_type = inquirer.select(
             message="Select data source type:",
             choices=["SQL", "CSV", "PARQUET"],
@@ -201,6 +240,8 @@ class ConfigPrompter:
         models = [m["name"] for m in provider_config.get("models", [])]
 
         if selected_provider == "ollama":
+            import ollama
+
             # Fetch the model from local API dynamically
             ollama_models = ollama.list().models
             models = [m.model for m in ollama_models]
@@ -223,6 +264,8 @@ class ConfigPrompter:
 
     def _prompt_provider(self, providers: List[str]) -> str:
         """Prompt for LLM provider selection."""
+        from InquirerPy import inquirer
+
         return inquirer.select(
             message="Select a LLM provider:",
             choices=providers,
@@ -231,6 +274,8 @@ class ConfigPrompter:
 
     def _prompt_model(self, models: List[str]) -> str:
         """Prompt for model selection."""
+        from InquirerPy import inquirer
+
         return inquirer.select(
             message="Select a model:",
             choices=models,
@@ -265,12 +310,28 @@ class ConfigPrompter:
         )
 
 
+class IngestPrompter:
+    """
+    Class responsible for prompting the user for files to ingest.
+    """
+
+    def prompt(self) -> str:
+        path = Prompt.ask("[blue]Enter the path to a file or directory to ingest[/]")
+
+        if not path:
+            raise typer.Abort("Path cannot be empty.")
+
+        return path
+
+
 class ExportPrompter:
     """
     Class responsible for prompting the user to select a export type.
     """
 
     def prompt(self) -> Tuple[ExportType, str]:
+        from InquirerPy import inquirer
+
         export_type = inquirer.select(
             message="Select export type:",
             choices=["TEXT", "JSON", "CSV"],
@@ -291,6 +352,9 @@ class MainMenuPrompter:
     """
 
     def prompt(self) -> str:
+        from InquirerPy import inquirer
+        from InquirerPy.base.control import Choice
+
         action = inquirer.select(
             message="What do you want to do?",
             choices=[
@@ -0,0 +1,130 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from parrot.db.repositories.chunk_repository import ChunkRepository
+from parrot.rag.embeddings import Embedder
+from parrot.rag.vector_store import VectorStore
+
+EMBED_BATCH_SIZE = 64
+
+# Chunks read from the DB per round, several embedding requests worth
+FETCH_BATCHES = 8
+
+# How often a pipelined run checks for newly ingested chunks
+POLL_SECONDS = 0.2
+
+
+@dataclass
+class EmbeddingStats:
+    """Progress of an embedding run."""
+
+    # Chunks that got a vector
+    chunks: int = 0
+    # Of those, chunks whose text was already embedded and reused its vector
+    reused: int = 0
+    # Texts sent to the embedder
+    embedded: int = 0
+    seconds: float = 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+
+class EmbeddingService:
+    """
+    Embeds the chunks of completed ingestion jobs into a VectorStore.
+
+    Chunks are sent to the embedder in fixed-size batches. Identical texts,
+    within a batch or already embedded for another chunk, are embedded only
+    once and share a vector row. Progress lives in the DB: a chunk is pending
+    until its `vector_row` is set, so an interrupted run resumes where it
+    stopped. Run it next to IngestionService.run to embed while files are
+    still being parsed.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        store: VectorStore,
+        session_factory: Callable[[], Session],
+        batch_size: int = EMBED_BATCH_SIZE,
+    ):
+        self.embedder = embedder
+        self.store = store
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+
+    def run(
+        self,
+        until: Optional[threading.Event] = None,
+        on_progress: Optional[Callable[[EmbeddingStats], None]] = None,
+    ) -> EmbeddingStats:
+        """
+        Embed every pending chunk.
+
+        Args:
+            until: Keep waiting for new chunks until this event is set, then
+                embed what is left and return
+            on_progress: Called with the running totals after every round
+
+        Returns:
+            The totals of the run
+        """
+        stats = EmbeddingStats()
+        started = time.perf_counter()
+
+        with self.session_factory() as db:
+            repo = ChunkRepository(db)
+            while True:
+                # Read the flag first, so chunks written before it was set are not missed
+                finished = until is None or until.is_set()
+                if self._embed_pending(repo, stats):
+                    stats.seconds = time.perf_counter() - started
+                    if on_progress:
+                        on_progress(stats)
+                    continue
+
+                if finished:
+                    break
+                until.wait(POLL_SECONDS)
+
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+    def _embed_pending(self, repo: ChunkRepository, stats: EmbeddingStats) -> int:
+        pending = repo.list_unembedded(self.batch_size * FETCH_BATCHES)
+        if not pending:
+            return 0
+
+        # One vector per distinct text, reusing vectors that are already stored
+        by_key: Dict[str, List[str]] = {}
+        texts: Dict[str, str] = {}
+        for chunk_id, text, content_hash in pending:
+            key = content_hash or chunk_id
+            by_key.setdefault(key, []).append(chunk_id)
+            texts[key] = text
+
+        content_hashes = {content_hash for _, _, content_hash in pending if content_hash}
+        rows = repo.vector_rows_by_hash(list(content_hashes))
+        to_embed = [key for key in by_key if key not in rows]
+
+        for start in range(0, len(to_embed), self.batch_size):
+            keys = to_embed[start:start + self.batch_size]
+            vectors = self.embedder.embed([texts[key] for key in keys])
+            for key, row in zip(keys, self.store.add(vectors, self.embedder.name)):
+                rows[key] = int(row)
+            stats.embedded += len(keys)
+
+        vector_rows = {
+            chunk_id: rows[key] for key, chunk_ids in by_key.items() for chunk_id in chunk_ids
+        }
+        repo.set_vector_rows(vector_rows)
+
+        stats.chunks += len(vector_rows)
+        stats.reused += len(vector_rows) - len(to_embed)
+        return len(vector_rows)
@@ -0,0 +1,98 @@
+import hashlib
+import re
+from typing import List, Optional, Protocol
+
+import numpy as np
+import ollama
+
+DEFAULT_OLLAMA_EMBEDDING_MODEL = "nomic-embed-text"
+DEFAULT_HASH_DIM = 256
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class Embedder(Protocol):
+    """Turns texts into fixed size vectors."""
+
+    # Name of the model, stored with the vectors so they are not mixed up
+    name: str
+    dim: int
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into a float32 array of shape (len(texts), dim)."""
+        ...
+
+
+class OllamaEmbedder:
+    """Embeddings from a local Ollama embedding model."""
+
+    def __init__(self, model: str = DEFAULT_OLLAMA_EMBEDDING_MODEL, host: Optional[str] = None):
+        self.model = model
+        self.name = f"ollama:{model}"
+        self.client = ollama.Client(host=host)
+        self._dim: Optional[int] = None
+
+    @property
+    def dim(self) -> int:
+        if self._dim is None:
+            self._dim = self.embed(["dimension probe"]).shape[1]
+        return self._dim
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        response = self.client.embed(model=self.model, input=texts)
+        vectors = np.asarray(response.embeddings, dtype=np.float32)
+        self._dim = vectors.shape[1]
+        return vectors
+
+
+class HashEmbedder:
+    """
+    Deterministic feature-hashing embedder that needs no model.
+
+    Words and character trigrams are hashed into `dim` signed buckets. It only
+    captures lexical overlap, which the full-text index already covers better,
+    so it is only meant for tests and benchmarks and is never picked up for
+    document search.
+    """
+
+    def __init__(self, dim: int = DEFAULT_HASH_DIM):
+        self.dim = dim
+        self.name = f"hash-{dim}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = int.from_bytes(
+                    hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little"
+                )
+                vectors[row, digest % self.dim] += 1.0 if digest >> 63 else -1.0
+        return vectors
+
+    @staticmethod
+    def _features(text: str) -> List[str]:
+        features = []
+        for word in _TOKEN_RE.findall(text.lower()):
+            features.append(word)
+            padded = f"#{word}#"
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+
+def is_hash_embedder(name: Optional[str]) -> bool:
+    """Whether vectors of this embedder name come from the test-only HashEmbedder."""
+    return bool(name) and name.startswith("hash-")
+
+
+def load_embedder(name: str, host: Optional[str] = None) -> Embedder:
+    """
+    Create the embedder with the given name, as stored with the vectors.
+
+    Names are `ollama:<model>` or `hash-<dim>`; `host` is the Ollama server
+    to use, by default the local one.
+    """
+    if name.startswith("ollama:"):
+        return OllamaEmbedder(name.split(":", 1)[1], host=host)
+    if name.startswith("hash-"):
+        return HashEmbedder(int(name.split("-", 1)[1]))
+    raise ValueError(f"Unsupported embedder: {name}")
@@ -1,13 +1,52 @@
+import functools
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass
 from datetime import datetime
-from enum import StrEnum
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Union
+
+from phi.utils.log import logger
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from parrot.db.repositories.ingestion_repository import (
+    IngestedFile,
+    IngestionRepository,
+    SourceFile,
+)
+from parrot.rag.embedding_service import EmbeddingService, EmbeddingStats
+from parrot.rag.models import JobStatus
+from parrot.rag.parsers import is_supported, parse_file
 
+CHUNK_TOKENS = 350
+CHUNK_OVERLAP_TOKENS = 50
+CHARS_PER_TOKEN = 8
+# Longest run of text without whitespace kept in one piece when chunking
+MAX_UNIT_CHARS = 200
+# Chunks a worker keeps in memory before spilling a file's chunks to disk
+SPOOL_CHUNKS = 2000
+WRITE_BATCH_SIZE = 500
+HASH_BLOCK_SIZE = 1024 * 1024
 
-class JobStatus(StrEnum):
-    QUEUED = "queued"
-    PROCESSING = "processing"
-    COMPLETED = "completed"
-    FAILED = "failed"
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_UNIT_RE = re.compile(r"\S+\s*|\s+")
+_SENTENCE_END_RE = re.compile(r"[.!?][\"')\]]?\s+$")
 
 
 class IngestionJob(BaseModel):
@@ -17,3 +56,422 @@ class IngestionJob(BaseModel):
     error: str | None
     created_at: datetime
     updated_at: datetime
+
+
+@dataclass
+class EnqueueStats:
+    """What a scan of a path found."""
+
+    queued: int = 0
+    # Files whose size and modification time did not change
+    skipped: int = 0
+    # Known files that no longer exist
+    deleted: int = 0
+    # Files that are neither in a supported format nor text
+    unsupported: int = 0
+
+
+@dataclass
+class IngestionStats:
+    """Progress of an ingestion run."""
+
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    # Completed files whose checksum did not change
+    unchanged: int = 0
+    # New or changed chunks written
+    chunks: int = 0
+    seconds: float = 0.0
+    # Set when the run embedded the chunks as well
+    embedding: Optional[EmbeddingStats] = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Approximate the number of model tokens in a text.
+
+    Counts punctuation marks and words, long words as one token per
+    CHARS_PER_TOKEN characters. That is close to what subword tokenizers
+    produce for prose, without depending on a model's vocabulary.
+    """
+    return sum(-(-len(token) // CHARS_PER_TOKEN) for token in _TOKEN_RE.findall(text))
+
+
+# Words repeat a lot, so their token counts are memoized
+_unit_tokens = functools.lru_cache(maxsize=65536)(count_tokens)
+
+
+def _units(pieces: Iterable[str]) -> Iterator[str]:
+    """Split streamed text into words with their trailing whitespace."""
+    carry = ""
+    for piece in pieces:
+        units = _UNIT_RE.findall(carry + piece)
+        # The last word may continue in the next piece
+        carry = units.pop() if units and not units[-1][-1].isspace() else ""
+        for unit in units:
+            if len(unit) <= MAX_UNIT_CHARS:
+                yield unit
+            else:
+                # Text without whitespace is hard-split so one unit cannot outgrow a chunk
+                for start in range(0, len(unit), MAX_UNIT_CHARS):
+                    yield unit[start:start + MAX_UNIT_CHARS]
+    for start in range(0, len(carry), MAX_UNIT_CHARS):
+        yield carry[start:start + MAX_UNIT_CHARS]
+
+
+def _cut_point(window: List[tuple[str, int]], max_tokens: int) -> int:
+    """
+    Number of units of a full window to put in the next chunk.
+
+    The chunk ends at the last paragraph, line or sentence break, or word, in
+    the second half of the window when there is one.
+    """
+    best, best_rank = 1, -1
+    tokens = 0
+    for index, (unit, cost) in enumerate(window):
+        tokens += cost
+        if tokens > max_tokens and index > 0:
+            break
+        if tokens < max_tokens // 2:
+            continue
+        if "\n\n" in unit:
+            rank = 3
+        elif "\n" in unit:
+            rank = 2
+        elif _SENTENCE_END_RE.search(unit):
+            rank = 1
+        else:
+            rank = 0
+        if rank >= best_rank:
+            best, best_rank = index + 1, rank
+    return best
+
+
+def chunk_text(
+    text: Union[str, Iterable[str]],
+    max_tokens: int = CHUNK_TOKENS,
+    overlap: int = CHUNK_OVERLAP_TOKENS,
+) -> Iterator[tuple[str, int]]:
+    """
+    Split text into chunks of at most about `max_tokens` tokens overlapping by `overlap`.
+
+    The text can be streamed as pieces, e.g. from `parse_file`; only the
+    current window is held in memory.
+
+    Yields:
+        (chunk text, token count) of every chunk
+    """
+    pieces = [text] if isinstance(text, str) else text
+    window: Deque[tuple[str, int]] = deque()
+    tokens = 0
+    # Units at the end of the window not yet in a chunk
+    fresh = 0
+
+    def emit(count: int) -> Iterator[tuple[str, int]]:
+        nonlocal tokens, fresh
+        units = [window.popleft() for _ in range(count)]
+        tokens -= sum(cost for _, cost in units)
+        fresh = min(fresh, len(window))
+
+        chunk = "".join(unit for unit, _ in units).strip()
+        if chunk:
+            yield chunk, sum(cost for _, cost in units)
+
+        # Carry the end of the chunk over into the next one
+        kept = 0
+        for unit, cost in reversed(units[1:]):
+            if kept + cost > overlap:
+                break
+            window.appendleft((unit, cost))
+            kept += cost
+        tokens += kept
+
+    for unit in _units(pieces):
+        cost = _unit_tokens(unit)
+        window.append((unit, cost))
+        tokens += cost
+        fresh += 1
+        while tokens >= max_tokens and fresh:
+            yield from emit(_cut_point(list(window), max_tokens))
+
+    # Whitespace after the last chunk does not make another one
+    if any(cost for _, cost in list(window)[len(window) - fresh:]):
+        yield from emit(len(window))
+
+
+def file_checksum(path: str) -> str:
+    """sha256 of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _walk(root: Path) -> Iterator[Path]:
+    """Files below a directory, leaving out hidden files and hidden directories."""
+    for directory, dirnames, filenames in os.walk(root):
+        # Pruned in place, so os.walk does not descend into .git, .venv and the like
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith("."))
+        for name in sorted(filenames):
+            path = Path(directory) / name
+            if not name.startswith(".") and path.is_file():
+                yield path
+
+
+def _process_file(
+    job_id: str, source_id: str, path: str, checksum: Optional[str]
+) -> IngestedFile:
+    """
+    Hash, then parse and chunk one file if it changed. Runs in a worker process.
+
+    The file is streamed through its parser and the chunker. Once a file has
+    more than SPOOL_CHUNKS chunks they are spilled to a temporary file instead
+    of being returned, so a worker's memory does not grow with the file.
+    """
+    stat = os.stat(path)
+    result = IngestedFile(
+        job_id=job_id,
+        source_id=source_id,
+        checksum=file_checksum(path),
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+    )
+    if result.checksum == checksum:
+        return result
+
+    result.chunks = []
+    spool = None
+    try:
+        for index, (text, token_count) in enumerate(chunk_text(parse_file(path))):
+            chunk = {
+                "id": str(uuid.uuid4()),
+                "job_id": job_id,
+                "source_id": source_id,
+                "chunk_index": index,
+                "text": text,
+                "token_count": token_count,
+                "content_hash": hashlib.sha256(text.encode()).hexdigest(),
+            }
+            result.chunks.append(chunk)
+            result.chunk_count += 1
+
+            if len(result.chunks) >= SPOOL_CHUNKS:
+                if spool is None:
+                    spool = tempfile.NamedTemporaryFile(
+                        "w",
+                        encoding="utf-8",
+                        prefix="parrot-chunks-",
+                        suffix=".jsonl",
+                        delete=False,
+                    )
+                    result.spool_path = spool.name
+                spool.writelines(json.dumps(c) + "\n" for c in result.chunks)
+                result.chunks.clear()
+    except BaseException:
+        if spool is not None:
+            spool.close()
+            os.unlink(spool.name)
+        raise
+
+    if spool is not None:
+        spool.writelines(json.dumps(c) + "\n" for c in result.chunks)
+        result.chunks.clear()
+        spool.close()
+    return result
+
+
+class IngestionService:
+    """
+    Ingests files queued in the `ingestion_jobs` table.
+
+    Queued jobs are claimed in batches and their files are parsed and chunked
+    in a pool of worker processes, one per core by default. The parent
+    process is the only DB writer: the chunks of finished files are written
+    together with their job status in transactions of about
+    `write_batch_size` chunks. A file that fails to parse marks only its own
+    job as failed, with the error. Jobs left in processing by an interrupted
+    run are queued again on the next run.
+
+    Re-ingestion is incremental: files whose size and modification time are
+    unchanged are not queued, files whose checksum is unchanged are not
+    parsed, and of a changed file only chunks with new text are written.
+    Files that disappeared from a scanned directory are tombstoned.
+
+    With an EmbeddingService, chunks are embedded in a background thread as
+    their jobs complete, so embedding overlaps with parsing the next files.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        workers: Optional[int] = None,
+        write_batch_size: int = WRITE_BATCH_SIZE,
+        embedding: Optional[EmbeddingService] = None,
+    ):
+        self.session_factory = session_factory
+        self.workers = workers or os.cpu_count() or 1
+        self.write_batch_size = write_batch_size
+        self.embedding = embedding
+
+    def enqueue(self, path: str) -> EnqueueStats:
+        """
+        Queue a file, or every file below a directory, for ingestion.
+
+        Hidden files and everything in hidden directories are left out, and
+        so are files that are neither in a supported format nor text. Files
+        that did not change since they were last ingested are skipped, and
+        known files below the path that are gone or left out are tombstoned.
+        """
+        root = Path(path).expanduser().resolve()
+        if root.is_dir():
+            candidates: Iterable[Path] = _walk(root)
+        elif root.is_file():
+            candidates = [root]
+        else:
+            raise FileNotFoundError(f"No such file or directory: {path}")
+
+        stats = EnqueueStats()
+        paths = []
+        for candidate in candidates:
+            if is_supported(str(candidate)):
+                paths.append(candidate)
+            else:
+                logger.info(f"Skipping {candidate}: neither a supported format nor text")
+                stats.unsupported += 1
+
+        with self.session_factory() as db:
+            repo = IngestionRepository(db)
+            sources = repo.list_sources(str(root))
+
+            files = []
+            on_disk = set()
+            for file_path in paths:
+                stat = file_path.stat()
+                on_disk.add(str(file_path))
+
+                source = sources.get(str(file_path))
+                if (
+                    source is not None
+                    and source.deleted_at is None
+                    and source.checksum is not None
+                    and source.size == stat.st_size
+                    and source.mtime_ns == stat.st_mtime_ns
+                ):
+                    stats.skipped += 1
+                    continue
+
+                files.append(
+                    SourceFile(
+                        path=str(file_path),
+                        mime_type=mimetypes.guess_type(file_path.name)[0],
+                        size=stat.st_size,
+                        mtime_ns=stat.st_mtime_ns,
+                    )
+                )
+
+            missing = [
+                source.id
+                for source_path, source in sources.items()
+                if source_path not in on_disk and source.deleted_at is None
+            ]
+            repo.tombstone(missing)
+            stats.deleted = len(missing)
+
+            stats.queued = repo.enqueue(files, sources)
+
+        return stats
+
+    def run(
+        self,
+        on_progress: Optional[Callable[[IngestionStats], None]] = None,
+        on_embedding_progress: Optional[Callable[[EmbeddingStats], None]] = None,
+    ) -> IngestionStats:
+        """
+        Ingest every queued job, and embed the chunks if the service embeds.
+
+        Args:
+            on_progress: Called with the running totals after every finished file
+            on_embedding_progress: Called with the embedding totals after every
+                embedded batch
+
+        Returns:
+            The totals of the run
+        """
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(1) as embedder:
+            ingested = threading.Event()
+            embedding = None
+            if self.embedding is not None:
+                embedding = embedder.submit(
+                    self.embedding.run, until=ingested, on_progress=on_embedding_progress
+                )
+            try:
+                stats = self._ingest(started, on_progress)
+            finally:
+                ingested.set()
+
+            if embedding is not None:
+                stats.embedding = embedding.result()
+
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+    def _ingest(
+        self, started: float, on_progress: Optional[Callable[[IngestionStats], None]]
+    ) -> IngestionStats:
+        with self.session_factory() as db, ProcessPoolExecutor(self.workers) as pool:
+            repo = IngestionRepository(db)
+            repo.requeue_interrupted()
+            stats = IngestionStats(total=repo.count_jobs(JobStatus.QUEUED))
+
+            running: Dict[Future, str] = {}
+            finished: List[IngestedFile] = []
+
+            def flush() -> None:
+                if finished:
+                    try:
+                        stats.chunks += repo.complete_jobs(finished)
+                    finally:
+                        for result in finished:
+                            result.discard_spool()
+                        finished.clear()
+
+            while True:
+                # Keep a couple of files per worker in flight
+                free_slots = 2 * self.workers - len(running)
+                if free_slots > 0:
+                    for job_id, source_id, path, checksum in repo.claim_jobs(free_slots):
+                        future = pool.submit(_process_file, job_id, source_id, path, checksum)
+                        running[future] = job_id
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        repo.fail_job(job_id, f"{type(e).__name__}: {e}")
+                        stats.failed += 1
+                    else:
+                        finished.append(result)
+                        stats.completed += 1
+                        stats.unchanged += result.chunks is None
+
+                # An unchanged file still costs a row update
+                pending = sum(result.chunk_count or 1 for result in finished)
+                if pending >= self.write_batch_size or not running:
+                    flush()
+
+                stats.seconds = time.perf_counter() - started
+                if on_progress:
+                    on_progress(stats)
+
+            flush()
+
+        return stats
@@ -1,7 +1,9 @@
 from datetime import datetime
+from enum import StrEnum
 from typing import Optional
 
 from sqlalchemy import (
+    BigInteger,
     DateTime,
     String,
     CheckConstraint,
@@ -17,13 +19,29 @@ from sqlalchemy.orm import Mapped, mapped_column, relationship
 from parrot.db.base_model import Base
 
 
+class JobStatus(StrEnum):
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 class Source(Base):
     __tablename__ = "sources"
 
     id: Mapped[str] = mapped_column(String, primary_key=True)
     path: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    # sha256 of the file contents when it was last ingested
     checksum: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     mime_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # File size and modification time when it was last ingested, compared
+    # before the checksum so unchanged files are not read again
+    size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    mtime_ns: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    # Set when the file no longer exists, its chunks are removed
+    deleted_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=False), nullable=True
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=False), nullable=False, server_default=func.now()
     )
@@ -74,6 +92,9 @@ class Chunk(Base):
         UniqueConstraint("job_id", "chunk_index", name="uq_chunks_job_chunk_index"),
         Index("idx_chunks_source", "source_id"),
         Index("idx_chunks_job", "job_id"),
+        Index("idx_chunks_source_content_hash", "source_id", "content_hash"),
+        Index("idx_chunks_vector_row", "vector_row"),
+        Index("idx_chunks_content_hash", "content_hash"),
     )
 
     id: Mapped[str] = mapped_column(String, primary_key=True)
@@ -85,6 +106,10 @@ class Chunk(Base):
     )
     chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)
     text: Mapped[str] = mapped_column(Text, nullable=False)
+    # sha256 of the text, used to keep unchanged chunks on re-ingestion
+    content_hash: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # Row of the chunk's embedding in the VectorStore, None until embedded
+    vector_row: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     token_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     metadata_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
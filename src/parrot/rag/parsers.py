@@ -0,0 +1,258 @@
+import codecs
+import json
+import zipfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterator, List
+
+# Characters read from text files at a time
+TEXT_BLOCK_CHARS = 64 * 1024
+
+# Bytes read to tell a text file from a binary one
+SNIFF_BYTES = 8192
+# Largest share of control bytes in text that is not valid UTF-8
+MAX_CONTROL_SHARE = 0.05
+# Control bytes that plain text commonly contains: \b \t \n \f \r and escape
+_TEXT_CONTROLS = frozenset(b"\b\t\n\f\r\x1b")
+
+_WORD = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_SHEET = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_RELATIONSHIPS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PACKAGE_RELATIONSHIPS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+def _iter_elements(stream: IO[bytes], tag: str) -> Iterator[ET.Element]:
+    """
+    Yield every complete `tag` element of an XML stream.
+
+    Yielded elements are removed from the tree afterwards, so memory stays
+    bounded by the largest element rather than by the document.
+    """
+    parents: List[ET.Element] = []
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            parents.append(elem)
+            continue
+
+        parents.pop()
+        if elem.tag == tag:
+            yield elem
+            elem.clear()
+            if parents:
+                parents[-1].remove(elem)
+
+
+def _record_text(value: Any) -> str:
+    """Text of a JSON value: strings as they are, anything else as compact JSON."""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def parse_text(path: str) -> Iterator[str]:
+    """Yield the text of a plain text file in blocks."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        while block := f.read(TEXT_BLOCK_CHARS):
+            yield block
+
+
+def parse_jsonl(path: str) -> Iterator[str]:
+    """Yield the records of a JSON Lines file, one at a time."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_number}: {e}") from None
+            yield _record_text(record) + "\n\n"
+
+
+def _json_values(f: IO[str]) -> Iterator[Any]:
+    """
+    Decode a JSON document, one element at a time if it is an array.
+
+    Other documents are decoded as a whole.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    eof = False
+
+    def fill() -> None:
+        nonlocal buffer, eof
+        # Read at least as much as is buffered, so a large element is re-scanned
+        # a logarithmic number of times
+        block = f.read(max(TEXT_BLOCK_CHARS, len(buffer)))
+        eof = not block
+        buffer += block
+
+    while not eof and not buffer.strip():
+        fill()
+    buffer = buffer.lstrip()
+    if not buffer.startswith("["):
+        if buffer:
+            yield json.loads(buffer + f.read())
+        return
+
+    buffer = buffer[1:]
+    while True:
+        buffer = buffer.lstrip(" \t\r\n,")
+        if buffer.startswith("]"):
+            return
+
+        try:
+            value, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            end = 0
+        # Nothing decoded yet, or a number that may continue in the next block
+        if end == 0 or (end == len(buffer) and not eof):
+            if eof:
+                raise ValueError("Invalid or unterminated JSON array")
+            fill()
+            continue
+
+        yield value
+        buffer = buffer[end:]
+
+
+def parse_json(path: str) -> Iterator[str]:
+    """Yield the elements of a top-level JSON array one at a time, or the whole document."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for value in _json_values(f):
+            yield _record_text(value) + "\n\n"
+
+
+def parse_docx(path: str) -> Iterator[str]:
+    """Yield the paragraphs of a Word document, table cells included."""
+    with zipfile.ZipFile(path) as archive, archive.open("word/document.xml") as document:
+        for paragraph in _iter_elements(document, f"{_WORD}p"):
+            parts = []
+            for elem in paragraph.iter():
+                if elem.tag == f"{_WORD}t":
+                    parts.append(elem.text or "")
+                elif elem.tag == f"{_WORD}tab":
+                    parts.append("\t")
+                elif elem.tag in (f"{_WORD}br", f"{_WORD}cr"):
+                    parts.append("\n")
+            text = "".join(parts)
+            if text.strip():
+                yield text + "\n\n"
+
+
+def _xlsx_sheets(archive: zipfile.ZipFile) -> List[tuple[str, str]]:
+    """(name, member path) of the sheets of a workbook, in workbook order."""
+    with archive.open("xl/_rels/workbook.xml.rels") as f:
+        targets = {
+            rel.get("Id"): rel.get("Target")
+            for rel in ET.parse(f).getroot().iter(f"{_PACKAGE_RELATIONSHIPS}Relationship")
+        }
+    with archive.open("xl/workbook.xml") as f:
+        sheets = ET.parse(f).getroot().iter(f"{_SHEET}sheet")
+        result = []
+        for sheet in sheets:
+            target = targets[sheet.get(f"{_RELATIONSHIPS}id")].lstrip("/")
+            if not target.startswith("xl/"):
+                target = f"xl/{target}"
+            result.append((sheet.get("name"), target))
+    return result
+
+
+def parse_xlsx(path: str) -> Iterator[str]:
+    """
+    Yield the rows of every sheet of an Excel workbook as tab separated lines.
+
+    Rows are streamed; only the workbook's shared string table is held in memory.
+    """
+    with zipfile.ZipFile(path) as archive:
+        shared: List[str] = []
+        if "xl/sharedStrings.xml" in archive.namelist():
+            with archive.open("xl/sharedStrings.xml") as f:
+                for item in _iter_elements(f, f"{_SHEET}si"):
+                    shared.append("".join(t.text or "" for t in item.iter(f"{_SHEET}t")))
+
+        for name, member in _xlsx_sheets(archive):
+            yield f"{name}\n\n"
+            with archive.open(member) as sheet:
+                for row in _iter_elements(sheet, f"{_SHEET}row"):
+                    values = [_cell_value(cell, shared) for cell in row.iter(f"{_SHEET}c")]
+                    if any(values):
+                        yield "\t".join(values) + "\n"
+            yield "\n"
+
+
+def _cell_value(cell: ET.Element, shared: List[str]) -> str:
+    cell_type = cell.get("t")
+    if cell_type == "inlineStr":
+        return "".join(t.text or "" for t in cell.iter(f"{_SHEET}t"))
+
+    value = cell.find(f"{_SHEET}v")
+    if value is None or value.text is None:
+        return ""
+    if cell_type == "s":
+        return shared[int(value.text)]
+    if cell_type == "b":
+        return "TRUE" if value.text == "1" else "FALSE"
+    return value.text
+
+
+def parse_pdf(path: str) -> Iterator[str]:
+    """Yield the text of a PDF page by page. Needs the optional `pypdf` package."""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ImportError(
+            "Reading PDF files requires pypdf: uv sync --extra pdf, or pip install pypdf"
+        ) from None
+
+    for page in PdfReader(path).pages:
+        text = page.extract_text() or ""
+        if text.strip():
+            yield text + "\n\n"
+
+
+PARSERS: Dict[str, Callable[[str], Iterator[str]]] = {
+    ".json": parse_json,
+    ".jsonl": parse_jsonl,
+    ".ndjson": parse_jsonl,
+    ".docx": parse_docx,
+    ".xlsx": parse_xlsx,
+    ".pdf": parse_pdf,
+}
+
+
+def is_text_file(path: str) -> bool:
+    """
+    Whether the start of a file looks like text: it has no NUL bytes, and is
+    valid UTF-8 or, in another encoding, has few control bytes.
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(SNIFF_BYTES)
+    except OSError:
+        return False
+    if b"\0" in head:
+        return False
+    try:
+        # Not final, as the block may end inside a multi-byte character
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return True
+    except UnicodeDecodeError:
+        controls = sum(1 for byte in head if byte < 32 and byte not in _TEXT_CONTROLS)
+        return controls <= MAX_CONTROL_SHARE * len(head)
+
+
+def is_supported(path: str) -> bool:
+    """Whether parse_file can read a file: it has a known format or is text."""
+    return Path(path).suffix.lower() in PARSERS or is_text_file(path)
+
+
+def parse_file(path: str) -> Iterator[str]:
+    """
+    Yield the text of a file in pieces, picking the parser by extension.
+
+    Files with other extensions are read as plain text, so check them with
+    `is_supported` first. Pieces end at record, row or paragraph boundaries
+    where the format has them.
+    """
+    return PARSERS.get(Path(path).suffix.lower(), parse_text)(path)
@@ -0,0 +1,207 @@
+import re
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, List, Optional, Protocol
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from parrot.db.repositories.chunk_repository import ChunkRepository, query_terms
+from parrot.rag.embeddings import Embedder, is_hash_embedder, load_embedder
+from parrot.rag.vector_store import VectorStore
+
+# Deleted chunks keep their vector rows, so extra candidates are fetched, and
+# twice as many again while fewer than k of them belong to live chunks
+OVERFETCH = 2
+
+# Candidates taken from each index before fusing
+HYBRID_CANDIDATES = 50
+
+# Reciprocal rank fusion constant; larger values flatten the rank differences
+RRF_K = 60
+
+# Fused results passed to a reranker
+RERANK_DEPTH = 20
+
+# Reranker bonus for chunks containing the whole query verbatim
+PHRASE_BONUS = 0.5
+
+
+@dataclass
+class RetrievedChunk:
+    """A chunk returned by a search, with its similarity to the query."""
+
+    chunk_id: str
+    source_path: str
+    chunk_index: int
+    text: str
+    score: float
+
+
+class Retriever(Protocol):
+    """Finds the chunks relevant to a query."""
+
+    def search(self, query: str, k: int = 5) -> List[RetrievedChunk]:
+        """Return the k best chunks for the query, best first."""
+        ...
+
+
+class Reranker(Protocol):
+    """Reorders the candidates of a first-stage search."""
+
+    def rerank(self, query: str, results: List[RetrievedChunk]) -> List[RetrievedChunk]:
+        """Return the results rescored for the query, best first."""
+        ...
+
+
+class ChunkRetriever:
+    """Semantic search over ingested chunks."""
+
+    def __init__(
+        self,
+        store: VectorStore,
+        embedder: Embedder,
+        session_factory: Callable[[], Session],
+        nprobe: Optional[int] = None,
+    ):
+        self.store = store
+        self.embedder = embedder
+        self.session_factory = session_factory
+        self.nprobe = nprobe
+
+    def search(self, query: str, k: int = 5) -> List[RetrievedChunk]:
+        """Return the k chunks most similar to the query, best first."""
+        query_vector = self.embedder.embed([query])[0]
+        fetch = k * OVERFETCH
+        while True:
+            rows, scores = self.store.search(query_vector, fetch, self.nprobe)
+            results = self._results(rows, scores)
+            # Stop once k rows are live or the store has no more rows to give
+            if len(results) >= k or len(rows) < fetch:
+                return results[:k]
+            fetch *= 2
+
+    def _results(self, rows: np.ndarray, scores: np.ndarray) -> List[RetrievedChunk]:
+        with self.session_factory() as db:
+            chunks = ChunkRepository(db).get_by_vector_rows([int(row) for row in rows])
+
+        results = []
+        for row, score in zip(rows, scores):
+            for chunk, path in chunks.get(int(row), []):
+                results.append(
+                    RetrievedChunk(
+                        chunk_id=chunk.id,
+                        source_path=path,
+                        chunk_index=chunk.chunk_index,
+                        text=chunk.text,
+                        score=float(score),
+                    )
+                )
+        return results
+
+
+class TermOverlapReranker:
+    """
+    Cheap local reranker that favours chunks containing more of the query's terms.
+
+    A chunk scores the share of distinct query terms it contains as whole
+    words, plus PHRASE_BONUS if it contains the whole query. The first-stage
+    score breaks ties. It needs no model, so it costs microseconds per chunk.
+    """
+
+    def rerank(self, query: str, results: List[RetrievedChunk]) -> List[RetrievedChunk]:
+        terms = {term.lower() for term in query_terms(query)}
+        if not terms:
+            return results
+
+        patterns = [re.compile(rf"(?<!\w){re.escape(term)}(?!\w)") for term in terms]
+        phrase = " ".join(query.lower().split())
+
+        rescored = []
+        for result in results:
+            text = result.text.lower()
+            coverage = sum(1 for pattern in patterns if pattern.search(text)) / len(patterns)
+            bonus = PHRASE_BONUS if len(terms) > 1 and phrase in " ".join(text.split()) else 0.0
+            rescored.append(replace(result, score=coverage + bonus + result.score))
+        return sorted(rescored, key=lambda result: result.score, reverse=True)
+
+
+class HybridRetriever:
+    """
+    Lexical and semantic search over ingested chunks, fused by rank.
+
+    The FTS5 index finds exact words and identifiers, the vector store finds
+    related wording. Each returns HYBRID_CANDIDATES chunks, which are combined
+    with reciprocal rank fusion: a chunk scores the sum of 1 / (RRF_K + rank)
+    over the lists it appears in. Without a vector retriever the search is
+    purely lexical. An optional reranker reorders the best fused results.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        vector: Optional[ChunkRetriever] = None,
+        reranker: Optional[Reranker] = None,
+        candidates: int = HYBRID_CANDIDATES,
+        rrf_k: int = RRF_K,
+    ):
+        self.session_factory = session_factory
+        self.vector = vector
+        self.reranker = reranker
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+
+    def search(self, query: str, k: int = 5) -> List[RetrievedChunk]:
+        """Return the k best chunks for the query, best first."""
+        with self.session_factory() as db:
+            lexical = [
+                RetrievedChunk(
+                    chunk_id=chunk.id,
+                    source_path=path,
+                    chunk_index=chunk.chunk_index,
+                    text=chunk.text,
+                    score=-rank,
+                )
+                for chunk, path, rank in ChunkRepository(db).search_text(query, self.candidates)
+            ]
+        semantic = self.vector.search(query, self.candidates) if self.vector else []
+
+        chunks: Dict[str, RetrievedChunk] = {}
+        fused: Dict[str, float] = {}
+        for results in (lexical, semantic):
+            for rank, result in enumerate(results, start=1):
+                chunks.setdefault(result.chunk_id, result)
+                fused[result.chunk_id] = fused.get(result.chunk_id, 0.0) + 1 / (self.rrf_k + rank)
+
+        best = sorted(fused, key=fused.get, reverse=True)
+        best = best[: max(k, RERANK_DEPTH) if self.reranker else k]
+        results = [replace(chunks[chunk_id], score=fused[chunk_id]) for chunk_id in best]
+
+        if self.reranker:
+            results = self.reranker.rerank(query, results)
+        return results[:k]
+
+
+def load_retriever(
+    session_factory: Callable[[], Session], ollama_host: Optional[str] = None
+) -> Optional[HybridRetriever]:
+    """
+    Hybrid retriever over the ingested chunks, reranked, or None if nothing
+    was ingested. The vector side is left out until chunks are embedded, and
+    for vectors of the test-only HashEmbedder, which only lower the quality
+    of the lexical results they would be fused with.
+
+    Args:
+        session_factory: Creates sessions of the ingestion database
+        ollama_host: Ollama server that embeds queries for Ollama vectors
+    """
+    with session_factory() as db:
+        if not ChunkRepository(db).has_chunks():
+            return None
+
+    store = VectorStore()
+    vector = (
+        ChunkRetriever(store, load_embedder(store.model, host=ollama_host), session_factory)
+        if store.count and not is_hash_embedder(store.model)
+        else None
+    )
+    return HybridRetriever(session_factory, vector, TermOverlapReranker())
@@ -1,8 +1,142 @@
+from sqlalchemy import Connection, Engine, Table, inspect, text
+
 from parrot.rag.storage.db import engine
 from parrot.db.base_model import Base
 from parrot.rag.models import *  # noqa
 from parrot.models.chat_session import *  # noqa
+from parrot.models.schema_catalog import *  # noqa
+from parrot.models.answer_cache import *  # noqa
+from parrot.models.chat_session import ChatMessage
+from parrot.rag.models import Chunk, Source
+
+
+# Full-text index over chat messages. It is an external content table, so
+# the text is stored only once and the triggers keep the index in sync.
+_CHAT_SEARCH_TABLE = """
+    CREATE VIRTUAL TABLE chat_messages_fts USING fts5(
+        raw_content,
+        content='chat_messages',
+        content_rowid='rowid',
+        tokenize='porter unicode61'
+    )
+"""
+
+_CHAT_SEARCH_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_insert AFTER INSERT ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts (rowid, raw_content) VALUES (new.rowid, new.raw_content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_delete AFTER DELETE ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts (chat_messages_fts, rowid, raw_content)
+        VALUES ('delete', old.rowid, old.raw_content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_update
+    AFTER UPDATE OF raw_content ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts (chat_messages_fts, rowid, raw_content)
+        VALUES ('delete', old.rowid, old.raw_content);
+        INSERT INTO chat_messages_fts (rowid, raw_content) VALUES (new.rowid, new.raw_content);
+    END
+    """,
+]
+
+# Full-text index over ingested chunks, for exact words and identifiers that
+# vector search misses. Chunks whose text is unchanged keep their row on
+# re-ingestion, so only new and deleted chunks touch the index.
+_CHUNK_SEARCH_TABLE = """
+    CREATE VIRTUAL TABLE chunks_fts USING fts5(
+        text,
+        content='chunks',
+        content_rowid='rowid',
+        tokenize='porter unicode61'
+    )
+"""
+
+_CHUNK_SEARCH_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS chunks_fts_insert AFTER INSERT ON chunks BEGIN
+        INSERT INTO chunks_fts (rowid, text) VALUES (new.rowid, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chunks_fts_delete AFTER DELETE ON chunks BEGIN
+        INSERT INTO chunks_fts (chunks_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chunks_fts_update AFTER UPDATE OF text ON chunks BEGIN
+        INSERT INTO chunks_fts (chunks_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+        INSERT INTO chunks_fts (rowid, text) VALUES (new.rowid, new.text);
+    END
+    """,
+]
+
+
+def init_db(bind: Engine = engine) -> None:
+    with bind.begin() as conn:
+        _migrate(conn)
+        Base.metadata.create_all(bind=conn)
+        _create_search(conn, "chat_messages_fts", _CHAT_SEARCH_TABLE, _CHAT_SEARCH_TRIGGERS)
+        _create_search(conn, "chunks_fts", _CHUNK_SEARCH_TABLE, _CHUNK_SEARCH_TRIGGERS)
+
+
+def _migrate(conn: Connection) -> None:
+    """Upgrade tables created by older versions in place."""
+    tables = inspect(conn).get_table_names()
+
+    if "chat_messages" in tables:
+        columns = {column["name"] for column in inspect(conn).get_columns("chat_messages")}
+        if "sequence" not in columns:
+            _add_chat_message_sequence(conn)
+
+    for table in (Source.__table__, Chunk.__table__):
+        if table.name in tables:
+            _add_nullable_columns(conn, table)
+
+
+def _add_nullable_columns(conn: Connection, table: Table) -> None:
+    # Nullable columns need no backfill, so they are added with ALTER TABLE
+    existing = {column["name"] for column in inspect(conn).get_columns(table.name)}
+    for column in table.columns:
+        if column.name not in existing and column.nullable:
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(
+                text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}')
+            )
+
+    for index in table.indexes:
+        index.create(conn, checkfirst=True)
+
+
+def _add_chat_message_sequence(conn: Connection) -> None:
+    # SQLite cannot drop the old unique (session_id, created_at) constraint,
+    # so the table is rebuilt with the sequence numbered in creation order
+    conn.execute(text("ALTER TABLE chat_messages RENAME TO chat_messages_old"))
+    ChatMessage.__table__.create(conn)
+    conn.execute(
+        text(
+            """
+            INSERT INTO chat_messages (id, session_id, sequence, sender, raw_content, created_at)
+            SELECT id, session_id,
+                   ROW_NUMBER() OVER (PARTITION BY session_id ORDER BY created_at, rowid),
+                   sender, raw_content, created_at
+            FROM chat_messages_old
+            """
+        )
+    )
+    conn.execute(text("DROP TABLE chat_messages_old"))
+    # Row ids changed, so the search index is rebuilt by _create_search
+    conn.execute(text("DROP TABLE IF EXISTS chat_messages_fts"))
+
 
+def _create_search(conn: Connection, name: str, table_sql: str, triggers: list[str]) -> None:
+    if name not in inspect(conn).get_table_names():
+        conn.execute(text(table_sql))
+        # Index the rows stored before search existed
+        conn.execute(text(f"INSERT INTO {name} ({name}) VALUES ('rebuild')"))
 
-def init_db() -> None:
-    Base.metadata.create_all(bind=engine)
+    for trigger in triggers:
+        conn.execute(text(trigger))
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 import pathlib
 from parrot.config import USER_DIR
 
@@ -13,4 +13,16 @@ engine = create_engine(
     DATABASE_URL, future=True, connect_args={"check_same_thread": False}
 )
 
+
+@event.listens_for(engine, "connect")
+def _configure_sqlite(dbapi_connection, connection_record) -> None:
+    # WAL lets readers run while the chat writer thread commits, and with
+    # synchronous=NORMAL a commit no longer waits for an fsync of the main file
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)